@@ -1,6 +1,7 @@
 import os
 import re
 import secrets
+import tempfile
 
 from flask import Flask
 from flask_bcrypt import Bcrypt
@@ -26,6 +27,10 @@ def get_db_connection_settings() -> dict:
             'host': 'localhost',
             'user': 'root',
             'password': 'root',
+            'replicas': [],  # e.g. [{'host': 'replica-1', 'user': 'root', 'password': 'root'}]
+            # Set SHAREABLE_EVENTS_DB_BACKEND=sqlite to run without a MySQL server (tests, benchmarks).
+            'backend': os.environ.get('SHAREABLE_EVENTS_DB_BACKEND', 'mysql'),
+            'sqlite_path': os.environ.get('SHAREABLE_EVENTS_SQLITE_PATH', ':memory:'),
         }
     else:  # Not Windows (server)
         return {
@@ -33,9 +38,131 @@ def get_db_connection_settings() -> dict:
             'host': 'localhost',
             'user': 'root',
             'password': "Server's MySQL database password goes here.",
+            'replicas': [],  # Read replicas. Each one is a dictionary with a 'host', 'user', and 'password'.
+            # Set SHAREABLE_EVENTS_DB_BACKEND=sqlite to run without a MySQL server (tests, benchmarks).
+            'backend': os.environ.get('SHAREABLE_EVENTS_DB_BACKEND', 'mysql'),
+            'sqlite_path': os.environ.get('SHAREABLE_EVENTS_SQLITE_PATH', ':memory:'),
         }
 
 
+def get_db_pool_settings() -> dict:
+    return {
+        'min_size': 1,                  # Connections kept open even when idle.
+        'max_size': 10,                 # Should be at least the number of threads per Gunicorn worker.
+        'checkout_timeout_sec': 10.0,   # How long a request waits for a free connection before failing.
+        'max_idle_sec': 300.0,          # Idle connections above min_size are closed after this long.
+        'ping_after_idle_sec': 30.0,    # Idle connections are checked before reuse after this long.
+        'read_after_write_sec': 5.0,    # After a client writes, its reads stay on the primary for this long.
+        'replica_cooldown_sec': 30.0,   # A replica that fails is skipped for this long.
+        'connect_timeout_sec': 5,       # How long opening a new connection may take.
+        'read_timeout_sec': 30,         # How long any statement may wait for the server's response.
+        'write_timeout_sec': 30,
+        'statement_timeout_ms': 10000,  # Default limit for read-only SELECTs, enforced by the server.
+        # After this many connection failures or timeouts within breaker_window_sec, queries fail immediately
+        # instead of waiting on the database, until breaker_cooldown_sec has passed.
+        'breaker_failure_threshold': 5,
+        'breaker_window_sec': 10.0,
+        'breaker_cooldown_sec': 15.0,
+    }
+
+
+def get_db_retry_settings() -> dict:
+    return {
+        'max_attempts': 3,          # Including the first attempt.
+        'base_delay_sec': 0.05,     # The longest wait before the first retry. Doubles after every attempt.
+        'max_delay_sec': 1.0,
+    }
+
+
+def get_query_cache_settings() -> dict:
+    return {
+        'enabled': True,
+        'max_entries': 10000,   # Least recently used results are dropped beyond this.
+        'ttl_sec': 30.0,        # Also the longest another Gunicorn worker may serve a result that was changed.
+    }
+
+
+def get_client_ip_cache_settings() -> dict:
+    return {
+        'max_entries': 10000,   # Recently seen IP addresses whose client_ip_addresses ID is remembered.
+        # Must be shorter than the time a client_ip_addresses row is kept after its last security log, so that a
+        # remembered ID never belongs to a deleted row.
+        'ttl_sec': 3600.0,
+    }
+
+
+def get_security_log_writer_settings() -> dict:
+    return {
+        # Write SecurityLog records from a background thread, in batches, instead of during each request.
+        'enabled': True,
+        'max_batch_size': 500,
+        'flush_interval_sec': 1.0,      # The longest a record waits for its batch to fill up.
+        'max_buffered': 10000,          # Records are dropped (and counted) beyond this, e.g. while the database is down.
+    }
+
+
+def get_exception_recorder_settings() -> dict:
+    return {
+        # Count SiteException records by fingerprint and write them from a background thread, instead of inserting a
+        # row during each request.
+        'enabled': True,
+        'flush_interval_sec': 5.0,
+        'max_per_sec': 100,             # Beyond this, only one exception in sample_every is fingerprinted...
+        'sample_every': 10,             # ...and it is counted sample_every times.
+        'max_fingerprints': 1000,       # Exceptions with new fingerprints are dropped (and counted) beyond this.
+    }
+
+
+def get_error_page_settings() -> dict:
+    return {
+        # Error pages rendered by error_pages.prerender_error_pages() at startup, for every combination of theme,
+        # login state and cookie consent. Other codes are rendered per request.
+        'prerendered_codes': (400, 401, 403, 404, 405, 413, 429, 500, 503),
+        # Pages that also show an alert (e.g. the URL guessing warning) are cached when first rendered, up to this many.
+        'max_pages': 512,
+    }
+
+
+def get_retention_settings() -> dict:
+    return {
+        # Security logs older than this are moved to security_logs_archive, and client IP addresses without any
+        # remaining logs are deleted. Must be longer than every SECURITY_SETTINGS window, and than the TTL in
+        # get_client_ip_cache_settings().
+        'security_log_retention_days': 30,
+        'archive_security_logs': True,  # False deletes old logs instead of archiving them.
+        'batch_size': 5000,             # Rows moved or deleted per statement.
+    }
+
+
+def get_rate_limit_settings() -> dict:
+    # The SQLite database is private to one process, so its counts must not outlive it in shared memory.
+    use_shared_memory = os.name != 'nt' and get_db_connection_settings()['backend'] != 'sqlite'
+    return {
+        # Where each client's recent security logs are counted. The database is only asked about clients that are
+        # new to the counter.
+        #   'shared_memory':    One table in a memory-mapped file, shared by every worker on this machine.
+        #   'process':          Each worker counts on its own.
+        #   'database':         No counter. Every check runs a COUNT query.
+        'counter': 'shared_memory' if use_shared_memory else 'process',
+        'shared_memory_path': os.path.join(
+            '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'shareable_events_rate_limits'
+        ),
+        'max_clients': 16384,       # (client, log type) pairs. Least recently checked pairs are dropped beyond this.
+        'max_count': 16,            # Logs remembered per (client, log type). Limits must be lower than this.
+    }
+
+
+def get_db_instrumentation_settings() -> dict:
+    return {
+        'samples_per_statement': 1000,      # Recent timings kept per statement for p50/p95/p99.
+        'max_statements': 1000,             # Statements tracked. The least recently run are dropped beyond this.
+        'slow_query_threshold_ms': 200,     # Queries slower than this (wait + execution) are logged.
+        'slow_query_log_path': os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'slow_queries.log'),
+        'slow_query_log_max_bytes': 5 * 1024 * 1024,
+        'slow_query_log_backup_count': 5,
+    }
+
+
 def get_email_settings() -> dict:
     return {
         'server': 'smtp.gmail.com',
@@ -0,0 +1,179 @@
+import atexit
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """
+    Buffers records in memory and writes them from a background thread, in batches of up to max_batch_size.
+    A batch is written as soon as it is full, or flush_interval_sec after its first record was added.
+
+    add() never waits on the writer. If max_buffered records are already waiting (e.g. because the database is
+    down), new records are dropped and counted instead. A batch whose write fails is also dropped and counted,
+    since the database layer has already retried it. Whatever is buffered is written when the process exits.
+
+    Readers that need the database and the buffer to add up (e.g. to count records that aren't written yet) use
+    hold_pending(), which holds back writes while they read.
+    """
+
+    def __init__(
+            self, name: str, write_batch: Callable[[List[Any]], Any], max_batch_size: int = 500,
+            flush_interval_sec: float = 1.0, max_buffered: int = 10000
+    ):
+        assert max_batch_size > 0
+        assert max_buffered >= max_batch_size
+        self.__name = name
+        self.__write_batch = write_batch
+        self.__max_batch_size = max_batch_size
+        self.__flush_interval_sec = flush_interval_sec
+        self.__max_buffered = max_buffered
+
+        self.__condition = threading.Condition()
+        self.__buffer = deque()
+        self.__num_writing = 0
+        self.__num_readers = 0
+        self.__flush_requested = False
+        self.__closed = False
+        self.__thread = None
+        self.__thread_pid = None
+        self.__added = 0
+        self.__written = 0
+        self.__dropped = 0
+        self.__failed = 0
+        self.__batches = 0
+        atexit.register(self.close)
+
+    def add(self, record: Any) -> bool:
+        """
+        :return: False if the record was dropped because the buffer is full or the writer is closed.
+        """
+        with self.__condition:
+            if self.__closed or len(self.__buffer) >= self.__max_buffered:
+                self.__dropped += 1
+                return False
+            self.__start_thread()
+            self.__buffer.append(record)
+            self.__added += 1
+            if len(self.__buffer) == 1 or len(self.__buffer) >= self.__max_batch_size:
+                self.__condition.notify_all()
+            return True
+
+    def flush(self, timeout_sec: float = None) -> bool:
+        """
+        Write everything added so far without waiting for flush_interval_sec.
+
+        :return: False if the records were not all written within timeout_sec.
+        """
+        deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+        with self.__condition:
+            if self.__thread is None or not self.__thread.is_alive():
+                return len(self.__buffer) == 0
+            self.__flush_requested = True
+            self.__condition.notify_all()
+            while len(self.__buffer) > 0 or self.__num_writing > 0:
+                remaining_sec = None if deadline is None else deadline - time.monotonic()
+                if remaining_sec is not None and remaining_sec <= 0:
+                    return False
+                self.__condition.wait(remaining_sec)
+            return True
+
+    @contextlib.contextmanager
+    def hold_pending(self, select: Callable[[Any], bool]) -> Iterator[List[Any]]:
+        """
+        Yield the records for which select() is True that haven't been written yet, and keep any batch from being
+        written until the block ends. The database, read within the block, then holds exactly the records that
+        aren't pending. A batch that is being written is waited for first.
+        """
+        with self.__condition:
+            while self.__num_writing > 0 and self.__is_running():
+                self.__condition.wait()
+            self.__num_readers += 1
+            pending = [record for record in self.__buffer if select(record)]
+        try:
+            yield pending
+        finally:
+            with self.__condition:
+                self.__num_readers -= 1
+                self.__condition.notify_all()
+
+    def close(self, timeout_sec: float = 10.0) -> None:
+        """
+        Write what is buffered, then stop the thread. Records added afterwards are dropped.
+        """
+        self.flush(timeout_sec)
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def get_stats(self) -> dict:
+        with self.__condition:
+            return {
+                'buffered': len(self.__buffer),
+                'added': self.__added,
+                'written': self.__written,
+                'dropped': self.__dropped,
+                'failed': self.__failed,
+                'batches': self.__batches,
+            }
+
+    def __start_thread(self) -> None:
+        # Must be called while holding self.__condition. Threads don't survive a fork, so a forked Gunicorn worker
+        # starts its own.
+        if self.__is_running():
+            return
+        if self.__thread_pid != os.getpid():
+            self.__num_readers = 0  # Readers in the parent process aren't in this one.
+        self.__thread = threading.Thread(target=self.__run, name=self.__name, daemon=True)
+        self.__thread_pid = os.getpid()
+        self.__num_writing = 0
+        self.__thread.start()
+
+    def __is_running(self) -> bool:
+        return self.__thread is not None and self.__thread_pid == os.getpid() and self.__thread.is_alive()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                while len(self.__buffer) == 0 and not self.__closed:
+                    self.__flush_requested = False
+                    self.__condition.notify_all()
+                    self.__condition.wait()
+                if len(self.__buffer) == 0:
+                    return  # Closed.
+
+                # Give the batch a chance to fill up.
+                deadline = time.monotonic() + self.__flush_interval_sec
+                while len(self.__buffer) < self.__max_batch_size and not self.__flush_requested \
+                        and not self.__closed:
+                    remaining_sec = deadline - time.monotonic()
+                    if remaining_sec <= 0:
+                        break
+                    self.__condition.wait(remaining_sec)
+
+                batch = [self.__buffer.popleft() for _ in range(min(len(self.__buffer), self.__max_batch_size))]
+                self.__num_writing = len(batch)  # Also keeps new readers out until the batch is written.
+                while self.__num_readers > 0:
+                    self.__condition.wait()
+
+            try:
+                self.__write_batch(batch)
+                failed = False
+            except Exception:
+                logger.exception("%s could not write a batch of %d records.", self.__name, len(batch))
+                failed = True
+
+            with self.__condition:
+                self.__num_writing = 0
+                self.__batches += 1
+                if failed:
+                    self.__failed += len(batch)
+                else:
+                    self.__written += len(batch)
+                self.__condition.notify_all()
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+
+
+class DatabaseUnavailableError(Exception):
+    def __init__(self, message: str, retry_after_sec: float):
+        super().__init__(message)
+        self.retry_after_sec = retry_after_sec
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency so that threads fail fast instead of piling up behind timeouts.
+
+    closed:     Calls go through. If failure_threshold failures happen within window_sec, the breaker opens.
+    open:       Every call raises a DatabaseUnavailableError until cooldown_sec has passed.
+    half_open:  One trial call goes through (the rest still fail fast). If it succeeds the breaker closes,
+                otherwise it opens again for another cool-down period.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, window_sec: float = 10.0, cooldown_sec: float = 15.0):
+        assert failure_threshold > 0
+        self.__name = name
+        self.__failure_threshold = failure_threshold
+        self.__window_sec = window_sec
+        self.__cooldown_sec = cooldown_sec
+
+        self.__lock = threading.Lock()
+        self.__state = self.CLOSED
+        self.__failure_times = deque()
+        self.__opened_at = 0.0
+        self.__trial_in_progress = False
+        self.__times_opened = 0
+        self.__rejected_calls = 0
+
+    def before_call(self) -> None:
+        """
+        :raises DatabaseUnavailableError: If the call should not be attempted.
+        """
+        with self.__lock:
+            if self.__state == self.CLOSED:
+                return
+            remaining_sec = self.__opened_at + self.__cooldown_sec - time.monotonic()
+            if self.__state == self.OPEN and remaining_sec <= 0:
+                self.__state = self.HALF_OPEN
+            if self.__state == self.HALF_OPEN and not self.__trial_in_progress:
+                self.__trial_in_progress = True
+                return
+            self.__rejected_calls += 1
+        raise DatabaseUnavailableError(
+            "The database '{}' is unavailable after repeated failures. Try again shortly.".format(self.__name),
+            retry_after_sec=max(1.0, remaining_sec)
+        )
+
+    def record_success(self) -> None:
+        with self.__lock:
+            if self.__state != self.CLOSED:
+                self.__state = self.CLOSED
+                self.__trial_in_progress = False
+                self.__failure_times.clear()
+
+    def record_failure(self) -> None:
+        with self.__lock:
+            now = time.monotonic()
+            if self.__state == self.HALF_OPEN:
+                self.__open(now)
+                return
+
+            self.__failure_times.append(now)
+            while len(self.__failure_times) > 0 and now - self.__failure_times[0] > self.__window_sec:
+                self.__failure_times.popleft()
+            if self.__state == self.CLOSED and len(self.__failure_times) >= self.__failure_threshold:
+                self.__open(now)
+
+    def record_ignored(self) -> None:
+        """
+        Call this instead of record_success() or record_failure() when a call ended with an error that says nothing
+        about the dependency's health (e.g. a duplicate key). A half-open trial is then decided by the next call.
+        """
+        with self.__lock:
+            self.__trial_in_progress = False
+
+    def __open(self, now: float) -> None:
+        # Must be called while holding self.__lock.
+        self.__state = self.OPEN
+        self.__opened_at = now
+        self.__trial_in_progress = False
+        self.__failure_times.clear()
+        self.__times_opened += 1
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'state': self.__state,
+                'recent_failures': len(self.__failure_times),
+                'times_opened': self.__times_opened,
+                'rejected_calls': self.__rejected_calls,
+            }
@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    A thread-safe, bounded pool of database connections.
+
+    Connections are created lazily (up to max_size), handed out to one thread at a time, and returned to the pool
+    once the caller is finished with them. Idle connections above min_size are closed after max_idle_sec, and
+    connections that have been idle for longer than ping_after_idle_sec are checked before they are handed out again.
+    """
+
+    def __init__(
+            self,
+            connect: Callable[[], Any],
+            min_size: int = 1,
+            max_size: int = 10,
+            checkout_timeout_sec: float = 10.0,
+            max_idle_sec: float = 300.0,
+            ping_after_idle_sec: float = 30.0,
+            is_alive: Callable[[Any], bool] = None,
+    ):
+        """
+        :param connect:
+            A function that opens and returns a brand-new connection.
+        :param min_size:
+            The number of open connections that are never closed for being idle.
+        :param max_size:
+            The maximum number of connections that can be open (idle or checked out) at the same time.
+        :param checkout_timeout_sec:
+            How long get_connection() waits for a free connection before raising a PoolTimeoutError.
+        :param max_idle_sec:
+            Idle connections above min_size are closed once they have not been used for this long.
+        :param ping_after_idle_sec:
+            Connections that have been idle for this long are passed to is_alive() before being reused.
+        :param is_alive:
+            A function that returns False if the given connection can no longer be used.
+        """
+        assert 0 <= min_size <= max_size
+        assert max_size > 0
+
+        self.__connect = connect
+        self.__min_size = min_size
+        self.__max_size = max_size
+        self.__checkout_timeout_sec = checkout_timeout_sec
+        self.__max_idle_sec = max_idle_sec
+        self.__ping_after_idle_sec = ping_after_idle_sec
+        self.__is_alive = is_alive
+
+        self.__condition = threading.Condition()
+        self.__idle = deque()  # (connection, time it was released). Newest connections are on the right.
+        self.__num_open = 0
+        self.__num_waiting = 0
+        self.__closed = False
+
+    def get_connection(self, timeout_sec: float = None) -> Any:
+        """
+        :param timeout_sec:
+            Overrides the pool's checkout timeout for this call.
+        :return:
+            A connection that belongs to the caller until it is passed to release_connection().
+        """
+        if timeout_sec is None:
+            timeout_sec = self.__checkout_timeout_sec
+        deadline = time.monotonic() + timeout_sec
+
+        while True:
+            connection = None
+            released_at = None
+            reserved_new_connection = False
+            with self.__condition:
+                if self.__closed:
+                    raise Exception("The connection pool has been closed.")
+                stale_connections = self.__pop_stale_connections()
+                if len(self.__idle) > 0:
+                    # Reuse the most recently released connection, since it is the least likely to have gone stale.
+                    connection, released_at = self.__idle.pop()
+                elif self.__num_open < self.__max_size:
+                    self.__num_open += 1  # Reserve a spot before connecting so other threads cannot take it.
+                    reserved_new_connection = True
+                else:
+                    remaining_sec = deadline - time.monotonic()
+                    if remaining_sec <= 0:
+                        raise PoolTimeoutError(
+                            "Timed out after {} seconds while waiting for a database connection. "
+                            "All {} connections are in use.".format(timeout_sec, self.__max_size)
+                        )
+                    self.__num_waiting += 1
+                    try:
+                        self.__condition.wait(remaining_sec)
+                    finally:
+                        self.__num_waiting -= 1
+            self.__close_connections(stale_connections)
+
+            if reserved_new_connection:
+                try:
+                    return self.__connect()
+                except Exception as ex:
+                    self.__forget_connection()
+                    raise ex
+
+            if connection is not None:
+                idle_sec = time.monotonic() - released_at
+                if idle_sec >= self.__ping_after_idle_sec and not self.__connection_is_alive(connection):
+                    self.__close_connections([connection])
+                    self.__forget_connection()
+                    continue
+                return connection
+
+    def release_connection(self, connection: Any, discard: bool = False) -> None:
+        """
+        :param connection:
+            A connection returned by get_connection().
+        :param discard:
+            Close the connection instead of returning it to the pool. Use this when the connection is broken or
+            is in an unknown state.
+        """
+        close_connection = False
+        with self.__condition:
+            if discard or self.__closed:
+                self.__num_open -= 1
+                close_connection = True
+            else:
+                self.__idle.append((connection, time.monotonic()))
+            self.__condition.notify()
+        if close_connection:
+            self.__close_connections([connection])
+
+    def reap_idle_connections(self) -> int:
+        """
+        Close idle connections above min_size that have not been used for max_idle_sec.
+
+        :return: The number of connections that were closed.
+        """
+        with self.__condition:
+            stale_connections = self.__pop_stale_connections()
+        self.__close_connections(stale_connections)
+        return len(stale_connections)
+
+    def close_all(self) -> None:
+        """
+        Close every idle connection and stop handing out new ones. Checked-out connections are closed as soon as
+        they are released.
+        """
+        with self.__condition:
+            self.__closed = True
+            idle_connections = [connection for connection, _ in self.__idle]
+            self.__idle.clear()
+            self.__num_open -= len(idle_connections)
+            self.__condition.notify_all()
+        self.__close_connections(idle_connections)
+
+    def get_stats(self) -> dict:
+        with self.__condition:
+            return {
+                'open': self.__num_open,
+                'idle': len(self.__idle),
+                'in_use': self.__num_open - len(self.__idle),
+                'waiting': self.__num_waiting,
+                'min_size': self.__min_size,
+                'max_size': self.__max_size,
+            }
+
+    def __pop_stale_connections(self) -> List[Any]:
+        # Must be called while holding self.__condition. The oldest idle connections are on the left.
+        stale_connections = []
+        now = time.monotonic()
+        while len(self.__idle) > 0 and self.__num_open > self.__min_size:
+            connection, released_at = self.__idle[0]
+            if now - released_at < self.__max_idle_sec:
+                break
+            self.__idle.popleft()
+            self.__num_open -= 1
+            stale_connections.append(connection)
+        return stale_connections
+
+    def __forget_connection(self) -> None:
+        # Free the spot held by a connection that was closed (or never opened) while checked out.
+        with self.__condition:
+            self.__num_open -= 1
+            self.__condition.notify()
+
+    def __connection_is_alive(self, connection: Any) -> bool:
+        if self.__is_alive is None:
+            return True
+        try:
+            return bool(self.__is_alive(connection))
+        except Exception:
+            return False
+
+    @staticmethod
+    def __close_connections(connections: List[Any]) -> None:
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass  # The connection is being thrown away, so there is nothing else to do with it.
@@ -0,0 +1,273 @@
+import datetime
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, List
+
+import pymysql
+
+
+class DatabaseBackend:
+    """
+    Everything SQLDatabase needs from a database driver. Queries are always written for MySQL with the
+    %(name)s paramstyle; other backends translate them as needed.
+    """
+    name = None
+    supports_statement_timeout = False
+
+    def connect(self, db_name: str, connection_settings: dict, pool_settings: dict) -> Any:
+        raise NotImplementedError()
+
+    def is_alive(self, connection: Any) -> bool:
+        raise NotImplementedError()
+
+    def get_cursor(self, connection: Any, cursor_class: type = None) -> Any:
+        """
+        :param cursor_class:
+            pymysql.cursors.Cursor for tuple rows, pymysql.cursors.SSDictCursor for streamed dictionary rows, or None
+            for the connection's default (buffered dictionary rows).
+        """
+        raise NotImplementedError()
+
+    def get_first_insert_id(self, cursor: Any, num_rows: int) -> int:
+        """
+        :return: The ID of the first row added by a multi-row INSERT of num_rows rows.
+        """
+        raise NotImplementedError()
+
+
+class MySQLBackend(DatabaseBackend):
+    name = 'mysql'
+    supports_statement_timeout = True
+
+    def connect(self, db_name: str, connection_settings: dict, pool_settings: dict) -> pymysql.Connection:
+        return pymysql.connect(
+            db=db_name,
+
+            host=connection_settings['host'],
+            user=connection_settings['user'],
+            password=connection_settings['password'],
+            charset=connection_settings['charset'],
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=connection_settings['autocommit'],
+            connect_timeout=pool_settings.get('connect_timeout_sec', 5),
+            read_timeout=pool_settings.get('read_timeout_sec', None),
+            write_timeout=pool_settings.get('write_timeout_sec', None)
+        )
+
+    def is_alive(self, connection: pymysql.Connection) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except pymysql.err.Error:
+            return False
+
+    def get_cursor(self, connection: pymysql.Connection, cursor_class: type = None) -> pymysql.cursors.Cursor:
+        return connection.cursor(cursor_class)
+
+    def get_first_insert_id(self, cursor: pymysql.cursors.Cursor, num_rows: int) -> int:
+        # MySQL reports the first ID of a multi-row INSERT.
+        return int(cursor.lastrowid)
+
+
+def _adapt_datetime(value: datetime.datetime) -> str:
+    return value.isoformat(' ')
+
+
+def _convert_datetime(value: bytes) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime.datetime, _adapt_datetime)
+sqlite3.register_converter('DATETIME', _convert_datetime)
+
+
+class SQLiteCursor:
+    """
+    Wraps a sqlite3 cursor so that it can be used like a pymysql cursor: it accepts MySQL-style queries and
+    returns dictionary rows unless tuple rows were asked for.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, backend: Any, as_dicts: bool):
+        self.__cursor = cursor
+        self.__backend = backend
+        self.__as_dicts = as_dicts
+        self.__returned_id = None
+
+    @property
+    def description(self) -> tuple or None:
+        return self.__cursor.description
+
+    @property
+    def lastrowid(self) -> int:
+        return self.__returned_id if self.__returned_id is not None else self.__cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self.__cursor.rowcount
+
+    def execute(self, query: str, query_args: dict = None) -> int:
+        statement, statement_args = self.__backend.translate_query(query, query_args or dict())
+        self.__cursor.execute(statement, statement_args)
+        self.__returned_id = None
+        if self.__cursor.description is not None and statement.lstrip()[:6].upper() == 'INSERT':
+            # An upsert translated to INSERT ... RETURNING id. Report the ID like MySQL's LAST_INSERT_ID(id) does.
+            self.__returned_id = self.__cursor.fetchone()[0]
+        return self.__cursor.rowcount
+
+    def executemany(self, query: str, query_args_list: List[dict]) -> int:
+        if len(query_args_list) == 0:
+            return 0
+        if any(isinstance(value, (list, tuple)) for query_args in query_args_list for value in query_args.values()):
+            # Each row's lists may have a different length, so each row needs its own statement.
+            return sum(self.execute(query, query_args) for query_args in query_args_list)
+        statement, _ = self.__backend.translate_query(query, query_args_list[0])
+        self.__cursor.executemany(statement, query_args_list)
+        return self.__cursor.rowcount
+
+    def fetchone(self) -> Any:
+        row = self.__cursor.fetchone()
+        return self.__to_dict(row) if row is not None and self.__as_dicts else row
+
+    def fetchmany(self, size: int) -> list:
+        return self.__convert_rows(self.__cursor.fetchmany(size))
+
+    def fetchall(self) -> list:
+        return self.__convert_rows(self.__cursor.fetchall())
+
+    def close(self) -> None:
+        self.__cursor.close()
+
+    def __convert_rows(self, rows: list) -> list:
+        if not self.__as_dicts:
+            return rows
+        return [self.__to_dict(row) for row in rows]
+
+    def __to_dict(self, row: tuple) -> dict:
+        return {column[0]: value for column, value in zip(self.__cursor.description, row)}
+
+
+class SQLiteBackend(DatabaseBackend):
+    """
+    Runs the application against SQLite instead of MySQL, so that tests and benchmarks don't need a server.
+
+    The schema in sqlite_schema.sql is created on the first connection. With the default path (':memory:'), every
+    connection in the process shares one in-memory database, which lives for as long as the backend object does.
+    """
+    name = 'sqlite'
+    supports_statement_timeout = False
+
+    SCHEMA_PATH = os.path.join(os.path.dirname(__file__), 'sqlite_schema.sql')
+    __PARAMETER_REGEX = re.compile(r"%\((\w+)\)s|%%")
+    __UPSERT_ID_REGEX = re.compile(r"ON DUPLICATE KEY UPDATE\s+(\w+)\s*=\s*LAST_INSERT_ID\(\s*\1\s*\)", re.IGNORECASE)
+    __UPSERT_REGEX = re.compile(r"ON DUPLICATE KEY UPDATE", re.IGNORECASE)
+    __UPSERT_VALUES_REGEX = re.compile(r"\bVALUES\(\s*(\w+)\s*\)", re.IGNORECASE)
+
+    def __init__(self, path: str = ':memory:'):
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__anchor_connection = None  # Keeps a shared in-memory database alive between connections.
+        self.__schema_ready = False
+        self.__translated_queries = dict()
+
+    def connect(self, db_name: str, connection_settings: dict, pool_settings: dict) -> sqlite3.Connection:
+        if self.__path == ':memory:':
+            database, uri = "file:{}?mode=memory&cache=shared".format(db_name), True
+        else:
+            database, uri = self.__path, False
+
+        with self.__lock:
+            connection = self.__open(database, uri, pool_settings)
+            if not self.__schema_ready:
+                with open(self.SCHEMA_PATH, 'r') as schema_file:
+                    connection.executescript(schema_file.read())
+                if uri:
+                    self.__anchor_connection = self.__open(database, uri, pool_settings)
+                self.__schema_ready = True
+        return connection
+
+    @staticmethod
+    def __open(database: str, uri: bool, pool_settings: dict) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            database,
+            uri=uri,
+            timeout=pool_settings.get('checkout_timeout_sec', 10.0),
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False  # The connection pool hands connections to one thread at a time.
+        )
+        connection.execute("PRAGMA foreign_keys = ON;")
+        # In a shared in-memory database, let readers see other connections' uncommitted rows instead of failing
+        # with "database table is locked", much like MySQL readers don't block on writers.
+        connection.execute("PRAGMA read_uncommitted = ON;")
+        return connection
+
+    def is_alive(self, connection: sqlite3.Connection) -> bool:
+        try:
+            connection.execute("SELECT 1;")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def get_cursor(self, connection: sqlite3.Connection, cursor_class: type = None) -> SQLiteCursor:
+        return SQLiteCursor(connection.cursor(), self, as_dicts=cursor_class is not pymysql.cursors.Cursor)
+
+    def get_first_insert_id(self, cursor: SQLiteCursor, num_rows: int) -> int:
+        # SQLite reports the last ID of a multi-row INSERT, and IDs within one statement are consecutive.
+        return int(cursor.lastrowid) - num_rows + 1
+
+    def translate_query(self, query: str, query_args: dict) -> (str, dict):
+        """
+        Convert %(name)s parameters to :name and '%%' to '%'. A list or tuple argument is expanded into one
+        parameter per item, so "id IN %(ids)s" works the same way it does with pymysql.
+
+        "ON DUPLICATE KEY UPDATE" becomes SQLite's "ON CONFLICT DO UPDATE SET", with VALUES(column) as
+        excluded.column. MySQL's get-or-create idiom, "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)", becomes an
+        upsert that returns the ID. Unlike MySQL, SQLite counts that as an update, so the row's updated_at changes.
+        """
+        if not any(isinstance(value, (list, tuple)) for value in query_args.values()):
+            statement = self.__translated_queries.get(query)
+            if statement is None:
+                statement = self.__PARAMETER_REGEX.sub(
+                    lambda match: ':' + match.group(1) if match.group(1) else '%', self.__translate_upsert(query)
+                )
+                if len(self.__translated_queries) < 10000:
+                    self.__translated_queries[query] = statement
+            return statement, query_args
+
+        statement_args = dict()
+
+        def replace(match: re.Match) -> str:
+            key = match.group(1)
+            if key is None:
+                return '%'
+            value = query_args[key]
+            if not isinstance(value, (list, tuple)):
+                statement_args[key] = value
+                return ':' + key
+            names = []
+            for index, item in enumerate(value):
+                name = "{}__{}".format(key, index)
+                statement_args[name] = item
+                names.append(':' + name)
+            return "(" + ", ".join(names) + ")" if len(names) > 0 else "(NULL)"
+
+        return self.__PARAMETER_REGEX.sub(replace, self.__translate_upsert(query)), statement_args
+
+    def __translate_upsert(self, query: str) -> str:
+        query = self.__UPSERT_ID_REGEX.sub(r"ON CONFLICT DO UPDATE SET \1 = \1 RETURNING \1", query)
+        match = self.__UPSERT_REGEX.search(query)
+        if match is None:
+            return query
+        # "ON DUPLICATE KEY UPDATE a = a + VALUES(a)" becomes "ON CONFLICT DO UPDATE SET a = a + excluded.a".
+        assignments = self.__UPSERT_VALUES_REGEX.sub(r"excluded.\1", query[match.end():])
+        return query[:match.start()] + "ON CONFLICT DO UPDATE SET" + assignments
+
+
+def create_backend(connection_settings: dict) -> DatabaseBackend:
+    backend_name = connection_settings.get('backend', MySQLBackend.name)
+    if backend_name == MySQLBackend.name:
+        return MySQLBackend()
+    if backend_name == SQLiteBackend.name:
+        return SQLiteBackend(connection_settings.get('sqlite_path', ':memory:'))
+    raise Exception("Unknown database backend '{}'.".format(backend_name))
@@ -0,0 +1,141 @@
+from typing import Any, Callable
+
+from flask_app.config.connection_pool import ConnectionPool
+from flask_app.config.identity_map import IdentityMap
+
+
+class DatabaseSession:
+    """
+    A unit of work that runs every statement on one pooled connection and inside one transaction.
+
+    The connection is checked out on the first statement, and nothing is committed until commit() is called.
+    The connection goes back to its pool after commit() or rollback(), so a session can be reused afterwards.
+    """
+
+    def __init__(self, get_pool: Callable[[], ConnectionPool]):
+        self.__get_pool = get_pool
+        self.__pool = None
+        self.__connection = None
+        self.__connection_lost = False
+        self.__has_written = False
+        self.__read_from_primary = False
+        self.__read_from_primary_requested = False  # Set by set_read_from_primary(), and kept after commits.
+        self.__after_commit = []
+        self.__identity_map = IdentityMap()
+        self.__query_count = 0
+        self.__wait_ms = 0.0
+        self.__execute_ms = 0.0
+
+    def record_query(self, wait_ms: float, execute_ms: float) -> None:
+        self.__query_count += 1
+        self.__wait_ms += wait_ms
+        self.__execute_ms += execute_ms
+
+    def get_query_totals(self) -> dict:
+        return {
+            'count': self.__query_count,
+            'wait_ms': self.__wait_ms,
+            'execute_ms': self.__execute_ms,
+        }
+
+    def mark_written(self) -> None:
+        """
+        Note that the current transaction has written something, so its reads must go to the primary until it is
+        committed or rolled back.
+        """
+        self.__has_written = True
+        self.__read_from_primary = True
+
+    def has_written(self) -> bool:
+        return self.__has_written
+
+    def set_read_from_primary(self) -> None:
+        """
+        Send every read in this session to the primary, e.g. because the client wrote something moments ago and
+        the replicas may not have caught up yet. Unlike mark_written(), this lasts for the rest of the session.
+        """
+        self.__read_from_primary = True
+        self.__read_from_primary_requested = True
+
+    def reads_from_primary(self) -> bool:
+        return self.__read_from_primary
+
+    def call_after_commit(self, callback: Callable[[], Any]) -> None:
+        """
+        Run callback once the current transaction has been committed. Nothing is run if it is rolled back instead.
+        """
+        self.__after_commit.append(callback)
+
+    def get_identity_map(self) -> IdentityMap:
+        return self.__identity_map
+
+    def has_connection(self) -> bool:
+        return self.__connection is not None
+
+    def get_connection(self) -> Any:
+        if self.__connection_lost:
+            raise Exception(
+                "The database connection for this session was lost and its uncommitted statements were discarded. "
+                "Call rollback() before using the session again."
+            )
+        if self.__connection is None:
+            self.__pool = self.__get_pool()
+            self.__connection = self.__pool.get_connection()
+        return self.__connection
+
+    def discard_connection(self) -> None:
+        """
+        Close the session's connection without returning it to the pool. Use this when the connection is broken.
+        Any uncommitted statements are lost, so the session refuses new statements until rollback() is called.
+        """
+        if self.__connection is not None:
+            self.__pool.release_connection(self.__connection, discard=True)
+            self.__connection = None
+            self.__connection_lost = True
+
+    def commit(self) -> None:
+        if self.__connection_lost:
+            raise Exception("Cannot commit. The database connection for this session was lost.")
+        if self.__connection is None:
+            self.__end_transaction()
+            self.__run_after_commit()
+            return
+
+        try:
+            self.__connection.commit()
+        except Exception as ex:
+            self.discard_connection()
+            raise ex
+        self.__release_connection()
+        self.__end_transaction()
+        self.__run_after_commit()
+
+    def rollback(self) -> None:
+        self.__connection_lost = False
+        self.__end_transaction()
+        self.__after_commit = []
+        self.__identity_map.clear()  # The objects may hold values that were just rolled back.
+        if self.__connection is None:
+            return
+
+        try:
+            self.__connection.rollback()
+        except Exception:
+            self.__pool.release_connection(self.__connection, discard=True)
+            self.__connection = None
+            return
+        self.__release_connection()
+
+    def __end_transaction(self) -> None:
+        self.__has_written = False
+        self.__read_from_primary = self.__read_from_primary_requested
+
+    def __run_after_commit(self) -> None:
+        callbacks = self.__after_commit
+        self.__after_commit = []
+        for callback in callbacks:
+            callback()
+
+    def __release_connection(self) -> None:
+        self.__pool.release_connection(self.__connection)
+        self.__connection = None
@@ -0,0 +1,185 @@
+import atexit
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, List
+
+logger = logging.getLogger(__name__)
+
+# The parts of a message that change from one occurrence to the next: quoted values, hex and decimal numbers.
+MESSAGE_VARIABLE_REGEX = re.compile(r"'[^']*'|\"[^\"]*\"|\b0x[0-9a-fA-F]+\b|\b\d+(?:\.\d+)?\b")
+
+
+def get_message_template(message: str) -> str:
+    return MESSAGE_VARIABLE_REGEX.sub('?', message)
+
+
+def get_fingerprint(ex: BaseException, template: str, frame: Any = None) -> str:
+    """
+    :param frame:
+        Where an exception that was never raised (so has no traceback) was recorded from. Raised exceptions are
+        identified by where they were raised instead.
+    :return: A hash of the exception's type, message template and stack (file and function names only).
+    """
+    if ex.__traceback__ is not None:
+        stack = traceback.StackSummary.extract(traceback.walk_tb(ex.__traceback__), lookup_lines=False)
+    elif frame is not None:
+        stack = traceback.StackSummary.extract(traceback.walk_stack(frame), limit=8, lookup_lines=False)
+    else:
+        stack = []
+    key = "\n".join(
+        [type(ex).__qualname__, template] + ["{}:{}".format(os.path.basename(f.filename), f.name) for f in stack]
+    )
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class ExceptionRecorder:
+    """
+    Counts exceptions in memory, grouped by fingerprint (type, message template and stack), and writes one row per
+    fingerprint from a background thread every flush_interval_sec. An error storm then costs a dictionary update per
+    exception instead of a database write.
+
+    Once more than max_per_sec exceptions have been recorded within a second, only one in sample_every is
+    fingerprinted for the rest of that second, and it is counted sample_every times. If the table of pending
+    fingerprints is full, exceptions with new fingerprints are dropped and counted. Failed writes are kept and retried
+    with the next flush.
+    """
+
+    def __init__(
+            self, write_rows: Callable[[List[dict]], Any], flush_interval_sec: float = 5.0, max_per_sec: int = 100,
+            sample_every: int = 10, max_fingerprints: int = 1000, max_message_length: int = 2000
+    ):
+        """
+        :param write_rows:
+            Called with a list of {'fingerprint', 'type', 'message', 'occurrences'} dictionaries. 'message' is the
+            first message seen for the fingerprint since the last write.
+        """
+        assert sample_every > 0
+        self.__write_rows = write_rows
+        self.__flush_interval_sec = flush_interval_sec
+        self.__max_per_sec = max_per_sec
+        self.__sample_every = sample_every
+        self.__max_fingerprints = max_fingerprints
+        self.__max_message_length = max_message_length
+
+        self.__lock = threading.Lock()
+        self.__flush_lock = threading.Lock()  # Only one flush at a time, so rows aren't written twice.
+        self.__wake_up = threading.Event()
+        self.__pending = dict()  # Fingerprint -> row.
+        self.__second = 0
+        self.__recorded_this_second = 0
+        self.__thread = None
+        self.__thread_pid = None
+        self.__closed = False
+        self.__recorded = 0
+        self.__sampled_out = 0
+        self.__dropped = 0
+        self.__rows_written = 0
+        self.__failed_writes = 0
+        atexit.register(self.close)
+
+    def record(self, ex: BaseException, frame: Any = None) -> None:
+        """
+        :param frame: See get_fingerprint(). Defaults to the caller's frame.
+        """
+        with self.__lock:
+            if self.__closed:
+                self.__dropped += 1
+                return
+            second = int(time.monotonic())
+            if second != self.__second:
+                self.__second = second
+                self.__recorded_this_second = 0
+            self.__recorded_this_second += 1
+            weight = 1
+            if self.__recorded_this_second > self.__max_per_sec:
+                if self.__recorded_this_second % self.__sample_every != 0:
+                    self.__sampled_out += 1
+                    return
+                weight = self.__sample_every
+            self.__start_thread()
+
+        message = str(ex)
+        template = get_message_template(message)
+        fingerprint = get_fingerprint(ex, template, frame if frame is not None else sys._getframe(1))
+        with self.__lock:
+            row = self.__pending.get(fingerprint)
+            if row is None:
+                if len(self.__pending) >= self.__max_fingerprints:
+                    self.__dropped += weight
+                    return
+                row = self.__pending[fingerprint] = {
+                    'fingerprint': fingerprint,
+                    'type': str(type(ex)),
+                    'message': message[:self.__max_message_length],
+                    'occurrences': 0,
+                }
+            row['occurrences'] += weight
+            self.__recorded += weight
+
+    def flush(self) -> int:
+        """
+        Write every pending fingerprint now.
+
+        :return: The number of rows written.
+        """
+        with self.__flush_lock:
+            with self.__lock:
+                rows = list(self.__pending.values())
+                self.__pending = dict()
+            if len(rows) == 0:
+                return 0
+            try:
+                self.__write_rows(rows)
+            except Exception:
+                logger.exception("Could not write %d exception fingerprints. Retrying with the next flush.", len(rows))
+                with self.__lock:
+                    self.__failed_writes += 1
+                    for row in rows:
+                        pending_row = self.__pending.get(row['fingerprint'])
+                        if pending_row is not None:
+                            pending_row['occurrences'] += row['occurrences']
+                        elif len(self.__pending) < self.__max_fingerprints:
+                            self.__pending[row['fingerprint']] = row
+                        else:
+                            self.__dropped += row['occurrences']
+                return 0
+            with self.__lock:
+                self.__rows_written += len(rows)
+            return len(rows)
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__closed = True
+        self.__wake_up.set()
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'pending_fingerprints': len(self.__pending),
+                'recorded': self.__recorded,
+                'sampled_out': self.__sampled_out,
+                'dropped': self.__dropped,
+                'rows_written': self.__rows_written,
+                'failed_writes': self.__failed_writes,
+            }
+
+    def __start_thread(self) -> None:
+        # Must be called while holding self.__lock. Threads don't survive a fork, so a forked Gunicorn worker starts
+        # its own.
+        if self.__thread is not None and self.__thread_pid == os.getpid() and self.__thread.is_alive():
+            return
+        self.__thread = threading.Thread(target=self.__run, name='exception-recorder', daemon=True)
+        self.__thread_pid = os.getpid()
+        self.__thread.start()
+
+    def __run(self) -> None:
+        while not self.__closed:
+            self.__wake_up.wait(self.__flush_interval_sec)
+            self.flush()
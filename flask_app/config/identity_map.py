@@ -0,0 +1,62 @@
+from typing import Any, Iterable
+
+
+class IdentityMap:
+    """
+    The model objects loaded by primary key during one database session (one request). Each row is loaded at most
+    once, and every lookup of it returns the same object. Lookups that found nothing are remembered as None.
+
+    Entries are keyed by (table, primary key), and are discarded whenever SQLDatabase.invalidate_cache() is told that
+    their table was written to.
+    """
+
+    def __init__(self):
+        self.__objects = dict()  # (table, key) -> model object, or None if no row was found.
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, table: str, key: Any) -> (bool, Any):
+        """
+        :return: A (found, model object) tuple.
+        """
+        identity = (table, self.__normalize_key(key))
+        if identity in self.__objects:
+            self.__hits += 1
+            return True, self.__objects[identity]
+        self.__misses += 1
+        return False, None
+
+    def add(self, table: str, key: Any, model: Any or None) -> None:
+        self.__objects[(table, self.__normalize_key(key))] = model
+
+    def discard(self, table: str, keys: Iterable[Any] = None, inserted: bool = False) -> None:
+        """
+        Takes the same arguments as SQLDatabase.invalidate_cache(). If neither keys nor inserted is given, every
+        object from the table is discarded.
+        """
+        if keys is not None:
+            for key in keys:
+                self.__objects.pop((table, self.__normalize_key(key)), None)
+        if inserted:
+            for identity in [i for i, model in self.__objects.items() if i[0] == table and model is None]:
+                del self.__objects[identity]
+        if keys is None and not inserted:
+            for identity in [i for i in self.__objects if i[0] == table]:
+                del self.__objects[identity]
+
+    def clear(self) -> None:
+        self.__objects.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            'objects': len(self.__objects),
+            'hits': self.__hits,
+            'misses': self.__misses,
+        }
+
+    @staticmethod
+    def __normalize_key(key: Any) -> Any:
+        # IDs taken from URLs and forms are strings, but they name the same rows as the integers from the database.
+        if isinstance(key, str) and key.isdigit():
+            return int(key)
+        return key
@@ -0,0 +1,177 @@
+-- The schema from shareable_events_schema.mwb. Every statement can be run against a database that was created from
+-- the Workbench model, so existing databases are brought under version control without changes.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    PRIMARY KEY (id)
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS events (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    name VARCHAR(100) NOT NULL,
+    share_key VARCHAR(255) NOT NULL,
+    start_time DATETIME NOT NULL,
+    end_time DATETIME NOT NULL,
+    description VARCHAR(1000) NOT NULL,
+    canceled TINYINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    UNIQUE INDEX share_key_UNIQUE (share_key)
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS event_locations (
+    event_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    street VARCHAR(255) NOT NULL,
+    city VARCHAR(255) NOT NULL,
+    state VARCHAR(255) NOT NULL,
+    country VARCHAR(255) NOT NULL,
+    postal_code VARCHAR(255) NOT NULL,
+    notes VARCHAR(1000) NOT NULL,
+    PRIMARY KEY (event_id),
+    INDEX fk_event_locations_events_idx (event_id),
+    CONSTRAINT fk_event_locations_events
+        FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS private_events (
+    event_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    secret_key VARCHAR(255) NOT NULL,
+    PRIMARY KEY (event_id),
+    INDEX fk_private_events_events1_idx (event_id),
+    CONSTRAINT fk_private_events_events1
+        FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS attendees (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    event_id INT NOT NULL,
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    PRIMARY KEY (id),
+    INDEX fk_attendees_events1_idx (event_id),
+    CONSTRAINT fk_attendees_events1
+        FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS user_is_attendee (
+    user_id INT NOT NULL,
+    attendee_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, attendee_id),
+    INDEX fk_user_attendees_users1_idx (user_id),
+    INDEX fk_user_attendees_attendees1_idx (attendee_id),
+    CONSTRAINT fk_user_attendees_users1
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_user_attendees_attendees1
+        FOREIGN KEY (attendee_id) REFERENCES attendees (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+DROP TRIGGER IF EXISTS user_is_attendee_AFTER_DELETE;
+
+DELIMITER $$
+CREATE TRIGGER user_is_attendee_AFTER_DELETE AFTER DELETE ON user_is_attendee FOR EACH ROW
+BEGIN
+    DELETE FROM attendees WHERE attendees.id = OLD.attendee_id;
+END$$
+DELIMITER ;
+
+CREATE TABLE IF NOT EXISTS client_ip_addresses (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ip_hash VARCHAR(255) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE INDEX ip_hash_UNIQUE (ip_hash)
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS user_creates_event (
+    user_id INT NOT NULL,
+    event_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, event_id),
+    INDEX fk_user_creates_event_users1_idx (user_id),
+    INDEX fk_user_creates_event_events1_idx (event_id),
+    CONSTRAINT fk_user_creates_event_users1
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_user_creates_event_events1
+        FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS exceptions (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    type VARCHAR(255) NOT NULL,
+    message VARCHAR(2000) NOT NULL,
+    PRIMARY KEY (id)
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS event_comments (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    user_id INT NOT NULL,
+    event_id INT NOT NULL,
+    comment VARCHAR(500) NOT NULL,
+    PRIMARY KEY (id),
+    INDEX fk_users_has_events_events1_idx (event_id),
+    INDEX fk_users_has_events_users1_idx (user_id),
+    CONSTRAINT fk_users_has_events_users1
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT fk_users_has_events_events1
+        FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS verified_emails (
+    user_id INT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    new_email VARCHAR(255) NOT NULL,
+    email_sent TINYINT NOT NULL DEFAULT 0,
+    verified TINYINT NOT NULL DEFAULT 0,
+    verification_code VARCHAR(255) NOT NULL,
+    PRIMARY KEY (user_id),
+    CONSTRAINT fk_verified_emails_users1
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS security_logs (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    client_ip_address_id INT NOT NULL,
+    log_type VARCHAR(255) NOT NULL,
+    PRIMARY KEY (id),
+    INDEX fk_security_issue_logs_client_ip_addresses1_idx (client_ip_address_id),
+    CONSTRAINT fk_security_issue_logs_client_ip_addresses1
+        FOREIGN KEY (client_ip_address_id) REFERENCES client_ip_addresses (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+CREATE TABLE IF NOT EXISTS password_resets (
+    id INT NOT NULL AUTO_INCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    user_id INT NOT NULL,
+    reset_code VARCHAR(255) NOT NULL,
+    success TINYINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    INDEX fk_password_resets_users1_idx (user_id),
+    CONSTRAINT fk_password_resets_users1
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
@@ -0,0 +1,23 @@
+-- Indexes for the columns that request paths filter on. Indexes that already exist (error 1061, duplicate key name)
+-- are skipped, e.g. the unique keys from the Workbench model.
+
+-- Event.get_by_share_key()
+CREATE UNIQUE INDEX share_key_UNIQUE ON events (share_key);
+
+-- The dashboard's event lists, which are filtered and paged by (start_time, id).
+CREATE INDEX events_start_time_idx ON events (start_time, id);
+
+-- ClientIPAddress.get_by_ip_address()
+CREATE UNIQUE INDEX ip_hash_UNIQUE ON client_ip_addresses (ip_hash);
+
+-- SecurityLog.get_by_client_ip_address_id_and_log_type_after_created_at(), run on every rate-limited request.
+CREATE INDEX security_logs_ip_type_created_idx ON security_logs (client_ip_address_id, log_type, created_at);
+
+-- Attendee.get_by_full_name_and_event_id(), used by attendee logins.
+CREATE INDEX attendees_event_name_idx ON attendees (event_id, first_name, last_name);
+
+-- UserIsAttendee.get_by_attendee_id(). The primary key starts with user_id, so it can't be used for this.
+CREATE INDEX fk_user_attendees_attendees1_idx ON user_is_attendee (attendee_id);
+
+-- PasswordReset.get_most_recent_by_user_id()
+CREATE INDEX password_resets_user_created_idx ON password_resets (user_id, created_at);
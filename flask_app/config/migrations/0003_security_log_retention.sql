@@ -0,0 +1,15 @@
+-- Old security logs are moved here in batches by SecurityLog.archive_before(), so that security_logs only holds
+-- what the rate limits need. There is no foreign key, since unused client IP addresses are deleted later on.
+CREATE TABLE IF NOT EXISTS security_logs_archive (
+    id INT NOT NULL,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    client_ip_address_id INT NOT NULL,
+    ip_hash VARCHAR(255) NOT NULL,
+    log_type VARCHAR(255) NOT NULL,
+    PRIMARY KEY (id),
+    INDEX security_logs_archive_created_at_idx (created_at)
+) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+
+-- Finds where the logs that are past their retention period end.
+CREATE INDEX security_logs_created_at_idx ON security_logs (created_at);
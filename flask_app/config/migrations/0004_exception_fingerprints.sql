@@ -0,0 +1,7 @@
+-- SiteException.record() counts exceptions by fingerprint and upserts one row per fingerprint, instead of inserting
+-- a row per exception. Rows written before this migration have no fingerprint.
+ALTER TABLE exceptions ADD COLUMN fingerprint VARCHAR(64) NULL;
+
+ALTER TABLE exceptions ADD COLUMN occurrences INT NOT NULL DEFAULT 1;
+
+CREATE UNIQUE INDEX exceptions_fingerprint_UNIQUE ON exceptions (fingerprint);
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Set
+
+
+class QueryCache:
+    """
+    An in-process LRU cache of query results. Every entry expires after ttl_sec, and every entry has a set of tags.
+    Invalidating a tag removes every entry that has it.
+
+    SQLDatabase tags each result with its table ('events'), with each returned row ('events:5'), and, when nothing
+    was found, with the table's insert tag ('events:insert'). Changing row 5 then only removes the results that
+    contain row 5, while adding a row removes the "not found" results that the new row might now match.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_sec: float = 30.0):
+        assert max_entries > 0
+        self.__max_entries = max_entries
+        self.__ttl_sec = ttl_sec
+
+        self.__lock = threading.Lock()
+        self.__entries = OrderedDict()  # Key -> (expires at, value, tags). Most recently used entries are last.
+        self.__keys_by_tag = dict()
+        self.__generation = 0  # Increases on every invalidation.
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    def get(self, key: Any) -> (bool, Any):
+        """
+        :return: A (found, value) tuple.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return True, entry[1]
+            if entry is not None:
+                self.__remove(key)
+            self.__misses += 1
+            return False, None
+
+    def get_generation(self) -> int:
+        return self.__generation
+
+    def set(self, key: Any, value: Any, tags: Iterable[str], generation: int = None) -> None:
+        """
+        :param generation:
+            The value of get_generation() from before the query was run. If anything was invalidated since then,
+            the value may already be out of date, so it is not stored.
+        """
+        tags = set(tags)
+        with self.__lock:
+            if generation is not None and generation != self.__generation:
+                return
+            if key in self.__entries:
+                self.__remove(key)
+            self.__entries[key] = (time.monotonic() + self.__ttl_sec, value, tags)
+            for tag in tags:
+                self.__keys_by_tag.setdefault(tag, set()).add(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__remove(next(iter(self.__entries)))
+                self.__evictions += 1
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """
+        :return: The number of entries that were removed.
+        """
+        num_removed = 0
+        with self.__lock:
+            self.__generation += 1
+            for tag in tags:
+                for key in list(self.__keys_by_tag.get(tag, ())):
+                    self.__remove(key)
+                    num_removed += 1
+            self.__invalidations += num_removed
+        return num_removed
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__generation += 1
+            self.__entries.clear()
+            self.__keys_by_tag.clear()
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'entries': len(self.__entries),
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'invalidations': self.__invalidations,
+            }
+
+    def __remove(self, key: Any) -> None:
+        # Must be called while holding self.__lock.
+        _, _, tags = self.__entries.pop(key)
+        for tag in tags:
+            keys = self.__keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self.__keys_by_tag[tag]
+
+
+def get_row_tags(table: str, ids: Iterable[Any]) -> Set[str]:
+    return {"{}:{}".format(table, row_id) for row_id in ids}
+
+
+def get_insert_tag(table: str) -> str:
+    return "{}:insert".format(table)
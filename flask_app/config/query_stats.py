@@ -0,0 +1,139 @@
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from logging.handlers import RotatingFileHandler
+from typing import List
+
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def normalize_statement(query: str) -> str:
+    """
+    Collapse a query into a single line so that the same statement is grouped together no matter how it was
+    indented. Arguments are passed separately (as %(name)s), so the statement text itself doesn't change per call.
+    """
+    return WHITESPACE_REGEX.sub(' ', query).strip().rstrip(';').strip()
+
+
+def get_percentile(sorted_values: List[float], percentile: float) -> float:
+    if len(sorted_values) == 0:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StatementStats:
+    def __init__(self, statement: str, max_samples: int):
+        self.statement = statement
+        self.callers = set()
+        self.count = 0
+        self.rows = 0
+        self.total_wait_ms = 0.0
+        self.total_execute_ms = 0.0
+        self.samples_ms = deque(maxlen=max_samples)  # Most recent execution times, used for percentiles.
+
+    def to_dict(self) -> dict:
+        sorted_samples = sorted(self.samples_ms)
+        return {
+            'statement': self.statement,
+            'callers': sorted(self.callers),
+            'count': self.count,
+            'rows': self.rows,
+            'total_ms': round(self.total_execute_ms, 3),
+            'avg_wait_ms': round(self.total_wait_ms / self.count, 3) if self.count > 0 else 0.0,
+            'p50_ms': round(get_percentile(sorted_samples, 50), 3),
+            'p95_ms': round(get_percentile(sorted_samples, 95), 3),
+            'p99_ms': round(get_percentile(sorted_samples, 99), 3),
+        }
+
+
+class QueryStats:
+    """
+    In-process aggregate of query timings, grouped by normalized statement.
+    Wait time (getting a connection) is kept separate from execution time.
+
+    At most max_statements statements are tracked, so that queries built with variable text can't grow the table
+    forever. Beyond that, the least recently run statement is dropped, along with its timings.
+    """
+
+    def __init__(self, max_samples_per_statement: int = 1000, max_statements: int = 1000):
+        assert max_statements > 0
+        self.__max_samples_per_statement = max_samples_per_statement
+        self.__max_statements = max_statements
+        self.__lock = threading.Lock()
+        self.__statements = OrderedDict()  # Least recently run first.
+        self.__evicted = 0
+        self.__normalized_queries = dict()  # Raw query string -> normalized statement, to avoid re-running the regex.
+
+    def record(self, query: str, caller: str, wait_ms: float, execute_ms: float, rows: int) -> None:
+        statement = self.__normalized_queries.get(query)
+        if statement is None:
+            statement = normalize_statement(query)
+            if len(self.__normalized_queries) < 10000:
+                self.__normalized_queries[query] = statement
+
+        with self.__lock:
+            stats = self.__statements.get(statement)
+            if stats is None:
+                if len(self.__statements) >= self.__max_statements:
+                    self.__statements.popitem(last=False)
+                    self.__evicted += 1
+                stats = StatementStats(statement, self.__max_samples_per_statement)
+                self.__statements[statement] = stats
+            else:
+                self.__statements.move_to_end(statement)
+            stats.callers.add(caller)
+            stats.count += 1
+            stats.rows += max(0, rows)
+            stats.total_wait_ms += wait_ms
+            stats.total_execute_ms += execute_ms
+            stats.samples_ms.append(execute_ms)
+
+    def get_summary(self) -> List[dict]:
+        """
+        :return: One dictionary per statement, with the statements that took the most total time first.
+        """
+        with self.__lock:
+            summary = [stats.to_dict() for stats in self.__statements.values()]
+        summary.sort(key=lambda x: x['total_ms'], reverse=True)
+        return summary
+
+    def get_evicted_count(self) -> int:
+        """
+        :return: How many statements were dropped to stay within max_statements.
+        """
+        with self.__lock:
+            return self.__evicted
+
+    def format_summary(self) -> str:
+        lines = [
+            "{:>8} {:>10} {:>9} {:>9} {:>9} {:>9} {:>9}  {}".format(
+                'count', 'total_ms', 'wait_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'rows', 'statement / callers'
+            )
+        ]
+        for stats in self.get_summary():
+            lines.append(
+                "{count:>8} {total_ms:>10.1f} {avg_wait_ms:>9.3f} {p50_ms:>9.3f} {p95_ms:>9.3f} {p99_ms:>9.3f} "
+                "{rows:>9}  {statement}".format(**stats)
+            )
+            lines.append("{}  {}".format(' ' * 69, ', '.join(stats['callers'])))
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__statements.clear()
+
+
+def get_slow_query_logger(log_path: str, max_bytes: int, backup_count: int) -> logging.Logger:
+    logger = logging.getLogger('flask_app.slow_queries')
+    if len(logger.handlers) == 0:
+        log_folder = os.path.dirname(os.path.abspath(log_path))
+        os.makedirs(log_folder, exist_ok=True)
+        handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(asctime)s [pid %(process)d] %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
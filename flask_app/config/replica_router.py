@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Callable, List
+
+
+class ReplicaRouter:
+    """
+    Picks read replicas in round-robin order. A replica that fails is skipped for cooldown_sec. When the cooldown
+    is over, the next choose() that reaches the replica first checks it with is_healthy() (e.g. a ping), and only
+    returns it if the check passes; otherwise the replica is skipped for another cooldown_sec. If no replica is
+    healthy, choose() returns None so the caller can fall back to the primary.
+    """
+
+    def __init__(
+            self, replica_names: List[str], cooldown_sec: float = 30.0, is_healthy: Callable[[str], bool] = None
+    ):
+        """
+        :param is_healthy:
+            Called with a replica's name before the replica is used again after a failure. None trusts a replica as
+            soon as its cooldown is over.
+        """
+        self.__replica_names = list(replica_names)
+        self.__cooldown_sec = cooldown_sec
+        self.__is_healthy = is_healthy
+        self.__lock = threading.Lock()
+        self.__next_index = 0
+        self.__unhealthy_until = dict()
+        self.__failure_counts = dict()
+        self.__needs_check = set()  # Replicas that failed and haven't passed a health check since.
+
+    def choose(self) -> str or None:
+        for _ in range(len(self.__replica_names)):
+            with self.__lock:
+                now = time.monotonic()
+                name = self.__replica_names[self.__next_index]
+                self.__next_index = (self.__next_index + 1) % len(self.__replica_names)
+                if self.__unhealthy_until.get(name, 0.0) > now:
+                    continue
+                if name not in self.__needs_check or self.__is_healthy is None:
+                    self.__needs_check.discard(name)
+                    return name
+                # Keep other threads away from the replica while this one checks it.
+                self.__unhealthy_until[name] = now + self.__cooldown_sec
+
+            if self.__check(name):
+                with self.__lock:
+                    self.__needs_check.discard(name)
+                    self.__unhealthy_until.pop(name, None)
+                return name
+            self.mark_failed(name)
+        return None
+
+    def mark_failed(self, name: str) -> None:
+        with self.__lock:
+            self.__unhealthy_until[name] = time.monotonic() + self.__cooldown_sec
+            self.__failure_counts[name] = self.__failure_counts.get(name, 0) + 1
+            self.__needs_check.add(name)
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            now = time.monotonic()
+            return {
+                name: {
+                    'healthy': self.__unhealthy_until.get(name, 0.0) <= now and name not in self.__needs_check,
+                    'failures': self.__failure_counts.get(name, 0),
+                }
+                for name in self.__replica_names
+            }
+
+    def __check(self, name: str) -> bool:
+        try:
+            return bool(self.__is_healthy(name))
+        except Exception:
+            return False
@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+import pymysql
+
+# The server rejected or rolled back the statement, so running it again cannot apply it twice.
+NOT_APPLIED_ERROR_CODES = {
+    1040: 'too_many_connections',
+    1205: 'lock_wait_timeout',
+    1213: 'deadlock',
+    2003: 'cannot_connect',
+}
+# The connection was lost while the statement was running, so it may or may not have been applied.
+CONNECTION_LOST_ERROR_CODES = {
+    2006: 'server_gone_away',
+    2013: 'lost_connection',
+}
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed statement should be run again, and waits before it is.
+
+    Statements that the server never applied (deadlocks, lock wait timeouts, failed connections) are always safe to
+    retry. Statements that were cut off by a lost connection are only retried if they are idempotent. Nothing is
+    retried once earlier statements in the same transaction have written something, since the error may have rolled
+    them back as well.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay_sec: float = 0.05, max_delay_sec: float = 1.0):
+        """
+        :param max_attempts:
+            The most times one statement is run, including the first attempt.
+        :param base_delay_sec:
+            The longest wait before the first retry. The limit doubles after every attempt, up to max_delay_sec.
+            The actual wait is random (between zero and the limit) so that retrying requests don't collide again.
+        """
+        assert max_attempts >= 1
+        self.__max_attempts = max_attempts
+        self.__base_delay_sec = base_delay_sec
+        self.__max_delay_sec = max_delay_sec
+
+        self.__lock = threading.Lock()
+        self.__retries = dict()  # Error name -> number of retries caused by it.
+        self.__recovered = 0
+        self.__gave_up = 0
+
+    @staticmethod
+    def get_error_name(ex: Exception) -> str or None:
+        """
+        :return: The name of the transient error, or None if the error is not transient.
+        """
+        if isinstance(ex, pymysql.err.InterfaceError):
+            return 'connection_closed'
+        if isinstance(ex, pymysql.err.MySQLError) and len(ex.args) > 0 and isinstance(ex.args[0], int):
+            code = ex.args[0]
+            return NOT_APPLIED_ERROR_CODES.get(code) or CONNECTION_LOST_ERROR_CODES.get(code)
+        return None
+
+    @staticmethod
+    def was_not_applied(ex: Exception) -> bool:
+        return (
+            isinstance(ex, pymysql.err.MySQLError) and len(ex.args) > 0 and ex.args[0] in NOT_APPLIED_ERROR_CODES
+        )
+
+    def should_retry(self, ex: Exception, attempt: int, idempotent: bool, in_transaction: bool) -> bool:
+        """
+        :param attempt:
+            How many times the statement has been run so far, starting at 1.
+        :param idempotent:
+            Whether running the statement twice has the same effect as running it once.
+        :param in_transaction:
+            Whether earlier statements in the same transaction have written something.
+        """
+        if self.get_error_name(ex) is None:
+            return False
+        if attempt < self.__max_attempts and not in_transaction and (idempotent or self.was_not_applied(ex)):
+            return True
+        with self.__lock:
+            self.__gave_up += 1
+        return False
+
+    def get_delay_sec(self, attempt: int) -> float:
+        return random.uniform(0, min(self.__max_delay_sec, self.__base_delay_sec * 2 ** (attempt - 1)))
+
+    def wait_before_retry(self, ex: Exception, attempt: int) -> None:
+        error_name = self.get_error_name(ex)
+        with self.__lock:
+            self.__retries[error_name] = self.__retries.get(error_name, 0) + 1
+        time.sleep(self.get_delay_sec(attempt))
+
+    def record_recovered(self) -> None:
+        with self.__lock:
+            self.__recovered += 1
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'retries': dict(self.__retries),
+                'recovered': self.__recovered,  # Statements that succeeded after at least one retry.
+                'gave_up': self.__gave_up,      # Transient errors that were raised instead of retried.
+            }
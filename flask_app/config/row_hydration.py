@@ -0,0 +1,73 @@
+import threading
+from typing import Any, Dict, List, Sequence
+
+_column_maps = dict()
+_column_maps_lock = threading.Lock()
+
+
+def get_column_map(description: Sequence[tuple]) -> Dict[str, int]:
+    """
+    :param description:
+        A cursor's description, with the column name as the first item of each entry.
+    :return:
+        A dictionary of column name -> position in each row. Every result set with the same columns shares the
+        same dictionary, so it is only built once per distinct query shape.
+    """
+    column_names = tuple(column[0] for column in description)
+    column_map = _column_maps.get(column_names)
+    if column_map is None:
+        with _column_maps_lock:
+            column_map = _column_maps.setdefault(
+                column_names, {name: index for index, name in enumerate(column_names)}
+            )
+    return column_map
+
+
+class RowView:
+    """
+    Read-only, dictionary-like access to one tuple row (row['column']), so that model constructors written for
+    DictCursor dictionaries can be used unchanged. One view is reused for a whole result set, so a model must copy
+    the values it needs and never keep a reference to the view itself.
+    """
+    __slots__ = ('__columns', '__row')
+
+    def __init__(self, columns: Dict[str, int], row: tuple = ()):
+        self.__columns = columns
+        self.__row = row
+
+    def set_row(self, row: tuple) -> None:
+        self.__row = row
+
+    def __getitem__(self, key: str) -> Any:
+        return self.__row[self.__columns[key]]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__columns
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self.__columns.get(key)
+        return default if index is None else self.__row[index]
+
+    def keys(self):
+        return self.__columns.keys()
+
+    def to_dict(self) -> dict:
+        return {key: self.__row[index] for key, index in self.__columns.items()}
+
+
+def hydrate_rows(cls: type, columns: Dict[str, int], rows: Sequence[tuple]) -> List[Any]:
+    """
+    Build one cls object per row by passing cls(data) a RowView instead of a dictionary.
+
+    If cls has a '_siblings' slot, every object gets the result list in it, so that lazy relations can be loaded for
+    the whole result at once (see flask_app.utils.lazy_relations).
+    """
+    view = RowView(columns)
+    result = []
+    for row in rows:
+        view.set_row(row)
+        result.append(cls(view))
+    if '_siblings' in getattr(cls, '__slots__', ()):
+        for model in result:
+            model._siblings = result
+    return result
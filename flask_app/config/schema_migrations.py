@@ -0,0 +1,199 @@
+import ast
+import os
+import re
+from typing import Any, Callable, List
+
+import pymysql
+
+from flask_app.config.query_stats import normalize_statement
+from flask_app.config.sqldatabase import SQLDatabase
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(__file__), 'migrations')
+MODELS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models')
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def read_statements(self) -> List[str]:
+        with open(self.path, 'r') as migration_file:
+            return split_statements(migration_file.read())
+
+
+class SchemaMigrator:
+    """
+    Creates and upgrades the MySQL schema from the numbered .sql files in flask_app/config/migrations/. Each file is
+    applied once, in order, and then recorded in the schema_migrations table.
+
+    Migrations are written so that they can also be applied to a database that was created by hand from
+    shareable_events_schema.mwb: tables use IF NOT EXISTS, and columns or indexes that already exist are skipped.
+
+    Statements go through pymysql's parameter formatting, so a literal % must be written as %%.
+
+    SQLite databases don't use migrations. They are created from sqlite_schema.sql, which must be kept in step.
+    """
+    __FILE_NAME_REGEX = re.compile(r"^(\d{4})_(\w+)\.sql$")
+    __SKIPPED_ERROR_CODES = {
+        1060,   # Duplicate column name: the column already exists.
+        1061,   # Duplicate key name: the index already exists.
+    }
+
+    def __init__(self, db: SQLDatabase, migrations_path: str = MIGRATIONS_PATH):
+        self.__db = db
+        self.__migrations_path = migrations_path
+
+    def get_migrations(self) -> List[Migration]:
+        migrations = []
+        for file_name in sorted(os.listdir(self.__migrations_path)):
+            match = self.__FILE_NAME_REGEX.match(file_name)
+            if match is not None:
+                migrations.append(Migration(
+                    int(match.group(1)), match.group(2), os.path.join(self.__migrations_path, file_name)
+                ))
+        versions = [migration.version for migration in migrations]
+        if len(set(versions)) != len(versions):
+            raise Exception("Two migrations in '{}' have the same version number.".format(self.__migrations_path))
+        return migrations
+
+    def get_applied_versions(self) -> set:
+        self.__create_migrations_table()
+        rows = self.__db.execute_query("SELECT version FROM schema_migrations;", use_primary=True)
+        return {row['version'] for row in rows}
+
+    def get_pending_migrations(self) -> List[Migration]:
+        applied_versions = self.get_applied_versions()
+        return [migration for migration in self.get_migrations() if migration.version not in applied_versions]
+
+    def upgrade(self, log: Callable[[str], Any] = print) -> List[Migration]:
+        """
+        Apply every pending migration. MySQL commits DDL statements immediately, so a migration that fails part way
+        is not recorded, and is run again from the start on the next upgrade. Migrations must be safe to re-run.
+
+        :return: The migrations that were applied.
+        """
+        applied = []
+        for migration in self.get_pending_migrations():
+            log("Applying {:04d}_{}...".format(migration.version, migration.name))
+            for statement in migration.read_statements():
+                try:
+                    self.__db.execute_query(statement, use_primary=True)
+                except pymysql.err.MySQLError as ex:
+                    if len(ex.args) == 0 or ex.args[0] not in self.__SKIPPED_ERROR_CODES:
+                        raise
+                    log("    Skipped: {}".format(ex.args[1] if len(ex.args) > 1 else ex))
+            self.__db.execute_query(
+                "INSERT INTO schema_migrations (version, name) VALUES (%(version)s, %(name)s);",
+                {'version': migration.version, 'name': migration.name, }
+            )
+            applied.append(migration)
+        return applied
+
+    def __create_migrations_table(self) -> None:
+        self.__db.execute_query(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (version)
+            ) ENGINE = InnoDB DEFAULT CHARACTER SET = utf8;
+            """
+        )
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Split a migration file into statements. Like the mysql client, a "DELIMITER $$" line changes the text that ends a
+    statement, so that triggers can contain semicolons. Lines that start with "--" are comments.
+    """
+    statements = []
+    delimiter = ';'
+    lines = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if stripped.startswith('--') or (stripped == '' and len(lines) == 0):
+            continue
+        lines.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(lines).rstrip()[:-len(delimiter)].strip()
+            if statement != '':
+                statements.append(statement)
+            lines = []
+    if '\n'.join(lines).strip() != '':
+        statements.append('\n'.join(lines).strip())
+    return statements
+
+
+def find_model_queries(models_path: str = MODELS_PATH) -> List[dict]:
+    """
+    :return:
+        A list of {'source': 'event.py:120', 'query': ...} for every string literal in the models that is a SELECT
+        statement. Queries that are built at run time are only found in pieces, if at all.
+    """
+    queries = []
+    for file_name in sorted(os.listdir(models_path)):
+        if not file_name.endswith('.py'):
+            continue
+        with open(os.path.join(models_path, file_name), 'r') as model_file:
+            tree = ast.parse(model_file.read(), filename=file_name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) \
+                    and node.value.lstrip().upper().startswith('SELECT'):
+                queries.append({
+                    'source': "{}:{}".format(file_name, node.lineno),
+                    'query': normalize_statement(node.value),
+                })
+    return queries
+
+
+PARAMETER_REGEX = re.compile(r"%\((\w+)\)s|%%")
+
+
+def fill_query_parameters(query: str) -> str:
+    """
+    Replace each %(name)s parameter with a sample value that suits its name, so that the query can be EXPLAINed.
+    The plan only depends on which columns are compared, not on the values.
+    """
+
+    def sample_value(match: re.Match) -> str:
+        name = match.group(1)
+        if name is None:
+            return '%%'  # Left for pymysql, which still formats the query.
+        if name.endswith('ids'):
+            return "(1, 2)"
+        if name == 'id' or name.endswith('_id') or name in ('limit', 'offset', 'verified'):
+            return "1"
+        if name.endswith(('_time', '_date', '_at', '_after', '_before')):
+            return "'2000-01-01 00:00:00'"
+        return "'sample'"
+
+    return PARAMETER_REGEX.sub(sample_value, query)
+
+
+def explain_model_queries(db: SQLDatabase, queries: List[dict] = None) -> List[dict]:
+    """
+    Run EXPLAIN on every query from find_model_queries().
+
+    :return:
+        One dictionary per query: 'source', 'query', 'plan' (the EXPLAIN rows), 'full_scans' (the tables that are read
+        in full, i.e. with access type ALL) and 'error' (if the query could not be EXPLAINed). MySQL may choose a full
+        scan over an index for a table with only a few rows, so run this against a database with realistic data.
+    """
+    if queries is None:
+        queries = find_model_queries()
+    report = []
+    for query in queries:
+        entry = {'source': query['source'], 'query': query['query'], 'plan': [], 'full_scans': [], 'error': None}
+        try:
+            entry['plan'] = db.execute_query("EXPLAIN " + fill_query_parameters(query['query']), use_primary=True)
+        except pymysql.err.MySQLError as ex:
+            entry['error'] = str(ex)
+        entry['full_scans'] = [row['table'] for row in entry['plan'] if row.get('type') == 'ALL']
+        report.append(entry)
+    return report
@@ -0,0 +1,208 @@
+import contextlib
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows. Use SlidingWindowCounter there instead.
+    fcntl = None
+
+
+class SharedWindowCounter:
+    """
+    The same counter as SlidingWindowCounter, but kept in a memory-mapped file, so that every Gunicorn worker on this
+    machine shares one count per key, and counts survive worker restarts.
+
+    The file is a fixed-size hash table of num_slots slots. A key's slot is found by hashing it and checking
+    probe_length neighbouring slots; if all of them hold other keys, the least recently used one is reused, and its
+    key will be loaded again when it is next needed. Each slot is a ring of the max_count most recent timestamps.
+
+    Workers lock only the slots they probe (with fcntl), and threads within a worker also share a threading.Lock,
+    since fcntl locks belong to the whole process. Every worker must use the same num_slots and max_count for a file,
+    so the file name should include them (see get_rate_limiter()).
+    """
+    __MAGIC = b'SECNTR01'
+    __HEADER = struct.Struct('<8sII')   # Magic, num_slots, max_count.
+
+    def __init__(
+            self, path: str, max_age_sec: float, max_count: int = 16, num_slots: int = 16384, probe_length: int = 8
+    ):
+        assert fcntl is not None, "SharedWindowCounter needs fcntl, which is not available on this platform."
+        assert max_age_sec > 0
+        assert max_count > 0
+        assert num_slots >= probe_length > 0
+        self.__path = path
+        self.__max_age_sec = max_age_sec
+        self.__max_count = max_count
+        self.__num_slots = num_slots
+        self.__probe_length = probe_length
+        # Key hash, last used time, next index in the ring, then the ring of timestamps (0.0 for unused entries).
+        self.__slot = struct.Struct('<QdII{}d'.format(max_count))
+        self.__size = self.__HEADER.size + self.__slot.size * num_slots
+
+        self.__lock = threading.Lock()
+        self.__file = None
+        self.__map = None
+        self.__seeds = 0
+        self.__hits = 0
+        self.__evictions = 0
+
+    def is_seeded(self, key: Any) -> bool:
+        key_hash = self.__hash_key(key)
+        with self.__locked_slots(key_hash) as first_slot:
+            return self.__find_slot(first_slot, key_hash) is not None
+
+    def seed(self, key: Any, timestamps: Iterable[float]) -> None:
+        """
+        Start counting a key in every worker, replacing anything already counted for it.
+
+        :param timestamps: The times (from time.time()) of the key's recent events, in any order.
+        """
+        key_hash = self.__hash_key(key)
+        now = time.time()
+        timestamps = [timestamp for timestamp in sorted(timestamps) if timestamp >= now - self.__max_age_sec]
+        timestamps = timestamps[-self.__max_count:]
+        ring = timestamps + [0.0] * (self.__max_count - len(timestamps))
+        with self.__locked_slots(key_hash) as first_slot:
+            slot = self.__find_slot(first_slot, key_hash)
+            if slot is None:
+                slot = self.__choose_free_slot(first_slot)
+            self.__write_slot(slot, key_hash, now, len(timestamps) % self.__max_count, ring)
+            self.__seeds += 1
+
+    def add(self, key: Any, timestamp: float = None) -> None:
+        key_hash = self.__hash_key(key)
+        with self.__locked_slots(key_hash) as first_slot:
+            slot = self.__find_slot(first_slot, key_hash)
+            if slot is None:
+                return
+            _, last_used, next_index, _, *ring = self.__read_slot(slot)
+            ring[next_index] = time.time() if timestamp is None else timestamp
+            self.__write_slot(slot, key_hash, last_used, (next_index + 1) % self.__max_count, ring)
+
+    def count(self, key: Any, window_sec: float) -> int or None:
+        """
+        :return: The number of events in the last window_sec, up to max_count, or None if the key isn't seeded.
+        """
+        assert window_sec <= self.__max_age_sec
+        key_hash = self.__hash_key(key)
+        now = time.time()
+        with self.__locked_slots(key_hash) as first_slot:
+            slot = self.__find_slot(first_slot, key_hash)
+            if slot is None:
+                return None
+            _, _, next_index, _, *ring = self.__read_slot(slot)
+            self.__write_slot(slot, key_hash, now, next_index, ring)
+            self.__hits += 1
+        return sum(1 for timestamp in ring if timestamp >= now - window_sec)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__open()
+            fcntl.lockf(self.__file, fcntl.LOCK_EX)
+            try:
+                self.__map[self.__HEADER.size:] = bytes(self.__size - self.__HEADER.size)
+            finally:
+                fcntl.lockf(self.__file, fcntl.LOCK_UN)
+
+    def get_stats(self) -> dict:
+        """
+        'keys' is read from the shared table. The other numbers only count this process's calls.
+        """
+        with self.__lock:
+            self.__open()
+            num_keys = sum(
+                1 for slot in range(self.__num_slots)
+                if self.__map[self.__get_offset(slot):self.__get_offset(slot) + 8] != bytes(8)
+            )
+            return {
+                'keys': num_keys,
+                'seeds': self.__seeds,
+                'hits': self.__hits,
+                'evictions': self.__evictions,
+            }
+
+    def __open(self) -> None:
+        # Must be called while holding self.__lock. Opened on first use, so that importing the app doesn't create the
+        # file. Whichever worker opens it first creates the empty table.
+        if self.__map is not None:
+            return
+        directory = os.path.dirname(self.__path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        file = os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(file, fcntl.LOCK_EX)
+        try:
+            header = self.__HEADER.pack(self.__MAGIC, self.__num_slots, self.__max_count)
+            if os.fstat(file).st_size == 0:
+                os.ftruncate(file, self.__size)
+                os.pwrite(file, header, 0)
+            elif os.pread(file, self.__HEADER.size, 0) != header or os.fstat(file).st_size != self.__size:
+                raise Exception(
+                    "'{}' is not a counter table with {} slots of {} timestamps.".format(
+                        self.__path, self.__num_slots, self.__max_count
+                    )
+                )
+            self.__map = mmap.mmap(file, self.__size)
+            self.__file = file
+        except BaseException:
+            fcntl.lockf(file, fcntl.LOCK_UN)
+            os.close(file)
+            raise
+        fcntl.lockf(file, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def __locked_slots(self, key_hash: int) -> Iterator[int]:
+        """
+        Lock the probe_length slots that key_hash may be stored in.
+
+        :return: The first of the slots.
+        """
+        with self.__lock:
+            self.__open()
+            first_slot = key_hash % (self.__num_slots - self.__probe_length + 1)
+            length, offset = self.__slot.size * self.__probe_length, self.__get_offset(first_slot)
+            fcntl.lockf(self.__file, fcntl.LOCK_EX, length, offset)
+            try:
+                yield first_slot
+            finally:
+                fcntl.lockf(self.__file, fcntl.LOCK_UN, length, offset)
+
+    def __find_slot(self, first_slot: int, key_hash: int) -> int or None:
+        # Must be called while holding the slots' locks.
+        for slot in range(first_slot, first_slot + self.__probe_length):
+            if self.__slot_key_hash(slot) == key_hash:
+                return slot
+        return None
+
+    def __choose_free_slot(self, first_slot: int) -> int:
+        # Must be called while holding the slots' locks. Empty slots first, then the least recently used.
+        slots = range(first_slot, first_slot + self.__probe_length)
+        for slot in slots:
+            if self.__slot_key_hash(slot) == 0:
+                return slot
+        self.__evictions += 1
+        return min(slots, key=lambda slot: self.__read_slot(slot)[1])
+
+    def __get_offset(self, slot: int) -> int:
+        return self.__HEADER.size + slot * self.__slot.size
+
+    def __slot_key_hash(self, slot: int) -> int:
+        return struct.unpack_from('<Q', self.__map, self.__get_offset(slot))[0]
+
+    def __read_slot(self, slot: int) -> tuple:
+        return self.__slot.unpack_from(self.__map, self.__get_offset(slot))
+
+    def __write_slot(self, slot: int, key_hash: int, last_used: float, next_index: int, ring: list) -> None:
+        self.__slot.pack_into(self.__map, self.__get_offset(slot), key_hash, last_used, next_index, 0, *ring)
+
+    @staticmethod
+    def __hash_key(key: Any) -> int:
+        # Stable across processes, unlike hash(). 0 marks an empty slot, so it is never used as a key hash.
+        key_hash = int.from_bytes(hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).digest(), 'little')
+        return key_hash or 1
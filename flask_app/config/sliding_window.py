@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Iterable
+
+
+class SlidingWindowCounter:
+    """
+    Counts recent events per key in memory, e.g. failed logins per (client IP, log type).
+
+    A key is only counted once it has been seeded with its recent history (from the database, for example). Until
+    then count() returns None, and add() ignores it, so that a process that just started doesn't forget the events
+    that happened before it. Each key keeps at most max_count timestamps from the last max_age_sec, so checking a
+    limit never costs more than the limit itself. Least recently used keys are dropped beyond max_keys.
+    """
+
+    def __init__(self, max_age_sec: float, max_count: int = 100, max_keys: int = 100000):
+        assert max_age_sec > 0
+        assert max_count > 0
+        assert max_keys > 0
+        self.__max_age_sec = max_age_sec
+        self.__max_count = max_count
+        self.__max_keys = max_keys
+
+        self.__lock = threading.Lock()
+        self.__timestamps = OrderedDict()  # Key -> deque of times, oldest first. Most recently used keys are last.
+        self.__seeds = 0
+        self.__hits = 0
+        self.__evictions = 0
+
+    def is_seeded(self, key: Any) -> bool:
+        with self.__lock:
+            return key in self.__timestamps
+
+    def seed(self, key: Any, timestamps: Iterable[float]) -> None:
+        """
+        Start counting a key, replacing anything already counted for it.
+
+        :param timestamps: The times (from time.time()) of the key's recent events, in any order.
+        """
+        timestamps = deque(sorted(timestamps)[-self.__max_count:])
+        with self.__lock:
+            self.__timestamps[key] = timestamps
+            self.__timestamps.move_to_end(key)
+            self.__prune(timestamps, time.time())
+            self.__seeds += 1
+            while len(self.__timestamps) > self.__max_keys:
+                self.__timestamps.popitem(last=False)
+                self.__evictions += 1
+
+    def add(self, key: Any, timestamp: float = None) -> None:
+        with self.__lock:
+            timestamps = self.__timestamps.get(key)
+            if timestamps is None:
+                return
+            timestamps.append(time.time() if timestamp is None else timestamp)
+            if len(timestamps) > self.__max_count:
+                timestamps.popleft()
+
+    def count(self, key: Any, window_sec: float) -> int or None:
+        """
+        :return: The number of events in the last window_sec, up to max_count, or None if the key isn't seeded.
+        """
+        assert window_sec <= self.__max_age_sec
+        now = time.time()
+        with self.__lock:
+            timestamps = self.__timestamps.get(key)
+            if timestamps is None:
+                return None
+            self.__timestamps.move_to_end(key)
+            self.__hits += 1
+            self.__prune(timestamps, now)
+            # Timestamps are in order, so only the oldest few are ever outside the window.
+            num_outside = 0
+            for timestamp in timestamps:
+                if timestamp >= now - window_sec:
+                    break
+                num_outside += 1
+            return len(timestamps) - num_outside
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__timestamps.clear()
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            return {
+                'keys': len(self.__timestamps),
+                'seeds': self.__seeds,
+                'hits': self.__hits,
+                'evictions': self.__evictions,
+            }
+
+    def __prune(self, timestamps: deque, now: float) -> None:
+        # Must be called while holding self.__lock.
+        while len(timestamps) > 0 and timestamps[0] < now - self.__max_age_sec:
+            timestamps.popleft()
@@ -1,17 +1,87 @@
+import os
+import re
+import sys
 import threading
 import time
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List
 
 import pymysql
 
+from flask_app.config.circuit_breaker import CircuitBreaker
+from flask_app.config.connection_pool import ConnectionPool, PoolTimeoutError
+from flask_app.config.database_backends import DatabaseBackend, MySQLBackend
+from flask_app.config.database_session import DatabaseSession
+from flask_app.config.query_cache import QueryCache, get_insert_tag, get_row_tags
+from flask_app.config.query_stats import QueryStats, get_slow_query_logger, normalize_statement
+from flask_app.config.replica_router import ReplicaRouter
+from flask_app.config.retry_policy import RetryPolicy
+from flask_app.config.row_hydration import get_column_map
+
 
 class SQLDatabase:
-    # Use dictionaries to keep track of the connection information and waiting queues for each database file.
+    # Use dictionaries to keep track of the connection information and connection pools for each database.
     __db_connection_settings = dict()
-    __connections = dict()
-    __wait_queues = dict()
+    __db_pool_settings = dict()
+    __connection_pools = dict()
+    __connection_pools_lock = threading.Lock()
+    __db_instrumentation_settings = dict()
+    __query_stats = dict()
+    __db_replica_settings = dict()
+    __replica_routers = dict()
+    __db_retry_settings = dict()
+    __retry_policies = dict()
+    __circuit_breakers = dict()
+    __db_backends = dict()
+    __db_cache_settings = dict()
+    __query_caches = dict()
+    __thread_state = threading.local()  # Remembers when each thread last wrote, for reads outside of a session.
+
+    PRIMARY = 'primary'
+    # Plain SELECT statements can be sent to a replica. Locking reads must stay on the primary.
+    __READ_ONLY_REGEX = re.compile(
+        r"^\s*(?:/\*.*?\*/\s*)*SELECT\b(?!.*\bFOR\s+(?:UPDATE|SHARE)\b)(?!.*\bLOCK\s+IN\s+SHARE\s+MODE\b)",
+        re.IGNORECASE | re.DOTALL
+    )
+    __PARAMETER_REGEX = re.compile(r"%\((\w+)\)s")
+    __SELECT_KEYWORD_REGEX = re.compile(r"^(\s*(?:/\*.*?\*/\s*)*SELECT)\b", re.IGNORECASE | re.DOTALL)
+    # Errors that mean the server is down, overloaded, or too slow, as opposed to a problem with one statement.
+    __UNAVAILABLE_ERROR_CODES = (
+        1040,  # Too many connections.
+        2003,  # Can't connect to the server.
+        2006,  # Server has gone away.
+        2013,  # Lost connection during a query. Also raised when read_timeout runs out.
+        3024,  # Query exceeded MAX_EXECUTION_TIME.
+    )
+
+    # Frames from these modules are skipped when looking for the model method that ran a query.
+    __INTERNAL_MODULES = ('flask_app.config.', 'flask_app.utils.database')
 
-    def __init__(self, db_name: str, host: str = 'localhost', user: str = 'root', password: str = 'root'):
+    def __init__(
+            self, db_name: str, host: str = 'localhost', user: str = 'root', password: str = 'root',
+            pool_settings: dict = None, session: DatabaseSession = None, instrumentation_settings: dict = None,
+            replicas: List[dict] = None, retry_settings: dict = None, backend: DatabaseBackend = None,
+            cache_settings: dict = None
+    ):
+        """
+        :param pool_settings:
+            Connection pool limits and replica routing options. See get_db_pool_settings().
+        :param session:
+            If provided, every statement runs on the session's connection and inside its transaction, and nothing
+            is committed until the session is committed. Otherwise, each statement is committed on its own.
+        :param instrumentation_settings:
+            Controls the per-statement timing aggregate and the slow query log. See get_db_instrumentation_settings().
+        :param replicas:
+            Connection settings ('host', 'user', 'password') for read replicas of this database. SELECT statements
+            sent through execute_query() and iter_query() are spread across the healthy replicas.
+        :param retry_settings:
+            How often and how quickly statements that fail with a transient error are retried. See
+            get_db_retry_settings().
+        :param backend:
+            The database driver to use. Defaults to MySQL through pymysql. The same backend object should be passed
+            every time, since a backend may hold state (such as an in-memory database).
+        :param cache_settings:
+            Size and lifetime of the results kept by execute_cached_query(). See get_query_cache_settings().
+        """
         connection_settings = {
             'host': host,
             'user': user,
@@ -20,75 +90,354 @@ class SQLDatabase:
             'autocommit': False
         }
         self.__db_name = db_name
-        self.__set_connection_settings(db_name, connection_settings)
+        self.__session = session
+        self.__set_connection_settings(
+            db_name, connection_settings, pool_settings or dict(), instrumentation_settings or dict(), replicas or [],
+            retry_settings or dict(), backend or MySQLBackend(), cache_settings or dict()
+        )
 
     @classmethod
-    def __set_connection_settings(cls, db_name: str, connection_settings: dict):
+    def __set_connection_settings(
+            cls, db_name: str, connection_settings: dict, pool_settings: dict, instrumentation_settings: dict,
+            replicas: List[dict], retry_settings: dict, backend: DatabaseBackend, cache_settings: dict
+    ):
         cls.__db_connection_settings[db_name] = connection_settings
+        cls.__db_pool_settings[db_name] = pool_settings
+        cls.__db_instrumentation_settings[db_name] = instrumentation_settings
+        cls.__db_replica_settings[db_name] = replicas
+        cls.__db_retry_settings[db_name] = retry_settings
+        cls.__db_backends[db_name] = backend
+        cls.__db_cache_settings[db_name] = cache_settings
 
     @classmethod
-    def __get_connection(cls, db_name: str) -> pymysql.Connection:
-        assert isinstance(db_name, str)
-
-        # Get this database file's waiting queue.
-        if db_name not in cls.__wait_queues:
-            cls.__wait_queues[db_name] = list()
-        wait_queue = cls.__wait_queues[db_name]
-        assert isinstance(wait_queue, list)
-
-        # Add this thread's identifier to the queue and wait for it to be at position 0.
-        thread_identifier = threading.current_thread().ident
-        wait_queue.append(thread_identifier)
-        while wait_queue[0] != thread_identifier:
-            time.sleep(0.0001)
-
-        # Wait for the currently-open connection to close.
-        while db_name in cls.__connections:
-            time.sleep(0.0001)
-
-        # Create the new connection, then remove the thread's identifier from the waiting queue
-        # so that the next thread in that queue can move to the second while loop above.
-        if db_name not in cls.__db_connection_settings:
-            raise Exception(
-                "There was an error during class initialization. "
-                "Database settings for '{}' were not set.".format(db_name)
-            )
+    def __get_endpoint_settings(cls, db_name: str, endpoint: str) -> dict:
         connection_settings = cls.__db_connection_settings[db_name]
-        cls.__connections[db_name] = pymysql.connect(
-            db=db_name,
-
-            host=connection_settings['host'],
-            user=connection_settings['user'],
-            password=connection_settings['password'],
-            charset=connection_settings['charset'],
-            cursorclass=pymysql.cursors.DictCursor,
-            autocommit=connection_settings['autocommit']
-        )
-        assert wait_queue.pop(0) == thread_identifier
-        return cls.__connections[db_name]
+        if endpoint == cls.PRIMARY:
+            return connection_settings
+
+        # Replicas are only read from, so they use autocommit and skip the commit round trip after each SELECT.
+        replica_settings = dict(connection_settings)
+        replica_settings.update(cls.__db_replica_settings[db_name][int(endpoint.split('_')[-1])])
+        replica_settings['autocommit'] = True
+        return replica_settings
 
     @classmethod
-    def __close_connection(cls, db_name: str) -> None:
+    def __get_connection_pool(cls, db_name: str, endpoint: str = PRIMARY) -> ConnectionPool:
         assert isinstance(db_name, str)
 
-        # If the connection exists, close it and allow for a new one to be opened.
-        if db_name in cls.__connections:
-            connection = cls.__connections[db_name]
-            connection.close()
-            del cls.__connections[db_name]
+        # Pools are created lazily and per process, since Gunicorn workers must not share sockets after forking.
+        pool_key = (db_name, endpoint, os.getpid())
+        if pool_key in cls.__connection_pools:
+            return cls.__connection_pools[pool_key]
+
+        with cls.__connection_pools_lock:
+            if pool_key not in cls.__connection_pools:
+                if db_name not in cls.__db_connection_settings:
+                    raise Exception(
+                        "There was an error during class initialization. "
+                        "Database settings for '{}' were not set.".format(db_name)
+                    )
+                connection_settings = cls.__get_endpoint_settings(db_name, endpoint)
+                pool_settings = cls.__db_pool_settings[db_name]
+
+                backend = cls.__db_backends[db_name]
+
+                def connect() -> Any:
+                    return backend.connect(db_name, connection_settings, pool_settings)
+
+                cls.__connection_pools[pool_key] = ConnectionPool(
+                    connect=connect,
+                    min_size=pool_settings.get('min_size', 1),
+                    max_size=pool_settings.get('max_size', 10),
+                    checkout_timeout_sec=pool_settings.get('checkout_timeout_sec', 10.0),
+                    max_idle_sec=pool_settings.get('max_idle_sec', 300.0),
+                    ping_after_idle_sec=pool_settings.get('ping_after_idle_sec', 30.0),
+                    is_alive=backend.is_alive,
+                )
+            return cls.__connection_pools[pool_key]
 
     @staticmethod
-    def __get_cursor(connection: pymysql.Connection) -> pymysql.cursors.Cursor:
-        cursor = connection.cursor()
-        return cursor
+    def __connection_is_broken(ex: Exception) -> bool:
+        # Connections that raised these errors may be half-closed or out of sync, so they shouldn't be reused.
+        return isinstance(ex, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+
+    @classmethod
+    def get_pool_stats(cls) -> dict:
+        return {
+            "{}/{}".format(db_name, endpoint): pool.get_stats()
+            for (db_name, endpoint, pid), pool in list(cls.__connection_pools.items())
+            if pid == os.getpid()
+        }
+
+    @classmethod
+    def get_replica_stats(cls) -> dict:
+        return {db_name: router.get_stats() for db_name, router in list(cls.__replica_routers.items())}
+
+    @classmethod
+    def __get_replica_router(cls, db_name: str) -> ReplicaRouter:
+        if db_name not in cls.__replica_routers:
+            with cls.__connection_pools_lock:
+                if db_name not in cls.__replica_routers:
+                    replica_names = [
+                        "replica_{}".format(index) for index in range(len(cls.__db_replica_settings[db_name]))
+                    ]
+                    cooldown_sec = cls.__db_pool_settings[db_name].get('replica_cooldown_sec', 30.0)
+
+                    def is_healthy(replica: str) -> bool:
+                        return cls.__replica_is_alive(db_name, replica)
+
+                    cls.__replica_routers[db_name] = ReplicaRouter(replica_names, cooldown_sec, is_healthy)
+        return cls.__replica_routers[db_name]
+
+    @classmethod
+    def __replica_is_alive(cls, db_name: str, replica: str) -> bool:
+        # Used by the replica router before a replica that failed is read from again, so that a user's request
+        # isn't the first thing to find out it is still down.
+        pool = cls.__get_connection_pool(db_name, replica)
+        try:
+            connection = pool.get_connection()
+        except Exception:
+            return False
+        alive = cls.__db_backends[db_name].is_alive(connection)
+        pool.release_connection(connection, discard=not alive)
+        return alive
+
+    @classmethod
+    def __get_retry_policy(cls, db_name: str) -> RetryPolicy:
+        if db_name not in cls.__retry_policies:
+            with cls.__connection_pools_lock:
+                if db_name not in cls.__retry_policies:
+                    retry_settings = cls.__db_retry_settings.get(db_name, dict())
+                    cls.__retry_policies[db_name] = RetryPolicy(
+                        max_attempts=retry_settings.get('max_attempts', 3),
+                        base_delay_sec=retry_settings.get('base_delay_sec', 0.05),
+                        max_delay_sec=retry_settings.get('max_delay_sec', 1.0),
+                    )
+        return cls.__retry_policies[db_name]
+
+    @classmethod
+    def __get_circuit_breaker(cls, db_name: str) -> CircuitBreaker:
+        if db_name not in cls.__circuit_breakers:
+            with cls.__connection_pools_lock:
+                if db_name not in cls.__circuit_breakers:
+                    pool_settings = cls.__db_pool_settings.get(db_name, dict())
+                    cls.__circuit_breakers[db_name] = CircuitBreaker(
+                        name=db_name,
+                        failure_threshold=pool_settings.get('breaker_failure_threshold', 5),
+                        window_sec=pool_settings.get('breaker_window_sec', 10.0),
+                        cooldown_sec=pool_settings.get('breaker_cooldown_sec', 15.0),
+                    )
+        return cls.__circuit_breakers[db_name]
+
+    @classmethod
+    def get_circuit_breaker_stats(cls) -> dict:
+        return {db_name: breaker.get_stats() for db_name, breaker in list(cls.__circuit_breakers.items())}
+
+    @classmethod
+    def __is_unavailable_error(cls, ex: Exception) -> bool:
+        if isinstance(ex, (PoolTimeoutError, pymysql.err.InterfaceError)):
+            return True
+        return (
+            isinstance(ex, pymysql.err.MySQLError) and len(ex.args) > 0 and ex.args[0] in cls.__UNAVAILABLE_ERROR_CODES
+        )
+
+    def __call_through_breaker(self, call: Callable[[], Any]) -> Any:
+        breaker = self.__get_circuit_breaker(self.__db_name)
+        breaker.before_call()
+        try:
+            result = call()
+        except Exception as ex:
+            if self.__is_unavailable_error(ex):
+                breaker.record_failure()
+            else:
+                breaker.record_ignored()
+            raise ex
+        breaker.record_success()
+        return result
+
+    def __apply_statement_timeout(self, query: str, timeout_ms: int or None) -> str:
+        """
+        :return: The query with a MAX_EXECUTION_TIME hint, if it is a read-only SELECT and a timeout applies.
+        """
+        if timeout_ms is None:
+            timeout_ms = self.__db_pool_settings[self.__db_name].get('statement_timeout_ms', 0)
+        if not timeout_ms or not self.is_read_only_statement(query):
+            return query
+        if not self.__db_backends[self.__db_name].supports_statement_timeout:
+            return query
+        return self.__SELECT_KEYWORD_REGEX.sub(
+            r"\1 /*+ MAX_EXECUTION_TIME({}) */".format(int(timeout_ms)), query, count=1
+        )
+
+    @classmethod
+    def __get_query_cache(cls, db_name: str) -> QueryCache or None:
+        if db_name not in cls.__query_caches:
+            with cls.__connection_pools_lock:
+                if db_name not in cls.__query_caches:
+                    cache_settings = cls.__db_cache_settings.get(db_name, dict())
+                    cls.__query_caches[db_name] = QueryCache(
+                        max_entries=cache_settings.get('max_entries', 10000),
+                        ttl_sec=cache_settings.get('ttl_sec', 30.0),
+                    ) if cache_settings.get('enabled', True) else None
+        return cls.__query_caches[db_name]
+
+    @classmethod
+    def get_cache_stats(cls) -> dict:
+        return {db_name: cache.get_stats() for db_name, cache in list(cls.__query_caches.items()) if cache is not None}
+
+    @classmethod
+    def clear_query_cache(cls) -> None:
+        for cache in list(cls.__query_caches.values()):
+            if cache is not None:
+                cache.clear()
+
+    @classmethod
+    def get_retry_stats(cls) -> dict:
+        return {db_name: policy.get_stats() for db_name, policy in list(cls.__retry_policies.items())}
+
+    @classmethod
+    def is_read_only_statement(cls, query: str) -> bool:
+        return cls.__READ_ONLY_REGEX.match(query) is not None
+
+    def __choose_replica(self, query: str, use_primary: bool) -> str or None:
+        """
+        :return: The replica that should run this statement, or None if it must run on the primary.
+        """
+        if use_primary or len(self.__db_replica_settings.get(self.__db_name, [])) == 0:
+            return None
+        if not self.is_read_only_statement(query):
+            return None
+
+        if self.__must_read_own_writes():
+            return None
+        return self.__get_replica_router(self.__db_name).choose()
+
+    def __must_read_own_writes(self) -> bool:
+        """
+        Read-after-write: once something has been written, keep reading from the primary so that the new data is
+        visible even if the replicas are lagging behind.
+        """
+        if self.__session is not None:
+            return self.__session.has_written() or self.__session.reads_from_primary()
+        last_write_at = getattr(self.__thread_state, 'last_write_at', None)
+        read_after_write_sec = self.__db_pool_settings[self.__db_name].get('read_after_write_sec', 5.0)
+        return last_write_at is not None and time.monotonic() - last_write_at < read_after_write_sec
+
+    def __mark_written(self) -> None:
+        if self.__session is not None:
+            self.__session.mark_written()
+        else:
+            self.__thread_state.last_write_at = time.monotonic()
+
+    @classmethod
+    def __get_query_stats(cls, db_name: str) -> QueryStats:
+        if db_name not in cls.__query_stats:
+            with cls.__connection_pools_lock:
+                if db_name not in cls.__query_stats:
+                    settings = cls.__db_instrumentation_settings.get(db_name, dict())
+                    cls.__query_stats[db_name] = QueryStats(
+                        max_samples_per_statement=settings.get('samples_per_statement', 1000),
+                        max_statements=settings.get('max_statements', 1000)
+                    )
+        return cls.__query_stats[db_name]
+
+    @classmethod
+    def get_query_stats(cls) -> dict:
+        """
+        :return: For each database, a list of per-statement timings (count, p50/p95/p99, etc.) for this process.
+        """
+        return {db_name: stats.get_summary() for db_name, stats in list(cls.__query_stats.items())}
+
+    @classmethod
+    def format_query_stats(cls) -> str:
+        sections = []
+        for db_name, stats in list(cls.__query_stats.items()):
+            sections.append("Database '{}' (pid {}):\n{}".format(db_name, os.getpid(), stats.format_summary()))
+        return "\n\n".join(sections)
+
+    @classmethod
+    def reset_query_stats(cls) -> None:
+        for stats in list(cls.__query_stats.values()):
+            stats.reset()
+
+    @classmethod
+    def __get_caller_name(cls) -> str:
+        # Walk up the stack until reaching the first frame outside of the database layer (usually a model method).
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_globals.get('__name__', '').startswith(cls.__INTERNAL_MODULES):
+            frame = frame.f_back
+        if frame is None:
+            return "unknown"
+
+        function_name = frame.f_code.co_name
+        if 'cls' in frame.f_locals and isinstance(frame.f_locals['cls'], type):
+            function_name = "{}.{}".format(frame.f_locals['cls'].__name__, function_name)
+        elif 'self' in frame.f_locals:
+            function_name = "{}.{}".format(type(frame.f_locals['self']).__name__, function_name)
+        return "{}.{}".format(frame.f_globals.get('__name__', '?'), function_name)
+
+    def __record_query(self, query: str, checkout_started_at: float, execute_started_at: float, rows: int):
+        finished_at = time.perf_counter()
+        wait_ms = (execute_started_at - checkout_started_at) * 1000
+        execute_ms = (finished_at - execute_started_at) * 1000
+        caller = self.__get_caller_name()
+
+        self.__get_query_stats(self.__db_name).record(query, caller, wait_ms, execute_ms, rows)
+        if self.__session is not None:
+            self.__session.record_query(wait_ms, execute_ms)
+
+        settings = self.__db_instrumentation_settings.get(self.__db_name, dict())
+        threshold_ms = settings.get('slow_query_threshold_ms')
+        if threshold_ms is not None and wait_ms + execute_ms >= threshold_ms:
+            logger = get_slow_query_logger(
+                settings.get('slow_query_log_path', 'logs/slow_queries.log'),
+                settings.get('slow_query_log_max_bytes', 5 * 1024 * 1024),
+                settings.get('slow_query_log_backup_count', 5),
+            )
+            logger.info(
+                "execute_ms=%.1f wait_ms=%.1f rows=%d caller=%s statement=%s",
+                execute_ms, wait_ms, rows, caller, normalize_statement(query)
+            )
+
+    def open_session(self) -> DatabaseSession:
+        return DatabaseSession(lambda: self.__get_connection_pool(self.__db_name))
+
+    def __get_cursor(self, connection: Any, cursor_class: type = None) -> pymysql.cursors.Cursor:
+        return self.__db_backends[self.__db_name].get_cursor(connection, cursor_class)
+
+    @classmethod
+    def __rollback_after_error(cls, connection: pymysql.Connection, ex: Exception) -> bool:
+        """
+        :return: True if the connection should be discarded instead of being returned to its pool.
+        """
+        if cls.__connection_is_broken(ex):
+            return True
+        try:
+            connection.rollback()
+            return False
+        except Exception:
+            return True
 
-    def execute_query(self, query: str, query_args: dict = {}) -> List[dict]:
+    def execute_query(
+            self, query: str, query_args: dict = {}, use_primary: bool = False, idempotent: bool = None,
+            timeout_ms: int = None
+    ) -> List[dict]:
         """
         :param query:
             The query string to execute. Any arguments that must be added to the string should be written
             as question marks.
         :param query_args:
             A list or tuple containing all arguments to be used within the query.
+        :param use_primary:
+            Always run this statement on the primary, even if it is a SELECT that could go to a replica.
+        :param idempotent:
+            Whether running the statement twice has the same effect as running it once (e.g. an UPDATE that sets
+            fixed values). Idempotent statements are retried if the connection is lost while they run. Defaults to
+            True for SELECT statements and False for everything else.
+        :param timeout_ms:
+            The longest a read-only SELECT may run on the server before it is stopped with an error. Defaults to the
+            statement_timeout_ms pool setting, and 0 turns it off. Other statements are only limited by the
+            connection's read timeout.
         :return:
             If this is a select statement, return a list of dictionaries (one for each record found) with
             keys matching the fields specified in the query. For any other statement, return an empty list.
@@ -110,20 +459,124 @@ class SQLDatabase:
         assert isinstance(query, str)
         assert isinstance(query_args, dict)
 
-        connection = None
-        try:
-            connection = self.__get_connection(self.__db_name)
-            cursor = self.__get_cursor(connection)
-            cursor.execute(query, query_args)
-            result = list(cursor.fetchall())
-            connection.commit()
-            return result
-        except Exception as ex:
-            if hasattr(connection, "rollback"):
-                connection.rollback()
-            raise ex
-        finally:
-            self.__close_connection(self.__db_name)
+        statement = self.__apply_statement_timeout(query, timeout_ms)
+
+        def run(cursor: pymysql.cursors.Cursor) -> (List[dict], int):
+            cursor.execute(statement, query_args)
+            rows = list(cursor.fetchall())
+            return rows, len(rows)
+
+        replica = self.__choose_replica(query, use_primary)
+        if replica is not None:
+            return self.__execute_on_replica(query, run, replica)
+        return self.__execute(query, run, is_write=not self.is_read_only_statement(query), idempotent=idempotent)
+
+    def execute_cached_query(
+            self, query: str, query_args: dict = {}, table: str = None, id_column: str = 'id'
+    ) -> List[dict]:
+        """
+        Same as execute_query() for a SELECT, but the result is kept in memory and reused until it expires or
+        invalidate_cache() is called for its table or one of its rows. Use this for lookups that run on most page
+        views but whose rows rarely change.
+
+        :param table:
+            The table the rows come from. Writes to this table must call invalidate_cache().
+        :param id_column:
+            The column of each row that invalidate_cache(ids=...) refers to.
+
+        Each Gunicorn worker has its own cache, so a write in one worker only reaches the others once their copy
+        expires (after ttl_sec). A session that has written something, or that must read its client's recent writes,
+        skips the cache and reads from the primary, so it never gets a row from before the write. Results are
+        always loaded from the primary, so a lagging replica's rows are never cached either.
+        """
+        assert isinstance(table, str)
+        cache = self.__get_query_cache(self.__db_name)
+        if cache is None:
+            return self.execute_query(query, query_args)
+        # What this session reads may never be committed, so it must not be shared. It may also be newer than the
+        # cached rows. Without a session, each write invalidates this worker's cache itself.
+        if self.__session is not None and self.__must_read_own_writes():
+            return self.execute_query(query, query_args, use_primary=True)
+
+        cache_key = (query, tuple(sorted(query_args.items())))
+        found, rows = cache.get(cache_key)
+        if found:
+            return [dict(row) for row in rows]
+
+        generation = cache.get_generation()
+        rows = self.execute_query(query, query_args, use_primary=True)
+        if len(rows) == 0:
+            tags = {table, get_insert_tag(table)}
+        else:
+            tags = {table} | get_row_tags(table, [row[id_column] for row in rows])
+        cache.set(cache_key, [dict(row) for row in rows], tags, generation)
+        return rows
+
+    def invalidate_cache(self, table: str, ids: List[Any] = None, inserted: bool = False) -> None:
+        """
+        Remove cached results that may have been changed by a write.
+
+        :param table:
+            The table that was written to.
+        :param ids:
+            The rows that were updated or deleted.
+        :param inserted:
+            Whether rows were added. This removes cached lookups that found nothing.
+
+        If neither ids nor inserted is given, every cached result from the table is removed. Inside a session, the
+        results are removed again once the session commits, so that nothing read before the commit is kept. The
+        session's identity map is cleared of the same rows.
+        """
+        if self.__session is not None:
+            self.__session.get_identity_map().discard(table, ids, inserted)
+
+        cache = self.__get_query_cache(self.__db_name)
+        if cache is None:
+            return
+
+        tags = set()
+        if ids is not None:
+            tags |= get_row_tags(table, ids)
+        if inserted:
+            tags.add(get_insert_tag(table))
+        if ids is None and not inserted:
+            tags.add(table)
+
+        cache.invalidate(tags)
+        if self.__session is not None:
+            self.__session.call_after_commit(lambda: cache.invalidate(tags))
+
+    def execute_query_tuples(
+            self, query: str, query_args: dict = {}, use_primary: bool = False, idempotent: bool = None,
+            timeout_ms: int = None
+    ) -> (Dict[str, int], List[tuple]):
+        """
+        Same as execute_query(), but the rows are returned as plain tuples instead of one dictionary per row.
+        Use this (with hydrate_rows()) for queries that may return many records.
+
+        :return:
+            A (column name -> position, list of row tuples) tuple. The column map is shared between every result
+            with the same columns, so it must not be modified.
+        """
+        assert isinstance(query, str)
+        assert isinstance(query_args, dict)
+
+        statement = self.__apply_statement_timeout(query, timeout_ms)
+
+        def run(cursor: pymysql.cursors.Cursor) -> ((Dict[str, int], List[tuple]), int):
+            cursor.execute(statement, query_args)
+            if cursor.description is None:
+                return (dict(), []), 0
+            rows = cursor.fetchall()
+            return (get_column_map(cursor.description), list(rows)), len(rows)
+
+        replica = self.__choose_replica(query, use_primary)
+        if replica is not None:
+            return self.__execute_on_replica(query, run, replica, pymysql.cursors.Cursor)
+        return self.__execute(
+            query, run, is_write=not self.is_read_only_statement(query), cursor_class=pymysql.cursors.Cursor,
+            idempotent=idempotent
+        )
 
     def execute_insert(self, query: str, query_args: dict = {}) -> int:
         """
@@ -145,20 +598,245 @@ class SQLDatabase:
         assert isinstance(query, str)
         assert isinstance(query_args, dict)
 
+        def run(cursor: pymysql.cursors.Cursor) -> (int, int):
+            cursor.execute(query, query_args)
+            return int(cursor.lastrowid), cursor.rowcount
+
+        return self.__execute(query, run, is_write=True)
+
+    def execute_many(self, query: str, query_args_list: List[dict]) -> int:
+        """
+        :param query:
+            The statement to run once for each dictionary in query_args_list. INSERT statements are sent as
+            multi-row inserts, so thousands of rows only take a few round trips.
+        :param query_args_list:
+            A list of dictionaries containing the arguments for each row.
+        :return:
+            The total number of affected rows.
+        """
+        assert isinstance(query, str)
+        assert isinstance(query_args_list, list)
+        if len(query_args_list) == 0:
+            return 0
+
+        def run(cursor: pymysql.cursors.Cursor) -> (int, int):
+            affected_rows = cursor.executemany(query, query_args_list)
+            return int(affected_rows or 0), int(affected_rows or 0)
+
+        return self.__execute(query, run, is_write=True)
+
+    def bulk_insert(self, query: str, query_args_list: List[dict], batch_size: int = 500) -> List[int]:
+        """
+        :param query:
+            A single-row INSERT statement written the same way as for execute_insert().
+        :param query_args_list:
+            A list of dictionaries containing the arguments for each new record.
+        :param batch_size:
+            The maximum number of rows sent in each multi-row INSERT statement.
+        :return:
+            The ID numbers of the new records, in the same order as query_args_list.
+
+        InnoDB hands out consecutive auto-increment values to every row of a multi-row INSERT whose row count is
+        known in advance, so the IDs are worked out from the first ID of each batch. This assumes the server's
+        auto_increment_increment is 1 (the default). SQLite also numbers the rows of one statement consecutively.
+
+        Example:
+            query:              "insert into security_logs (client_ip_address_id, log_type)
+                                 values (%(client_ip_address_id)s, %(log_type)s);"
+            query_args_list:    [{'client_ip_address_id': 4, 'log_type': 'A'}, {'client_ip_address_id': 9, ...}]
+            result:             [311, 312]
+        """
+        assert isinstance(query, str)
+        assert isinstance(query_args_list, list)
+        assert batch_size > 0
+        if len(query_args_list) == 0:
+            return []
+
+        match = pymysql.cursors.RE_INSERT_VALUES.match(query)
+        if match is None:
+            raise Exception("bulk_insert() only supports 'INSERT ... VALUES (...)' statements: {}".format(query))
+        query_prefix = match.group(1)
+        query_values = match.group(2).rstrip()
+        query_postfix = match.group(3) or ''
+        backend = self.__db_backends[self.__db_name]
+
+        def run(cursor: pymysql.cursors.Cursor) -> (List[int], int):
+            new_ids = []
+            for start in range(0, len(query_args_list), batch_size):
+                batch = query_args_list[start:start + batch_size]
+                # Give every row its own copy of the parameters: %(name)s becomes %(name__0)s, %(name__1)s, ...
+                values = []
+                batch_args = dict()
+                for row_num, query_args in enumerate(batch):
+                    values.append(self.__PARAMETER_REGEX.sub(r"%(\1__{})s".format(row_num), query_values))
+                    for key, value in query_args.items():
+                        batch_args["{}__{}".format(key, row_num)] = value
+                cursor.execute(query_prefix + ",".join(values) + query_postfix, batch_args)
+                first_id = backend.get_first_insert_id(cursor, len(batch))
+                new_ids.extend(range(first_id, first_id + len(batch)))
+            return new_ids, len(new_ids)
+
+        return self.__execute(query, run, is_write=True)
+
+    def iter_query(
+            self, query: str, query_args: dict = {}, chunk_size: int = 1000, use_primary: bool = False,
+            timeout_ms: int = None
+    ) -> Iterator[dict]:
+        """
+        :param query:
+            A SELECT statement, written the same way as for execute_query().
+        :param query_args:
+            A dictionary containing all arguments to be used within the query.
+        :param chunk_size:
+            How many rows are read from the server at a time.
+        :param use_primary:
+            Always read from the primary, even if replicas are configured.
+        :param timeout_ms:
+            Same as for execute_query(). The time spent reading rows counts toward the limit.
+        :return:
+            A generator that yields one dictionary per record. Rows are streamed from the server with an unbuffered
+            cursor, so memory use stays the same no matter how many rows the query returns.
+
+        The rows are read on a dedicated connection rather than the request session's connection, because an
+        unbuffered cursor blocks its connection until every row has been read. That also means uncommitted writes
+        from the current request are not visible. If the generator is abandoned before the end, the connection is
+        closed instead of reading (and throwing away) the remaining rows.
+        """
+        assert isinstance(query, str)
+        assert isinstance(query_args, dict)
+        assert chunk_size > 0
+
+        checkout_started_at = time.perf_counter()
+        pool = None
         connection = None
+        replica = self.__choose_replica(query, use_primary)
+        if replica is not None:
+            try:
+                pool = self.__get_connection_pool(self.__db_name, replica)
+                connection = pool.get_connection()
+            except Exception as ex:
+                if not self.__connection_is_broken(ex) and not isinstance(ex, PoolTimeoutError):
+                    raise ex
+                self.__get_replica_router(self.__db_name).mark_failed(replica)
+        if connection is None:
+            pool = self.__get_connection_pool(self.__db_name)
+            connection = self.__call_through_breaker(pool.get_connection)
+        execute_started_at = time.perf_counter()
+        num_rows = 0
+        finished = False
         try:
-            connection = self.__get_connection(self.__db_name)
-            cursor = self.__get_cursor(connection)
-            cursor.execute(query, query_args)
+            cursor = self.__get_cursor(connection, pymysql.cursors.SSDictCursor)
+            cursor.execute(self.__apply_statement_timeout(query, timeout_ms), query_args)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if len(rows) == 0:
+                    break
+                num_rows += len(rows)
+                for row in rows:
+                    yield row
+            cursor.close()
+            connection.rollback()  # Nothing was written; this just ends the read snapshot.
+            finished = True
+        finally:
+            pool.release_connection(connection, discard=not finished)
+        self.__record_query(query, checkout_started_at, execute_started_at, num_rows)
+
+    def __execute(
+            self, query: str, run: Callable[[pymysql.cursors.Cursor], tuple], is_write: bool, cursor_class: type = None,
+            idempotent: bool = None
+    ) -> Any:
+        """
+        :param query:
+            The statement being run, used for instrumentation.
+        :param run:
+            Executes the statement(s) on the given cursor and returns a (result, number of rows) tuple.
+        :param is_write:
+            Whether the statement changes data. Reads that follow a write are kept on the primary.
+        :param cursor_class:
+            The type of cursor passed to run(). Defaults to the connection's DictCursor.
+        :param idempotent:
+            Whether run() can safely be repeated after a lost connection. Defaults to the opposite of is_write.
+        """
+        if idempotent is None:
+            idempotent = not is_write
+        in_transaction = self.__session is not None and self.__session.has_written()
+        if is_write:
+            self.__mark_written()
+
+        retry_policy = self.__get_retry_policy(self.__db_name)
+        attempt = 1
+        while True:
+            try:
+                if self.__session is not None:
+                    result = self.__call_through_breaker(lambda: self.__execute_in_session(query, run, cursor_class))
+                else:
+                    result = self.__call_through_breaker(
+                        lambda: self.__execute_on_pool(query, run, self.PRIMARY, cursor_class)
+                    )
+            except Exception as ex:
+                if not retry_policy.should_retry(ex, attempt, idempotent, in_transaction):
+                    raise ex
+                if self.__session is not None:
+                    # The failed statement was the session's first write (if any), so nothing is lost by starting
+                    # its transaction over. This also replaces a connection that was lost.
+                    self.__session.rollback()
+                    if is_write:
+                        self.__mark_written()  # The rollback forgot the write that is about to be retried.
+                retry_policy.wait_before_retry(ex, attempt)
+                attempt += 1
+                continue
 
+            if attempt > 1:
+                retry_policy.record_recovered()
+            return result
+
+    def __execute_in_session(
+            self, query: str, run: Callable[[pymysql.cursors.Cursor], tuple], cursor_class: type = None
+    ) -> Any:
+        checkout_started_at = time.perf_counter()
+        connection = self.__session.get_connection()
+        execute_started_at = time.perf_counter()
+        try:
+            result, rows = run(self.__get_cursor(connection, cursor_class))
+        except Exception as ex:
+            if self.__connection_is_broken(ex):
+                self.__session.discard_connection()
+            raise ex
+        self.__record_query(query, checkout_started_at, execute_started_at, rows)
+        return result
+
+    def __execute_on_replica(
+            self, query: str, run: Callable[[pymysql.cursors.Cursor], tuple], replica: str, cursor_class: type = None
+    ) -> Any:
+        try:
+            return self.__execute_on_pool(query, run, replica, cursor_class)
+        except Exception as ex:
+            if not self.__connection_is_broken(ex) and not isinstance(ex, PoolTimeoutError):
+                raise ex
+
+        # The replica is down or unreachable. Skip it for a while and read from the primary instead.
+        self.__get_replica_router(self.__db_name).mark_failed(replica)
+        return self.__execute(query, run, is_write=False, cursor_class=cursor_class)
+
+    def __execute_on_pool(
+            self, query: str, run: Callable[[pymysql.cursors.Cursor], tuple], endpoint: str, cursor_class: type = None
+    ) -> Any:
+        # Runs the statement on its own pooled connection and commits it right away.
+        checkout_started_at = time.perf_counter()
+        pool = self.__get_connection_pool(self.__db_name, endpoint)
+        connection = pool.get_connection()
+        execute_started_at = time.perf_counter()
+        discard_connection = False
+        try:
+            result, rows = run(self.__get_cursor(connection, cursor_class))
             connection.commit()
-            return int(cursor.lastrowid)
         except Exception as ex:
-            if hasattr(connection, "rollback"):
-                connection.rollback()
+            discard_connection = self.__rollback_after_error(connection, ex)
             raise ex
         finally:
-            self.__close_connection(self.__db_name)
+            pool.release_connection(connection, discard=discard_connection)
+        self.__record_query(query, checkout_started_at, execute_started_at, rows)
+        return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+-- SQLite version of shareable_events_schema.mwb, used by SQLiteBackend for tests and benchmarks.
+-- VARCHAR columns use NOCASE to match MySQL's case-insensitive default collation, and a trigger on each table
+-- stands in for MySQL's ON UPDATE CURRENT_TIMESTAMP.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    first_name VARCHAR(255) NOT NULL COLLATE NOCASE,
+    last_name VARCHAR(255) NOT NULL COLLATE NOCASE,
+    email VARCHAR(255) NOT NULL COLLATE NOCASE,
+    password VARCHAR(255) NOT NULL COLLATE NOCASE
+);
+CREATE TRIGGER IF NOT EXISTS users_updated_at AFTER UPDATE ON users FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    name VARCHAR(100) NOT NULL COLLATE NOCASE,
+    share_key VARCHAR(255) NOT NULL COLLATE NOCASE,
+    start_time DATETIME NOT NULL,
+    end_time DATETIME NOT NULL,
+    description VARCHAR(1000) NOT NULL COLLATE NOCASE,
+    canceled TINYINT NOT NULL DEFAULT 0,
+    UNIQUE (share_key)
+);
+CREATE INDEX IF NOT EXISTS events_start_time_idx ON events (start_time, id);
+CREATE TRIGGER IF NOT EXISTS events_updated_at AFTER UPDATE ON events FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE events SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS event_locations (
+    event_id INTEGER NOT NULL PRIMARY KEY,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    street VARCHAR(255) NOT NULL COLLATE NOCASE,
+    city VARCHAR(255) NOT NULL COLLATE NOCASE,
+    state VARCHAR(255) NOT NULL COLLATE NOCASE,
+    country VARCHAR(255) NOT NULL COLLATE NOCASE,
+    postal_code VARCHAR(255) NOT NULL COLLATE NOCASE,
+    notes VARCHAR(1000) NOT NULL COLLATE NOCASE,
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS event_locations_event_id_idx ON event_locations (event_id);
+CREATE TRIGGER IF NOT EXISTS event_locations_updated_at AFTER UPDATE ON event_locations FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE event_locations SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS private_events (
+    event_id INTEGER NOT NULL PRIMARY KEY,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    secret_key VARCHAR(255) NOT NULL COLLATE NOCASE,
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS private_events_event_id_idx ON private_events (event_id);
+CREATE TRIGGER IF NOT EXISTS private_events_updated_at AFTER UPDATE ON private_events FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE private_events SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS attendees (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    event_id INTEGER NOT NULL,
+    first_name VARCHAR(255) NOT NULL COLLATE NOCASE,
+    last_name VARCHAR(255) NOT NULL COLLATE NOCASE,
+    password VARCHAR(255) NOT NULL COLLATE NOCASE,
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS attendees_event_id_idx ON attendees (event_id);
+CREATE INDEX IF NOT EXISTS attendees_event_name_idx ON attendees (event_id, first_name, last_name);
+CREATE TRIGGER IF NOT EXISTS attendees_updated_at AFTER UPDATE ON attendees FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE attendees SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS user_is_attendee (
+    user_id INTEGER NOT NULL,
+    attendee_id INTEGER NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, attendee_id),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (attendee_id) REFERENCES attendees (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS user_is_attendee_user_id_idx ON user_is_attendee (user_id);
+CREATE INDEX IF NOT EXISTS user_is_attendee_attendee_id_idx ON user_is_attendee (attendee_id);
+CREATE TRIGGER IF NOT EXISTS user_is_attendee_updated_at AFTER UPDATE ON user_is_attendee FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE user_is_attendee SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS client_ip_addresses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ip_hash VARCHAR(255) NOT NULL COLLATE NOCASE,
+    UNIQUE (ip_hash)
+);
+CREATE TRIGGER IF NOT EXISTS client_ip_addresses_updated_at AFTER UPDATE ON client_ip_addresses FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE client_ip_addresses SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS user_creates_event (
+    user_id INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, event_id),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS user_creates_event_user_id_idx ON user_creates_event (user_id);
+CREATE INDEX IF NOT EXISTS user_creates_event_event_id_idx ON user_creates_event (event_id);
+CREATE TRIGGER IF NOT EXISTS user_creates_event_updated_at AFTER UPDATE ON user_creates_event FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE user_creates_event SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS exceptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    type VARCHAR(255) NOT NULL COLLATE NOCASE,
+    message VARCHAR(2000) NOT NULL COLLATE NOCASE,
+    fingerprint VARCHAR(64) NULL,
+    occurrences INT NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS exceptions_fingerprint_UNIQUE ON exceptions (fingerprint);
+CREATE TRIGGER IF NOT EXISTS exceptions_updated_at AFTER UPDATE ON exceptions FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE exceptions SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS event_comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    comment VARCHAR(500) NOT NULL COLLATE NOCASE,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS event_comments_user_id_idx ON event_comments (user_id);
+CREATE INDEX IF NOT EXISTS event_comments_event_id_idx ON event_comments (event_id);
+CREATE TRIGGER IF NOT EXISTS event_comments_updated_at AFTER UPDATE ON event_comments FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE event_comments SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS verified_emails (
+    user_id INTEGER NOT NULL PRIMARY KEY,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    new_email VARCHAR(255) NOT NULL COLLATE NOCASE,
+    email_sent TINYINT NOT NULL DEFAULT 0,
+    verified TINYINT NOT NULL DEFAULT 0,
+    verification_code VARCHAR(255) NOT NULL COLLATE NOCASE,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS verified_emails_user_id_idx ON verified_emails (user_id);
+CREATE TRIGGER IF NOT EXISTS verified_emails_updated_at AFTER UPDATE ON verified_emails FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE verified_emails SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS security_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    client_ip_address_id INTEGER NOT NULL,
+    log_type VARCHAR(255) NOT NULL COLLATE NOCASE,
+    FOREIGN KEY (client_ip_address_id) REFERENCES client_ip_addresses (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS security_logs_client_ip_address_id_idx ON security_logs (client_ip_address_id);
+CREATE INDEX IF NOT EXISTS security_logs_ip_type_created_idx ON security_logs (client_ip_address_id, log_type, created_at);
+CREATE INDEX IF NOT EXISTS security_logs_created_at_idx ON security_logs (created_at);
+CREATE TRIGGER IF NOT EXISTS security_logs_updated_at AFTER UPDATE ON security_logs FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE security_logs SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
+
+CREATE TABLE IF NOT EXISTS security_logs_archive (
+    id INTEGER NOT NULL PRIMARY KEY,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    client_ip_address_id INTEGER NOT NULL,
+    ip_hash VARCHAR(255) NOT NULL COLLATE NOCASE,
+    log_type VARCHAR(255) NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS security_logs_archive_created_at_idx ON security_logs_archive (created_at);
+
+CREATE TABLE IF NOT EXISTS password_resets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    user_id INTEGER NOT NULL,
+    reset_code VARCHAR(255) NOT NULL COLLATE NOCASE,
+    success TINYINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS password_resets_user_id_idx ON password_resets (user_id);
+CREATE INDEX IF NOT EXISTS password_resets_user_created_idx ON password_resets (user_id, created_at);
+CREATE TRIGGER IF NOT EXISTS password_resets_updated_at AFTER UPDATE ON password_resets FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE password_resets SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid;
+END;
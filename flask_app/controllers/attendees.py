@@ -1,14 +1,10 @@
-import datetime
-
 from flask import session, redirect, request, flash, abort
 
 from flask_app import app, SECURITY_SETTINGS, LOG_TYPE_ATTENDEE_LOGIN
 from flask_app.models import user, event
 from flask_app.models.attendee import Attendee
-from flask_app.models.client_ip_address import ClientIPAddress
-from flask_app.models.security_log import SecurityLog
 from flask_app.models.user_is_attendee import UserIsAttendee
-from flask_app.utils.logging import log_security_issue
+from flask_app.utils.rate_limiting import get_rate_limiter
 from flask_app.utils.utils_requests import get_client_ip
 
 
@@ -74,23 +70,17 @@ def attend_event_unknown_user(share_key: str):
     # Prevent password guessing.
     timeout_minutes = SECURITY_SETTINGS['failed_attendee_login_timeout_min']
     client_ip = get_client_ip(request)
-    client_ip_address = ClientIPAddress.get_by_ip_address(client_ip)
-    if client_ip_address is not None:
-        failed_attendee_logins = SecurityLog.get_by_client_ip_address_id_and_log_type_after_created_at(
-            client_ip_address.id,
-            LOG_TYPE_ATTENDEE_LOGIN,
-            datetime.datetime.now() - datetime.timedelta(minutes=timeout_minutes)
+    # Block client on third failed attempt.
+    if get_rate_limiter().count(client_ip, LOG_TYPE_ATTENDEE_LOGIN, timeout_minutes) >= 2:
+        get_rate_limiter().hit(client_ip, LOG_TYPE_ATTENDEE_LOGIN)
+
+        # Display a message and autocomplete form data.
+        flash(
+            "You have failed to login as an attendee too many times. "
+            "Please wait {} minutes before trying again.".format(timeout_minutes)
         )
-        if len(failed_attendee_logins) >= 2:  # Block client on third failed attempt.
-            log_security_issue(client_ip, LOG_TYPE_ATTENDEE_LOGIN)
-
-            # Display a message and autocomplete form data.
-            flash(
-                "You have failed to login as an attendee too many times. "
-                "Please wait {} minutes before trying again.".format(timeout_minutes)
-            )
-            session['form_data'] = form_data
-            return redirect_back_to_attendee_signup()
+        session['form_data'] = form_data
+        return redirect_back_to_attendee_signup()
 
     # Set the non-registered user's attendee status.
     form_data['event_id'] = found_event.id
@@ -126,7 +116,7 @@ def attend_event_unknown_user(share_key: str):
 
         found_attendee = Attendee.get_by_all(**form_data)
         if not Attendee.validate_attendee_login(form_data):
-            log_security_issue(client_ip, LOG_TYPE_ATTENDEE_LOGIN)
+            get_rate_limiter().hit(client_ip, LOG_TYPE_ATTENDEE_LOGIN)
 
             # Redirect back.
             session['form_data'] = form_data
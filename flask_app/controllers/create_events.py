@@ -1,16 +1,12 @@
-import datetime
-
 from flask import render_template, request, session, redirect, flash
 
 from flask_app import app, LOG_TYPE_EVENT_CREATION, SECURITY_SETTINGS
-from flask_app.models.client_ip_address import ClientIPAddress
 from flask_app.models.event import Event
 from flask_app.models.event_location import EventLocation
 from flask_app.models.private_event import PrivateEvent
-from flask_app.models.security_log import SecurityLog
 from flask_app.models.user import User
 from flask_app.models.user_creates_event import UserCreatesEvent
-from flask_app.utils.logging import log_security_issue
+from flask_app.utils.rate_limiting import get_rate_limiter
 from flask_app.utils.utils_requests import get_client_ip
 
 
@@ -30,21 +26,14 @@ def create_new_event():
     # Check that the client isn't spamming the website with events.
     minutes_between_events = SECURITY_SETTINGS['event_created_timeout_min']
     client_ip = get_client_ip(request)
-    client_ip_address = ClientIPAddress.get_by_ip_address(client_ip)
-    if client_ip_address is not None:
-        event_creation_logs = SecurityLog.get_by_client_ip_address_id_and_log_type_after_created_at(
-            client_ip_address.id,
-            LOG_TYPE_EVENT_CREATION,
-            datetime.datetime.now() - datetime.timedelta(minutes=minutes_between_events)
+    if get_rate_limiter().count(client_ip, LOG_TYPE_EVENT_CREATION, minutes_between_events) > 0:
+        # Display a message and autocomplete form data.
+        flash(
+            "To reduce bot activity, each person is limited to creating one event per {} "
+            "minutes. Please wait before trying again.".format(minutes_between_events)
         )
-        if len(event_creation_logs) > 0:
-            # Display a message and autocomplete form data.
-            flash(
-                "To reduce bot activity, each person is limited to creating one event per {} "
-                "minutes. Please wait before trying again.".format(minutes_between_events)
-            )
-            session['form_data'] = form_data
-            return redirect('/events/create/')
+        session['form_data'] = form_data
+        return redirect('/events/create/')
 
     # Validate user information, if the user is logged in.
     user_id = None
@@ -85,7 +74,7 @@ def create_new_event():
         PrivateEvent.create(cleaned_data)
 
     # Log the event creation.
-    log_security_issue(client_ip, LOG_TYPE_EVENT_CREATION)
+    get_rate_limiter().hit(client_ip, LOG_TYPE_EVENT_CREATION)
 
     # If user_id is not None, link the created event with the user.
     if user_id is not None:
@@ -1,10 +1,16 @@
 import datetime
 
-from flask import session, redirect, render_template, request, flash
+from flask import session, redirect, render_template, request, flash, url_for
 
 from flask_app import app
 from flask_app.models import user, event
 
+# The URL argument that holds each event list's next-page cursor.
+PAGE_CURSOR_ARGS = {
+    'created_events': 'created_after',
+    'attending_events': 'attending_after',
+}
+
 
 @app.route('/dashboard/', methods=["GET", ])
 def dashboard():
@@ -18,6 +24,7 @@ def dashboard():
         'events': None,
         'show_view_button': True,
         'shorten_attendees': True,  # Also found on the "view event" page.
+        'show_created_events': PAGE_CURSOR_ARGS['created_events'] in request.args,
     }
 
     found_user = user.User.get_by_id(session['user_id'])
@@ -25,58 +32,62 @@ def dashboard():
         return redirect('/login/')
     context['user'] = found_user
 
-    # Get all events.
-    all_user_events = {
-        'created_events': found_user.get_created_events(),
-        'attending_events': found_user.get_attending_events(),
-    }
-
-    for event_type_key in all_user_events:
-        found_events = all_user_events[event_type_key]
-
-        # Check for form data (inside URL arguments). If it exists,
-        # filter out events that don't match those requirements.
-        show_default_events = True
-        event_limit = 25
-        form_data = dict(request.args)
-        if len(form_data) > 0:
-            context['form_data'] = form_data
-            event_limit = int(form_data['max_num_results']) if 'max_num_results' in form_data else 25
-            event_limit = min(50, max(1, event_limit))
-
-            # Make sure that all inputs are accessible.
-            form_data_is_valid = True
-            for key in ('timezone_offset', 'min_start_time', 'max_start_time'):
-                if key not in form_data:
-                    flash("The following input was not provided: '{}'".format(key))
-                    form_data_is_valid = False
-
-            # Add the timezone offset and keep events that satisfy search filters.
-            if form_data_is_valid:
-                timezone_offset = int(form_data['timezone_offset'])
-                min_start_utc = datetime.datetime.strptime(form_data['min_start_time'], "%Y-%m-%dT%H:%M") +\
-                    datetime.timedelta(minutes=timezone_offset)
-                max_start_utc = datetime.datetime.strptime(form_data['max_start_time'], "%Y-%m-%dT%H:%M") +\
-                    datetime.timedelta(minutes=timezone_offset)
-
-                if min_start_utc > max_start_utc:
-                    flash("The minimum start time must be before the maximum start time.")
-                else:
-                    for x in range(len(found_events) - 1, -1, -1):
-                        fe = found_events[x]
-                        assert isinstance(fe, event.Event)
-                        if not bool(min_start_utc <= fe.start_time <= max_start_utc):
-                            found_events.pop(x)
-                    show_default_events = False
-
-        if show_default_events:
-            for x in range(len(found_events) - 1, -1, -1):
-                if found_events[x].event_has_ended():
-                    found_events.pop(x)
-
-        found_events.sort(key=lambda e: e.start_time)
+    # Check for form data (inside URL arguments). If it exists, only show events that match those requirements.
+    # Otherwise, show the events that haven't ended yet.
+    form_data = {key: value for key, value in request.args.items() if key not in PAGE_CURSOR_ARGS.values()}
+    event_limit = 25
+    min_start_utc, max_start_utc = None, None
+    exclude_ended = True
+    if len(form_data) > 0:
+        context['form_data'] = form_data
+        event_limit = int(form_data['max_num_results']) if 'max_num_results' in form_data else 25
+        event_limit = min(50, max(1, event_limit))
+
+        # Make sure that all inputs are accessible.
+        form_data_is_valid = True
+        for key in ('timezone_offset', 'min_start_time', 'max_start_time'):
+            if key not in form_data:
+                flash("The following input was not provided: '{}'".format(key))
+                form_data_is_valid = False
+
+        # Add the timezone offset to get the search filters in UTC.
+        if form_data_is_valid:
+            timezone_offset = int(form_data['timezone_offset'])
+            search_min_start_utc = datetime.datetime.strptime(form_data['min_start_time'], "%Y-%m-%dT%H:%M") +\
+                datetime.timedelta(minutes=timezone_offset)
+            search_max_start_utc = datetime.datetime.strptime(form_data['max_start_time'], "%Y-%m-%dT%H:%M") +\
+                datetime.timedelta(minutes=timezone_offset)
+
+            if search_min_start_utc > search_max_start_utc:
+                flash("The minimum start time must be before the maximum start time.")
+            else:
+                min_start_utc, max_start_utc = search_min_start_utc, search_max_start_utc
+                exclude_ended = False
+
+    # Get one page of each kind of event. One extra event is loaded to find out whether there is a next page.
+    feed = event.Event.get_dashboard_feed(
+        found_user.id,
+        min_start_time=min_start_utc,
+        max_start_time=max_start_utc,
+        limit=event_limit + 1,
+        exclude_ended=exclude_ended,
+        created_after=event.Event.parse_page_cursor(request.args.get(PAGE_CURSOR_ARGS['created_events'])),
+        attending_after=event.Event.parse_page_cursor(request.args.get(PAGE_CURSOR_ARGS['attending_events']))
+    )
+    for event_type_key, found_events in feed.items():
+        if len(found_events) > event_limit:
+            found_events = found_events[:event_limit]
+            # The other list goes back to its first page, so that the page shows the tab that was paged.
+            next_page_args = {key: value for key, value in request.args.items() if key not in PAGE_CURSOR_ARGS.values()}
+            next_page_args[PAGE_CURSOR_ARGS[event_type_key]] = event.Event.get_page_cursor(found_events[-1])
+            context[event_type_key + '_next_page_url'] = url_for('dashboard', **next_page_args)
         if len(found_events) > 0:
-            context[event_type_key] = found_events[:event_limit]
+            context[event_type_key] = found_events
 
-    return render_template('dashboard.html', **context)
+    # Load what the event cards show for both lists at once.
+    event.Event.prefetch(
+        context.get('created_events', []) + context.get('attending_events', []),
+        'author', 'location', 'private', 'attendees__user'
+    )
 
+    return render_template('dashboard.html', **context)
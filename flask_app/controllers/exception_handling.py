@@ -1,27 +1,38 @@
-from flask import render_template
 from werkzeug.exceptions import HTTPException
 
 from flask_app import app
+from flask_app.config.circuit_breaker import DatabaseUnavailableError
 from flask_app.models.exception import SiteException
+from flask_app.utils.database import rollback_request_session
+from flask_app.utils.error_pages import get_error_message, get_error_page
 
 
 @app.errorhandler(Exception)
 def handle_any_exception(e: Exception):
     print("Caught exception: {}".format(e))
     # raise e  # TODO: Remove after testing.
-    SiteException.create(type=str(type(e)), message=str(e))
+
+    # The database is down or overloaded. Don't try to record the error there; just ask the user to come back.
+    if isinstance(e, DatabaseUnavailableError):
+        rollback_request_session()
+        response_headers = {'Retry-After': str(int(e.retry_after_sec))}
+        return get_error_page(503, get_error_message(503)), 503, response_headers
+
+    # Unexpected errors may have left the request's transaction half-finished, so throw it away. HTTP errors are
+    # raised on purpose (often right after logging a security issue), so whatever they wrote is still committed.
+    if not isinstance(e, HTTPException):
+        rollback_request_session()
+    try:
+        SiteException.record(e)  # Counted in memory and written later, so error storms don't reach the database.
+    except Exception as ex:
+        # The database may be the reason this request failed. Still show the error page instead of a bare 500.
+        print("Could not record exception: {}".format(ex))
 
     # Not a 500-type exception; explain what went wrong so the user knows how to fix the problem.
     if isinstance(e, HTTPException):
-        context = {
-            'error_num': e.code,
-            'message': e.description,
-        }
+        error_num, message = e.code, e.description
     # 500-type exception; leave information ambiguous.
     else:
-        context = {
-            'error_num': 500,
-            'message': "The server encountered an internal error and was unable to complete your request. "
-                       "Either the server is overloaded or there is an error in the application."
-        }
-    return render_template('exception_page.html', **context), context['error_num']
+        error_num, message = 500, get_error_message(500)
+    # Usually served from the pages rendered at startup (see server.py).
+    return get_error_page(error_num, message), error_num
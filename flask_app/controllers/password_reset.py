@@ -62,7 +62,7 @@ def process_form_password_reset_email():
             "Could not send a password reset email to the user with an ID of '{}'. Check that you aren't being "
             "limited by Gmail.".format(found_user.id)
         )
-        SiteException.create_by_exception(ex)
+        SiteException.record(ex)
         session['alert'] = (
             "Error",
             (
@@ -1,6 +1,7 @@
-from flask import abort, request, session, redirect, render_template
+from flask import abort, request, session, redirect, render_template, Response
 
 from flask_app import app, get_domain_address
+from flask_app.config.sqldatabase import SQLDatabase
 from flask_app.models import user, verified_email
 
 
@@ -15,6 +16,21 @@ def get_client_time():
     abort(404)
 
 
+@app.route('/tests/query_stats/')
+def show_query_stats():
+    # Statistics are kept per process, so each Gunicorn worker reports its own numbers.
+    if 'reset' in request.args:
+        SQLDatabase.reset_query_stats()
+    lines = [SQLDatabase.format_query_stats(), ""]
+    for db_name, retry_stats in SQLDatabase.get_retry_stats().items():
+        lines.append("{} retries: {}".format(db_name, retry_stats))
+    for db_name, breaker_stats in SQLDatabase.get_circuit_breaker_stats().items():
+        lines.append("{} circuit breaker: {}".format(db_name, breaker_stats))
+    for db_name, cache_stats in SQLDatabase.get_cache_stats().items():
+        lines.append("{} query cache: {}".format(db_name, cache_stats))
+    return Response("\n".join(lines), mimetype='text/plain')
+
+
 @app.route('/tests/clear_session/')
 def clear_session():
     session.clear()
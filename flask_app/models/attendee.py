@@ -1,14 +1,21 @@
-from typing import Any
+from typing import Any, List
 
 from flask import flash, session
 
 from flask_app import BCRYPT_HASH_REGEX, bcrypt
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import event, user, user_is_attendee
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped, identity_mapped_many
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 from flask_app.utils.passwords import bcrypt_password_if_not
 
 
 class Attendee:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'event_id', 'first_name', 'last_name', 'password',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -18,8 +25,17 @@ class Attendee:
         self.last_name = data['last_name']
         self.password = data['password']
 
-        self.__event = None
-        self.__user = -1  # May be None, not User.
+    __event = LazyRelation(lambda a: a.event_id, lambda event_ids: index_by(event.Event.get_by_ids(event_ids), 'id'))
+    __user = LazyRelation(lambda a: a.id, lambda attendee_ids: Attendee.__load_users(attendee_ids))  # May be None.
+
+    @classmethod
+    def __load_users(cls, attendee_ids: list) -> dict:
+        user_ids = {
+            uia.attendee_id: uia.user_id
+            for uia in user_is_attendee.UserIsAttendee.get_by_attendee_ids(attendee_ids)
+        }
+        users = index_by(user.User.get_by_ids(list(set(user_ids.values()))), 'id')
+        return {attendee_id: users.get(user_id) for attendee_id, user_id in user_ids.items()}
 
     def to_dict(self):
         return {
@@ -33,20 +49,24 @@ class Attendee:
         }
 
     def get_event(self):
-        if self.__event is None:
-            self.__event = event.Event.get_by_id(self.event_id)
         return self.__event
 
     def get_user_if_exists(self) -> Any or None:
-        if self.__user == -1:
-            uia = user_is_attendee.UserIsAttendee.get_by_attendee_id(self.id)
-            if uia is None:
-                self.__user = None
-            else:
-                assert isinstance(uia, user_is_attendee.UserIsAttendee)
-                self.__user = user.User.get_by_id(uia.user_id)
         return self.__user
 
+    @classmethod
+    def prefetch(cls, attendees: list, *relations: str) -> None:
+        """
+        Load a relation for every attendee in the list with one batch of queries. The getters already do this for
+        attendees from the same query result, so this is only needed for lists put together from several queries.
+
+        :param relations: 'user' fills get_user_if_exists().
+        """
+        for relation in relations:
+            if relation != 'user':
+                raise Exception("Attendees have no relation named '{}'.".format(relation))
+        cls.__user.load([a for a in attendees if not cls.__user.is_loaded(a)])
+
     @classmethod
     def validate_new_attendee(cls, data: dict, suppress_flash_messages: bool = False) -> bool:
         is_valid = True
@@ -143,6 +163,31 @@ class Attendee:
             data
         )
 
+    @classmethod
+    def create_many(cls, data_list: List[dict]) -> List[int]:
+        """
+        :param data_list: One dictionary per new attendee, with the same keys used by create().
+        :return: The ID numbers of the new attendees, in the same order as data_list.
+        """
+        for data in data_list:
+            data['first_name'] = data['first_name'].title()
+            data['last_name'] = data['last_name'].title()
+            data['password'] = bcrypt_password_if_not(data['password'])
+
+        db = get_database()
+        return db.bulk_insert(
+            """
+            INSERT INTO attendees (event_id, first_name, last_name, password)
+            VALUES (
+                %(event_id)s,
+                %(first_name)s,
+                %(last_name)s,
+                %(password)s
+            );
+            """,
+            data_list
+        )
+
     @classmethod
     def create_from_user_id_and_event_id(cls, user_id: int, event_id: int, *args, **kwargs) -> int:
         found_user = user.User.get_by_id(user_id)
@@ -163,6 +208,7 @@ class Attendee:
             raise Exception("Could not create attendee from user_id and event_id.")
 
     @classmethod
+    @identity_mapped('attendees')
     def get_by_id(cls, id: int, *args, **kwargs) -> Any or None:
         db = get_database()
         items = db.execute_query(
@@ -176,6 +222,20 @@ class Attendee:
         else:
             return None
 
+    @classmethod
+    @identity_mapped_many('attendees')
+    def get_by_ids(cls, ids: list, *args, **kwargs) -> list:
+        if len(ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM attendees WHERE id IN %(ids)s;
+            """,
+            {'ids': list(ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     @classmethod
     def get_by_user_id(cls, user_id: int, *args, **kwargs) -> list:
         user_is_attendee_list = user_is_attendee.UserIsAttendee.get_by_user_id(user_id)
@@ -191,49 +251,53 @@ class Attendee:
     @classmethod
     def get_by_event_id(cls, event_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM attendees WHERE event_id = %(event_id)s;
             """,
             {'event_id': event_id, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
+
+    @classmethod
+    def get_by_event_ids(cls, event_ids: list, *args, **kwargs) -> list:
+        if len(event_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM attendees WHERE event_id IN %(event_ids)s;
+            """,
+            {'event_ids': list(event_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_first_name(cls, first_name: str, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM attendees WHERE first_name = %(first_name)s;
             """,
             {'first_name': first_name, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_last_name(cls, last_name: str, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM attendees WHERE last_name = %(last_name)s;
             """,
             {'last_name': last_name, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_full_name(cls, first_name: str, last_name: str, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM attendees WHERE
                 first_name = %(first_name)s AND 
@@ -244,10 +308,7 @@ class Attendee:
                 'last_name': last_name,
             }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_full_name_and_event_id(
@@ -258,7 +319,7 @@ class Attendee:
             may have a name, and registered users with the same name may appear as well.
         """
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM attendees WHERE
                 first_name = %(first_name)s AND 
@@ -271,10 +332,7 @@ class Attendee:
                 'event_id': event_id,
             }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_all(cls, event_id: int, first_name: str, last_name: str, password: str, *args, **kwargs) -> Any or None:
@@ -313,6 +371,7 @@ class Attendee:
             """,
             data
         )
+        db.invalidate_cache('attendees', ids=[self.id])
 
     @classmethod
     def delete_by_id(cls, id: int, *args, **kwargs):
@@ -323,4 +382,5 @@ class Attendee:
             """,
             {'id': id, }
         )
+        db.invalidate_cache('attendees', ids=[id])
 
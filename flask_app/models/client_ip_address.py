@@ -1,11 +1,21 @@
 import datetime
+import threading
 from hashlib import sha256
-from typing import Any
+from typing import Any, List
 
-from flask_app.utils.database import get_database
+from flask_app import get_client_ip_cache_settings
+from flask_app.config.query_cache import QueryCache, get_row_tags
+from flask_app.config.row_hydration import hydrate_rows
+from flask_app.utils.database import get_database, get_request_session, identity_mapped
 
 
 class ClientIPAddress:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'ip_hash',
+    )
+    __id_cache = None  # Raw IP address -> ID. See get_or_create().
+    __id_cache_lock = threading.Lock()
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -54,6 +64,61 @@ class ClientIPAddress:
         )
 
     @classmethod
+    def get_or_create(cls, ip_address: str, *args, **kwargs) -> int:
+        """
+        :return:
+            The ID of the IP address's record, which is added if it doesn't exist yet. IDs are remembered for recently
+            seen addresses, so that a repeat visitor needs no queries (and no hashing).
+        """
+        id_cache = cls.__get_id_cache()
+        found, client_ip_address_id = id_cache.get(ip_address)
+        if found:
+            return client_ip_address_id
+
+        # One atomic statement, so two requests from a new address can't both add it. LAST_INSERT_ID(id) makes an
+        # existing row's ID the statement's insert ID.
+        db = get_database()
+        client_ip_address_id = db.execute_insert(
+            """
+            INSERT INTO client_ip_addresses (ip_hash)
+            VALUES (
+                %(ip_hash)s
+            )
+            ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id);
+            """,
+            {'ip_hash': cls.get_hashed_ip(ip_address), }
+        )
+
+        # Remember a new row only once it has been committed, since a rollback would leave the ID pointing at nothing.
+        def remember() -> None:
+            id_cache.set(ip_address, client_ip_address_id, get_row_tags('client_ip_addresses', [client_ip_address_id]))
+
+        session = get_request_session()
+        if session is not None:
+            session.call_after_commit(remember)
+        else:
+            remember()
+        return client_ip_address_id
+
+    @classmethod
+    def forget_ids(cls, ids: List[int]) -> None:
+        """
+        Stop get_or_create() from returning these IDs, e.g. because their records are being deleted.
+        """
+        cls.__get_id_cache().invalidate(get_row_tags('client_ip_addresses', ids))
+
+    @classmethod
+    def __get_id_cache(cls) -> QueryCache:
+        if cls.__id_cache is None:
+            # Only one cache, since request threads and the security log writer's thread all use it.
+            with cls.__id_cache_lock:
+                if cls.__id_cache is None:
+                    settings = get_client_ip_cache_settings()
+                    cls.__id_cache = QueryCache(max_entries=settings['max_entries'], ttl_sec=settings['ttl_sec'])
+        return cls.__id_cache
+
+    @classmethod
+    @identity_mapped('client_ip_addresses')
     def get_by_id(cls, id: int) -> Any or None:
         db = get_database()
         items = db.execute_query(
@@ -86,22 +151,57 @@ class ClientIPAddress:
     @classmethod
     def get_by_max_created_at(cls, created_at: datetime.datetime) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM client_ip_addresses WHERE created_at = %(created_at)s;
             """,
             {'created_at': created_at, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
-
-
-
-
-
-
-
+        return hydrate_rows(cls, columns, rows)
 
+    @classmethod
+    def delete_unused_before(cls, created_at: datetime.datetime, batch_size: int = 1000) -> int:
+        """
+        Delete the IP addresses that were added before created_at and no longer have any security logs, in batches
+        of batch_size. Run this after SecurityLog.archive_before(), so that the addresses of archived logs go too.
 
+        :return: The number of deleted records.
+        """
+        db = get_database()
+        num_deleted = 0
+        after_id = 0
+        while True:
+            rows = db.execute_query(
+                """
+                SELECT id FROM client_ip_addresses
+                WHERE
+                    id > %(after_id)s AND
+                    created_at < %(created_at)s AND
+                    NOT EXISTS (
+                        SELECT 1 FROM security_logs WHERE security_logs.client_ip_address_id = client_ip_addresses.id
+                    )
+                ORDER BY id
+                LIMIT %(limit)s;
+                """,
+                {'after_id': after_id, 'created_at': created_at, 'limit': batch_size, },
+                use_primary=True
+            )
+            if len(rows) == 0:
+                return num_deleted
+            ids = [row['id'] for row in rows]
+            after_id = ids[-1]
+
+            cls.forget_ids(ids)
+            # Check for logs again, in case one was written since the SELECT.
+            num_deleted += db.execute_many(
+                """
+                DELETE FROM client_ip_addresses
+                WHERE
+                    id IN %(ids)s AND
+                    NOT EXISTS (
+                        SELECT 1 FROM security_logs WHERE security_logs.client_ip_address_id = client_ip_addresses.id
+                    );
+                """,
+                [{'ids': ids, }]
+            )
+            db.invalidate_cache('client_ip_addresses', ids)
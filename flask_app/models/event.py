@@ -5,13 +5,20 @@ from typing import Any
 
 from flask import flash, session
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.controllers import event_comments
 from flask_app.models import attendee, user_creates_event, event_location, private_event, user, user_is_attendee
 from flask_app.utils.data_cleaning import remove_excessive_newlines
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped, identity_mapped_many
+from flask_app.utils.lazy_relations import LazyRelation, group_by, index_by
 
 
 class Event:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'name', 'share_key', 'start_time', 'end_time', 'description', 'canceled',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -23,43 +30,88 @@ class Event:
         self.description = data['description']
         self.canceled = data['canceled']
 
-        self.__attendees = None
-        self.__author_user = -1     # -1 instead of None because of possible None return type.
-        self.__event_location = -1  # -1 instead of None because of possible None return type.
-        self.__private_event = -1   # -1 instead of None because of possible None return type.
-        self.__event_comments = None
+    __attendees = LazyRelation(
+        lambda e: e.id,
+        lambda event_ids: group_by(
+            attendee.Attendee.get_by_event_ids(event_ids), 'event_id', sort_key=lambda x: (x.first_name, x.last_name)
+        ),
+        default=list
+    )
+    __author_user = LazyRelation(lambda e: e.id, lambda event_ids: Event.__load_author_users(event_ids))
+    __event_location = LazyRelation(
+        lambda e: e.id, lambda event_ids: index_by(event_location.EventLocation.get_by_event_ids(event_ids), 'event_id')
+    )
+    __private_event = LazyRelation(
+        lambda e: e.id, lambda event_ids: index_by(private_event.PrivateEvent.get_by_event_ids(event_ids), 'event_id')
+    )
+    __event_comments = LazyRelation(
+        lambda e: e.id,
+        lambda event_ids: group_by(
+            event_comments.EventComment.get_by_event_ids(event_ids), 'event_id', sort_key=lambda x: x.created_at
+        ),
+        default=list
+    )
+
+    @classmethod
+    def __load_author_users(cls, event_ids: list) -> dict:
+        author_ids = {
+            uce.event_id: uce.user_id for uce in user_creates_event.UserCreatesEvent.get_by_event_ids(event_ids)
+        }
+        authors = index_by(user.User.get_by_ids(list(set(author_ids.values()))), 'id')
+        return {event_id: authors.get(user_id) for event_id, user_id in author_ids.items()}
 
     def get_attendees(self) -> list:
-        if self.__attendees is None:
-            self.__attendees = attendee.Attendee.get_by_event_id(self.id)
-            self.__attendees.sort(key=lambda x: (x.first_name, x.last_name))
         return self.__attendees
 
     def get_author_user(self) -> Any or None:
-        if self.__author_user == -1:
-            uce_obj = user_creates_event.UserCreatesEvent.get_by_event_id(self.id)
-            if uce_obj is None:
-                self.__author_user = None
-                return self.__author_user
-            self.__author_user = user.User.get_by_id(uce_obj.user_id)
         return self.__author_user
 
     def get_event_location(self) -> Any or None:
-        if self.__event_location == -1:
-            self.__event_location = event_location.EventLocation.get_by_event_id(self.id)
         return self.__event_location
 
     def get_private_event(self) -> Any or None:
-        if self.__private_event == -1:
-            self.__private_event = private_event.PrivateEvent.get_by_event_id(self.id)
         return self.__private_event
 
     def get_event_comments(self) -> list:
-        if self.__event_comments is None:
-            self.__event_comments = event_comments.EventComment.get_by_event_id(self.id)
-            self.__event_comments.sort(key=lambda x: x.created_at)
         return self.__event_comments
 
+    @classmethod
+    def prefetch(cls, events: list, *relations: str) -> list:
+        """
+        Load relations for every event in the list with a fixed number of batched queries, instead of one or more
+        queries per event when each event's getters are first called (e.g. by blocks/event_card.html).
+
+        The getters already load their relation for every event from the same query result, so this is only needed
+        for lists that were put together from several queries, or to load several relations up front.
+
+        :param relations:
+            Any of 'author' (get_author_user()), 'location' (get_event_location()), 'private' (get_private_event()),
+            'attendees' (get_attendees()) and 'attendees__user' (get_attendees() along with each attendee's
+            get_user_if_exists(), which also answers user_is_attending()).
+        :return: The same list of events.
+        """
+        lazy_relations = {
+            'author': cls.__author_user,
+            'location': cls.__event_location,
+            'private': cls.__private_event,
+            'attendees': cls.__attendees,
+        }
+        for relation in relations:
+            if relation not in lazy_relations and relation != 'attendees__user':
+                raise Exception("Events have no relation named '{}'.".format(relation))
+        if len(events) == 0:
+            return events
+
+        for relation in relations:
+            if relation in lazy_relations:
+                lazy_relations[relation].load(events)
+        if 'attendees__user' in relations:
+            if 'attendees' not in relations:
+                cls.__attendees.load(events)
+            attendee.Attendee.prefetch([a for e in events for a in e.get_attendees()], 'user')
+
+        return events
+
     def to_dict(self) -> dict:
         return {
             'id': self.id,
@@ -120,6 +172,11 @@ class Event:
             return True
 
     def user_is_attending(self, user_id: int) -> bool:
+        if Event.__attendees.is_loaded(self):
+            # The attendees' users are loaded for every attendee at once, so this is cheaper than a query per event.
+            return any(
+                a.get_user_if_exists() is not None and a.get_user_if_exists().id == user_id for a in self.__attendees
+            )
         return bool(user_is_attendee.UserIsAttendee.get_by_user_id_and_event_id(user_id, self.id) is not None)
 
     @classmethod
@@ -198,7 +255,7 @@ class Event:
         data['canceled'] = data['canceled'] if 'canceled' in data else False
 
         db = get_database()
-        return db.execute_insert(
+        event_id = db.execute_insert(
             """
             INSERT INTO events (name, share_key, start_time, end_time, description, canceled)
             VALUES (
@@ -212,29 +269,48 @@ class Event:
             """,
             data
         )
+        db.invalidate_cache('events', inserted=True)
+        return event_id
 
     @classmethod
+    @identity_mapped('events')
     def get_by_id(cls, id: int, *args, **kwargs) -> Any or None:
         db = get_database()
-        items = db.execute_query(
+        items = db.execute_cached_query(
             """
             SELECT * FROM events WHERE id = %(id)s LIMIT 1;
             """,
-            {'id': id, }
+            {'id': id, },
+            table='events'
         )
         if len(items) > 0:
             return cls(items[0])
         else:
             return None
 
+    @classmethod
+    @identity_mapped_many('events')
+    def get_by_ids(cls, ids: list, *args, **kwargs) -> list:
+        if len(ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM events WHERE id IN %(ids)s;
+            """,
+            {'ids': list(ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     @classmethod
     def get_by_share_key(cls, share_key: str, *args, **kwargs):
         db = get_database()
-        items = db.execute_query(
+        items = db.execute_cached_query(
             """
             SELECT * FROM events WHERE share_key = %(share_key)s LIMIT 1;
             """,
-            {'share_key': share_key, }
+            {'share_key': share_key, },
+            table='events'
         )
         if len(items) > 0:
             return cls(items[0])
@@ -242,27 +318,169 @@ class Event:
             return None
 
     @classmethod
-    def get_by_author_id(cls, user_id: int, *args, **kwargs) -> list:
-        user_creates_event_list = user_creates_event.UserCreatesEvent.get_by_user_id(user_id)
-        result = []
-        for uce in user_creates_event_list:
-            assert isinstance(uce, user_creates_event.UserCreatesEvent)
-            found_event = cls.get_by_id(uce.event_id)
-            if found_event is not None:
-                result.append(found_event)
-        return result
+    def get_by_author_id(
+            cls, user_id: int, min_start_time: datetime.datetime = None, max_start_time: datetime.datetime = None,
+            limit: int = None, exclude_ended: bool = False, after: tuple = None, *args, **kwargs
+    ) -> list:
+        """
+        :param min_start_time: If given, only events starting at or after this UTC time are returned.
+        :param max_start_time: If given, only events starting at or before this UTC time are returned.
+        :param limit: If given, at most this many events are returned.
+        :param exclude_ended: If True, events that have already ended are left out.
+        :param after:
+            A (start_time, id) tuple from parse_page_cursor(). If given, only events that come after it in the
+            (start_time, id) order are returned, so the next page starts where the last one ended.
+        :return: The events created by the user, ordered by start time.
+        """
+        return cls.__get_in_time_window(
+            """
+            SELECT events.*
+            FROM events
+            JOIN user_creates_event ON user_creates_event.event_id = events.id
+            WHERE user_creates_event.user_id = %(user_id)s
+            """,
+            {'user_id': user_id, },
+            min_start_time, max_start_time, limit, exclude_ended, after
+        )
 
     @classmethod
-    def get_by_user_id_through_attendee(cls, user_id: int, *args, **kwargs) -> list:
-        attendee_list = attendee.Attendee.get_by_user_id(user_id)
+    def get_by_user_id_through_attendee(
+            cls, user_id: int, min_start_time: datetime.datetime = None, max_start_time: datetime.datetime = None,
+            limit: int = None, exclude_ended: bool = False, after: tuple = None, *args, **kwargs
+    ) -> list:
+        """
+        Takes the same filters as get_by_author_id().
+
+        :return: The events the user is attending, ordered by start time.
+        """
+        return cls.__get_in_time_window(
+            """
+            SELECT DISTINCT events.*
+            FROM events
+            JOIN attendees ON attendees.event_id = events.id
+            JOIN user_is_attendee ON user_is_attendee.attendee_id = attendees.id
+            WHERE user_is_attendee.user_id = %(user_id)s
+            """,
+            {'user_id': user_id, },
+            min_start_time, max_start_time, limit, exclude_ended, after
+        )
 
-        result = []
-        for a in attendee_list:
-            assert isinstance(a, attendee.Attendee)
-            found_event = cls.get_by_id(a.event_id)
-            if found_event is not None:
-                result.append(found_event)
-        return result
+    @classmethod
+    def get_page_cursor(cls, last_event: Any) -> str:
+        """
+        :return: A URL-safe value for the 'after' argument of the next page, once parsed by parse_page_cursor().
+        """
+        return "{}_{}".format(last_event.start_time.strftime("%Y-%m-%dT%H:%M:%S.%f"), last_event.id)
+
+    @classmethod
+    def parse_page_cursor(cls, cursor: str or None) -> tuple or None:
+        """
+        :return: A (start_time, id) tuple, or None if the cursor is missing or malformed.
+        """
+        if not cursor:
+            return None
+        try:
+            start_time, event_id = cursor.rsplit('_', 1)
+            return datetime.datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%S.%f"), int(event_id)
+        except ValueError:
+            return None
+
+    @classmethod
+    def get_dashboard_feed(
+            cls, user_id: int, min_start_time: datetime.datetime = None, max_start_time: datetime.datetime = None,
+            limit: int = None, exclude_ended: bool = False, created_after: tuple = None, attending_after: tuple = None,
+            *args, **kwargs
+    ) -> dict:
+        """
+        Get the results of get_by_author_id() and get_by_user_id_through_attendee() with one UNION ALL query.
+        The filters and the limit apply to each list separately, and each list has its own page cursor.
+
+        :return: A dictionary with a 'created_events' list and an 'attending_events' list.
+        """
+        query_args = {'user_id': user_id, }
+        created_query = cls.__add_time_window_filters(
+            """
+            SELECT 'created' AS relationship, events.*
+            FROM events
+            JOIN user_creates_event ON user_creates_event.event_id = events.id
+            WHERE user_creates_event.user_id = %(user_id)s
+            """,
+            query_args, 'created_', min_start_time, max_start_time, limit, exclude_ended, created_after
+        )
+        attending_query = cls.__add_time_window_filters(
+            """
+            SELECT DISTINCT 'attending' AS relationship, events.*
+            FROM events
+            JOIN attendees ON attendees.event_id = events.id
+            JOIN user_is_attendee ON user_is_attendee.attendee_id = attendees.id
+            WHERE user_is_attendee.user_id = %(user_id)s
+            """,
+            query_args, 'attending_', min_start_time, max_start_time, limit, exclude_ended, attending_after
+        )
+
+        # Each part is wrapped in a derived table so that its ORDER BY and LIMIT also work in SQLite.
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            "SELECT * FROM ({}) AS created_events UNION ALL SELECT * FROM ({}) AS attending_events;".format(
+                created_query, attending_query
+            ),
+            query_args
+        )
+
+        feed = {'created_events': [], 'attending_events': []}
+        relationship_index = columns['relationship']
+        for row in rows:
+            feed[row[relationship_index] + '_events'].append(row)
+        for key in feed:
+            # UNION ALL doesn't keep the order of its parts.
+            feed[key] = hydrate_rows(cls, columns, feed[key])
+            feed[key].sort(key=lambda e: (e.start_time, e.id))
+        return feed
+
+    @classmethod
+    def __get_in_time_window(
+            cls, query: str, query_args: dict, min_start_time: datetime.datetime or None,
+            max_start_time: datetime.datetime or None, limit: int or None, exclude_ended: bool, after: tuple or None
+    ) -> list:
+        query_args = dict(query_args)
+        query = cls.__add_time_window_filters(
+            query, query_args, '', min_start_time, max_start_time, limit, exclude_ended, after
+        )
+        db = get_database()
+        columns, rows = db.execute_query_tuples(query + ";", query_args)
+        return hydrate_rows(cls, columns, rows)
+
+    @classmethod
+    def __add_time_window_filters(
+            cls, query: str, query_args: dict, prefix: str, min_start_time: datetime.datetime or None,
+            max_start_time: datetime.datetime or None, limit: int or None, exclude_ended: bool, after: tuple or None
+    ) -> str:
+        """
+        :param query: A SELECT on the events table that ends with a WHERE clause.
+        :param query_args: Filled with the new parameters.
+        :param prefix: Added to the names of the cursor and limit parameters, which may differ between queries.
+        :return: The query with the filters, ORDER BY and LIMIT added.
+        """
+        if min_start_time is not None:
+            query += " AND events.start_time >= %(min_start_time)s"
+            query_args['min_start_time'] = min_start_time
+        if max_start_time is not None:
+            query += " AND events.start_time <= %(max_start_time)s"
+            query_args['max_start_time'] = max_start_time
+        if exclude_ended:
+            query += " AND events.end_time >= %(now)s"
+            query_args['now'] = datetime.datetime.utcnow()
+        if after is not None:
+            query += (
+                " AND (events.start_time > %({0}after_start_time)s OR"
+                " (events.start_time = %({0}after_start_time)s AND events.id > %({0}after_id)s))".format(prefix)
+            )
+            query_args[prefix + 'after_start_time'], query_args[prefix + 'after_id'] = after
+        query += " ORDER BY events.start_time, events.id"
+        if limit is not None:
+            query += " LIMIT %({}limit)s".format(prefix)
+            query_args[prefix + 'limit'] = int(limit)
+        return query
 
     @classmethod
     def get_record_count(cls) -> int:
@@ -290,6 +508,7 @@ class Event:
             """,
             self.to_dict()
         )
+        db.invalidate_cache('events', ids=[self.id])
 
     @classmethod
     def delete_by_id(cls, id: int, *args, **kwargs):
@@ -300,6 +519,12 @@ class Event:
             """,
             {'id': id, }
         )
+        # The event's location, private key, attendees and comments are deleted along with it (ON DELETE CASCADE).
+        db.invalidate_cache('events', ids=[id])
+        db.invalidate_cache('event_locations', ids=[id])
+        db.invalidate_cache('private_events', ids=[id])
+        db.invalidate_cache('attendees')
+        db.invalidate_cache('event_comments')
 
 
 
@@ -4,12 +4,19 @@ from typing import Any
 
 from flask import flash
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import user, event
 from flask_app.utils.data_cleaning import remove_excessive_newlines
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class EventComment:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'user_id', 'event_id', 'comment',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -18,17 +25,13 @@ class EventComment:
         self.event_id = data['event_id']
         self.comment = data['comment']
 
-        self.__user = None
-        self.__event = None
+    __user = LazyRelation(lambda x: x.user_id, lambda user_ids: index_by(user.User.get_by_ids(user_ids), 'id'))
+    __event = LazyRelation(lambda x: x.event_id, lambda event_ids: index_by(event.Event.get_by_ids(event_ids), 'id'))
 
     def get_user(self):
-        if self.__user is None:
-            self.__user = user.User.get_by_id(self.user_id)
         return self.__user
 
     def get_event(self):
-        if self.__event is None:
-            self.__event = event.Event.get_by_id(self.event_id)
         return self.__event
 
     def to_dict(self) -> dict:
@@ -102,6 +105,7 @@ class EventComment:
         )
 
     @classmethod
+    @identity_mapped('event_comments')
     def get_by_id(cls, id: int, *args, **kwargs) -> Any or None:
         db = get_database()
         items = db.execute_query(
@@ -118,35 +122,42 @@ class EventComment:
     @classmethod
     def get_by_user_id(cls, user_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM event_comments WHERE user_id = %(user_id)s;
             """,
             {'user_id': user_id, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_event_id(cls, event_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM event_comments WHERE event_id = %(event_id)s;
             """,
             {'event_id': event_id, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
+
+    @classmethod
+    def get_by_event_ids(cls, event_ids: list, *args, **kwargs) -> list:
+        if len(event_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM event_comments WHERE event_id IN %(event_ids)s;
+            """,
+            {'event_ids': list(event_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_user_id_and_event_id(cls, user_id: int, event_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM event_comments WHERE
                 user_id = %()s AND
@@ -157,10 +168,7 @@ class EventComment:
                 'event_id': event_id,
             }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     def update(self):
         # Manually set time to UTC so that it can be converted to client's local time by JavaScript later.
@@ -178,6 +186,7 @@ class EventComment:
             """,
             data
         )
+        db.invalidate_cache('event_comments', ids=[self.id])
 
     @classmethod
     def delete_by_id(cls, id: int, *args, **kwargs):
@@ -188,3 +197,4 @@ class EventComment:
             """,
             {'id': id, }
         )
+        db.invalidate_cache('event_comments', ids=[id])
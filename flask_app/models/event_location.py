@@ -3,12 +3,19 @@ from typing import Any
 
 from flask import flash
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import event
 from flask_app.utils.data_cleaning import remove_excessive_newlines
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped, identity_mapped_many
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class EventLocation:
+    __slots__ = (
+        'event_id', 'created_at', 'updated_at', 'street', 'city', 'state', 'country', 'postal_code', 'notes',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.event_id = data['event_id']
         self.created_at = data['created_at']
@@ -20,11 +27,9 @@ class EventLocation:
         self.postal_code = data['postal_code']
         self.notes = data['notes']
 
-        self.__event = None
+    __event = LazyRelation(lambda x: x.event_id, lambda event_ids: index_by(event.Event.get_by_ids(event_ids), 'id'))
 
     def get_event(self):
-        if self.__event is None:
-            self.__event = event.Event.get_by_id(self.event_id)
         return self.__event
 
     def to_dict(self) -> dict:
@@ -138,7 +143,7 @@ class EventLocation:
         data = cls.clean_data(data)
 
         db = get_database()
-        return db.execute_insert(
+        new_id = db.execute_insert(
             """
             INSERT INTO event_locations (event_id, street, city, state, country, postal_code, notes)
             VALUES (
@@ -153,21 +158,40 @@ class EventLocation:
             """,
             data
         )
+        db.invalidate_cache('event_locations', inserted=True)
+        return new_id
 
     @classmethod
+    @identity_mapped('event_locations')
     def get_by_event_id(cls, event_id: int, *args, **kwargs) -> Any or None:
         db = get_database()
-        items = db.execute_query(
+        items = db.execute_cached_query(
             """
             SELECT * FROM event_locations WHERE event_id = %(event_id)s LIMIT 1;
             """,
-            {'event_id': event_id, }
+            {'event_id': event_id, },
+            table='event_locations',
+            id_column='event_id'
         )
         if len(items) > 0:
             return cls(items[0])
         else:
             return None
 
+    @classmethod
+    @identity_mapped_many('event_locations', key_attribute='event_id')
+    def get_by_event_ids(cls, event_ids: list, *args, **kwargs) -> list:
+        if len(event_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM event_locations WHERE event_id IN %(event_ids)s;
+            """,
+            {'event_ids': list(event_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     def update(self):
         db = get_database()
         db.execute_query(
@@ -184,6 +208,7 @@ class EventLocation:
             """,
             self.to_dict()
         )
+        db.invalidate_cache('event_locations', ids=[self.event_id])
 
     @classmethod
     def delete_by_event_id(cls, event_id: int, *args, **kwargs):
@@ -194,5 +219,6 @@ class EventLocation:
             """,
             {'event_id': event_id, }
         )
+        db.invalidate_cache('event_locations', ids=[event_id])
 
 
@@ -1,26 +1,52 @@
-from flask_app.utils.database import get_database
+import sys
+import threading
+from typing import Any, Iterator, List
+
+from flask_app import get_exception_recorder_settings
+from flask_app.config.exception_recorder import ExceptionRecorder, get_fingerprint, get_message_template
+from flask_app.config.row_hydration import hydrate_rows
+from flask_app.utils.database import get_database, identity_mapped
 
 
 class SiteException:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'type', 'message', 'fingerprint', 'occurrences',
+    )
+    __recorder = None  # See record().
+    __recorder_lock = threading.Lock()
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
         self.updated_at = data['updated_at']
         self.type = data['type']
         self.message = data['message']
+        self.fingerprint = data['fingerprint']
+        self.occurrences = data['occurrences']
 
     @classmethod
     def get_all(cls) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             "SELECT * FROM exceptions;"
         )
-        result = []
+        return hydrate_rows(cls, columns, rows)
+
+    @classmethod
+    def iter_all(cls, chunk_size: int = 1000) -> Iterator[Any]:
+        """
+        Same as get_all(), but streams the records instead of loading them all into memory at once.
+        """
+        db = get_database()
+        items = db.iter_query(
+            "SELECT * FROM exceptions;",
+            chunk_size=chunk_size
+        )
         for item in items:
-            result.append(cls(item))
-        return result
+            yield cls(item)
 
     @classmethod
+    @identity_mapped('exceptions')
     def get_by_id(cls, id: int, *args, **kwargs):
         db = get_database()
         items = db.execute_query(
@@ -49,6 +75,104 @@ class SiteException:
             }
         )
 
+    @classmethod
+    def create_many(cls, data_list: List[dict]) -> List[int]:
+        """
+        :param data_list: One dictionary per new record, each with a 'type' and a 'message'.
+        :return: The ID numbers of the new records, in the same order as data_list.
+        """
+        db = get_database()
+        return db.bulk_insert(
+            """
+            INSERT INTO exceptions (type, message)
+            VALUES (
+                %(type)s,
+                %(message)s
+            );
+            """,
+            [{'type': data['type'], 'message': data['message']} for data in data_list]
+        )
+
     @classmethod
     def create_by_exception(cls, ex: Exception) -> int:
         return cls.create(type=str(type(ex)), message=str(ex))
+
+    @classmethod
+    def upsert_many(cls, data_list: List[dict]) -> int:
+        """
+        :param data_list:
+            One dictionary per fingerprint, with a 'fingerprint', 'type', 'message' and 'occurrences'. A fingerprint
+            that already has a record gets its occurrences added to that record's, and keeps its first message.
+        :return: The number of rows affected.
+        """
+        db = get_database()
+        return db.execute_many(
+            """
+            INSERT INTO exceptions (type, message, fingerprint, occurrences)
+            VALUES (
+                %(type)s,
+                %(message)s,
+                %(fingerprint)s,
+                %(occurrences)s
+            )
+            ON DUPLICATE KEY UPDATE occurrences = occurrences + VALUES(occurrences);
+            """,
+            [
+                {
+                    'type': data['type'],
+                    'message': data['message'],
+                    'fingerprint': data['fingerprint'],
+                    'occurrences': data['occurrences'],
+                }
+                for data in data_list
+            ]
+        )
+
+    @classmethod
+    def record(cls, ex: Exception) -> None:
+        """
+        Count an exception without waiting on the database. Exceptions are grouped by fingerprint (see
+        exception_recorder.get_fingerprint()) and written by a background thread, one row per fingerprint.
+        """
+        recorder = cls.__get_recorder()
+        if recorder is None:
+            message = str(ex)
+            cls.upsert_many([{
+                'fingerprint': get_fingerprint(ex, get_message_template(message), sys._getframe(1)),
+                'type': str(type(ex)),
+                'message': message,
+                'occurrences': 1,
+            }])
+        else:
+            recorder.record(ex, sys._getframe(1))
+
+    @classmethod
+    def flush_recorded(cls) -> int:
+        """
+        Write every exception recorded so far, without waiting for the background thread.
+
+        :return: The number of rows written.
+        """
+        recorder = cls.__get_recorder()
+        return 0 if recorder is None else recorder.flush()
+
+    @classmethod
+    def get_recorder_stats(cls) -> dict or None:
+        recorder = cls.__get_recorder()
+        return None if recorder is None else recorder.get_stats()
+
+    @classmethod
+    def __get_recorder(cls) -> ExceptionRecorder or None:
+        settings = get_exception_recorder_settings()
+        if cls.__recorder is None and settings['enabled']:
+            # Only one recorder, so that each fingerprint is counted in one place and written by one thread.
+            with cls.__recorder_lock:
+                if cls.__recorder is None:
+                    cls.__recorder = ExceptionRecorder(
+                        cls.upsert_many,
+                        flush_interval_sec=settings['flush_interval_sec'],
+                        max_per_sec=settings['max_per_sec'],
+                        sample_every=settings['sample_every'],
+                        max_fingerprints=settings['max_fingerprints'],
+                    )
+        return cls.__recorder
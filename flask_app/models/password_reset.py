@@ -7,11 +7,17 @@ from flask import flash, render_template
 from flask_app import get_domain_address
 from flask_app.models import user
 from flask_app.models.exception import SiteException
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped
 from flask_app.utils.email_utils import send_email
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class PasswordReset:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'user_id', 'reset_code', 'success',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -20,11 +26,9 @@ class PasswordReset:
         self.reset_code = data['reset_code']
         self.success = data['success']
 
-        self.__user = None
+    __user = LazyRelation(lambda x: x.user_id, lambda user_ids: index_by(user.User.get_by_ids(user_ids), 'id'))
 
     def get_user(self):
-        if self.__user is None:
-            self.__user = user.User.get_by_id(self.user_id)
         return self.__user
 
     def to_dict(self) -> dict:
@@ -47,7 +51,7 @@ class PasswordReset:
                 ex = Exception(
                     "The '{}' key is missing. Cannot validate new password reset record.".format(key)
                 )
-                SiteException.create_by_exception(ex)
+                SiteException.record(ex)
                 is_valid = False
         if not is_valid:
             return is_valid
@@ -58,7 +62,7 @@ class PasswordReset:
                 "The user with an ID number of '{}' could not be found in the database. Cannot validate a new "
                 "password reset record.".format(data['user_id'])
             )
-            SiteException.create_by_exception(ex)
+            SiteException.record(ex)
             is_valid = False
             return is_valid
 
@@ -79,7 +83,7 @@ class PasswordReset:
                 ex = Exception(
                     "The '{}' key is missing. Cannot validate rendering of the password reset form.".format(key)
                 )
-                SiteException.create_by_exception(ex)
+                SiteException.record(ex)
                 is_valid = False
         if not is_valid:
             return is_valid
@@ -105,7 +109,7 @@ class PasswordReset:
                 ex = Exception(
                     "The '{}' key is missing. Cannot validate rendering of the password reset form.".format(key)
                 )
-                SiteException.create_by_exception(ex)
+                SiteException.record(ex)
                 is_valid = False
         if not is_valid:
             return is_valid
@@ -144,6 +148,7 @@ class PasswordReset:
         )
 
     @classmethod
+    @identity_mapped('password_resets')
     def get_by_id(cls, id: int, *args, **kwargs) -> Any or None:
         db = get_database()
         items = db.execute_query(
@@ -166,7 +171,7 @@ class PasswordReset:
             WHERE
                 user_id = %(user_id)s
             ORDER BY
-                -created_at     /* Move the maximum datetime to the front. */
+                created_at DESC     /* Reads password_resets_user_created_idx backwards. */
             LIMIT 1;
             """,
             {'user_id': user_id, }
@@ -186,7 +191,7 @@ class PasswordReset:
                 user_id = %(user_id)s AND
                 reset_code = %(reset_code)s
             ORDER BY
-                -created_at     /* Move the maximum datetime to the front. */
+                created_at DESC     /* Reads password_resets_user_created_idx backwards. */
             LIMIT 1;
             """,
             {'user_id': user_id, 'reset_code': reset_code}
@@ -207,6 +212,7 @@ class PasswordReset:
             """,
             self.to_dict()
         )
+        db.invalidate_cache('password_resets', ids=[self.id])
 
     @staticmethod
     def generate_reset_code() -> str:
@@ -226,7 +232,7 @@ class PasswordReset:
             ex = Exception(
                 "Could not validate a password reset record for the user with the ID of '{}'.".format(user_id)
             )
-            SiteException.create_by_exception(ex)
+            SiteException.record(ex)
             return False, None
 
         found_user = user.User.get_by_id(user_id)
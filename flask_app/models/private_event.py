@@ -2,22 +2,27 @@ from typing import Any
 
 from flask import flash
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import event
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped, identity_mapped_many
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class PrivateEvent:
+    __slots__ = (
+        'event_id', 'created_at', 'updated_at', 'secret_key',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.event_id = data['event_id']
         self.created_at = data['created_at']
         self.updated_at = data['updated_at']
         self.secret_key = data['secret_key']
 
-        self.__event = None
+    __event = LazyRelation(lambda x: x.event_id, lambda event_ids: index_by(event.Event.get_by_ids(event_ids), 'id'))
 
     def get_event(self):
-        if self.__event is None:
-            self.__event = event.Event.get_by_id(self.event_id)
         return self.__event
 
     def to_dict(self) -> dict:
@@ -76,7 +81,7 @@ class PrivateEvent:
             raise Exception("The event does not exist.")
 
         db = get_database()
-        return db.execute_insert(
+        new_id = db.execute_insert(
             """
             INSERT INTO private_events (event_id, secret_key)
             VALUES (
@@ -86,21 +91,40 @@ class PrivateEvent:
             """,
             data
         )
+        db.invalidate_cache('private_events', inserted=True)
+        return new_id
 
     @classmethod
+    @identity_mapped('private_events')
     def get_by_event_id(cls, event_id: int, *args, **kwargs) -> Any or None:
         db = get_database()
-        items = db.execute_query(
+        items = db.execute_cached_query(
             """
             SELECT * FROM private_events WHERE event_id = %(event_id)s LIMIT 1;
             """,
-            {'event_id': event_id, }
+            {'event_id': event_id, },
+            table='private_events',
+            id_column='event_id'
         )
         if len(items) > 0:
             return cls(items[0])
         else:
             return None
 
+    @classmethod
+    @identity_mapped_many('private_events', key_attribute='event_id')
+    def get_by_event_ids(cls, event_ids: list, *args, **kwargs) -> list:
+        if len(event_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM private_events WHERE event_id IN %(event_ids)s;
+            """,
+            {'event_ids': list(event_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     def update(self):
         db = get_database()
         db.execute_query(
@@ -112,6 +136,7 @@ class PrivateEvent:
             """,
             self.to_dict()
         )
+        db.invalidate_cache('private_events', ids=[self.event_id])
 
     @classmethod
     def delete_by_event_id(cls, event_id: int, *args, **kwargs):
@@ -122,5 +147,6 @@ class PrivateEvent:
             """,
             {'event_id': event_id, }
         )
+        db.invalidate_cache('private_events', ids=[event_id])
 
 
@@ -1,13 +1,18 @@
 import copy
 import datetime
-from typing import Any
+from typing import Any, Iterator, List
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import client_ip_address
 from flask_app.models.exception import SiteException
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped
 
 
 class SecurityLog:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'client_ip_address_id', 'log_type',
+    )
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -26,7 +31,7 @@ class SecurityLog:
                     "The '{}' field was not provided during the validation for an SecurityLog record."
                     .format(key)
                 )
-                SiteException.create(type=str(type(ex)), message=str(ex))
+                SiteException.record(ex)
                 is_valid = False
         if not is_valid:
             return is_valid
@@ -37,7 +42,7 @@ class SecurityLog:
                 "Cannot create a new SecurityLog record."
                 .format(data['client_ip_address_id'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
         if len(data['log_type']) < 2:
             ex = Exception(
@@ -45,7 +50,7 @@ class SecurityLog:
                 "Cannot create a new SecurityLog record."
                 .format(data['log_type'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
 
         return is_valid
@@ -74,6 +79,39 @@ class SecurityLog:
         )
 
     @classmethod
+    def create_many(cls, data_list: List[dict]) -> List[int]:
+        """
+        :param data_list:
+            One dictionary per new record, with the same keys used by create(). Records that are written some time
+            after they happened may also have a 'created_at' key, in which case every record must have one.
+        :return: The ID numbers of the new records, in the same order as data_list.
+        """
+        db = get_database()
+        if len(data_list) > 0 and 'created_at' in data_list[0]:
+            return db.bulk_insert(
+                """
+                INSERT INTO security_logs (client_ip_address_id, log_type, created_at)
+                VALUES (
+                    %(client_ip_address_id)s,
+                    %(log_type)s,
+                    %(created_at)s
+                );
+                """,
+                [cls.clean_data(data) for data in data_list]
+            )
+        return db.bulk_insert(
+            """
+            INSERT INTO security_logs (client_ip_address_id, log_type)
+            VALUES (
+                %(client_ip_address_id)s,
+                %(log_type)s
+            );
+            """,
+            [cls.clean_data(data) for data in data_list]
+        )
+
+    @classmethod
+    @identity_mapped('security_logs')
     def get_by_id(cls, id: int) -> Any or None:
         db = get_database()
         items = db.execute_query(
@@ -90,7 +128,7 @@ class SecurityLog:
     @classmethod
     def get_by_client_ip_address_id(cls, client_ip_address_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM security_logs
             WHERE
@@ -98,15 +136,12 @@ class SecurityLog:
             """,
             {'client_ip_address_id': client_ip_address_id, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_client_ip_address_id_and_log_type(cls, client_ip_address_id: int, log_type: str, *args, **kwargs):
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM security_logs
             WHERE
@@ -120,17 +155,14 @@ class SecurityLog:
                 }
             )
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_client_ip_address_id_and_log_type_after_created_at(
             cls, client_ip_address_id: int, log_type: str, created_at: datetime.datetime, *args, **kwargs
     ):
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM security_logs
             WHERE
@@ -146,15 +178,71 @@ class SecurityLog:
                 }
             )
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
-    def get_by_log_type(cls, log_type: str, *args, **kwargs):
+    def count_by_ip_address_and_log_type_after_created_at(
+            cls, ip_address: str, log_type: str, created_at: datetime.datetime, *args, **kwargs
+    ) -> int:
+        """
+        Count the logs instead of loading them. Only reads the indexes on client_ip_addresses (ip_hash) and
+        security_logs (client_ip_address_id, log_type, created_at).
+        """
         db = get_database()
         items = db.execute_query(
+            """
+            SELECT COUNT(*) AS num_logs FROM security_logs
+            JOIN client_ip_addresses ON client_ip_addresses.id = security_logs.client_ip_address_id
+            WHERE
+                client_ip_addresses.ip_hash = %(ip_hash)s AND
+                security_logs.log_type = %(log_type)s AND
+                security_logs.created_at >= %(created_at)s;
+            """,
+            cls.clean_data(
+                {
+                    'ip_hash': client_ip_address.ClientIPAddress.get_hashed_ip(ip_address),
+                    'log_type': log_type,
+                    'created_at': created_at,
+                }
+            )
+        )
+        return int(items[0]['num_logs'])
+
+    @classmethod
+    def get_created_at_by_ip_address_and_log_type_after_created_at(
+            cls, ip_address: str, log_type: str, created_at: datetime.datetime, limit: int, *args, **kwargs
+    ) -> List[datetime.datetime]:
+        """
+        :return: The creation times of the most recent logs, newest first. Reads the same indexes as the count.
+        """
+        db = get_database()
+        items = db.execute_query(
+            """
+            SELECT security_logs.created_at FROM security_logs
+            JOIN client_ip_addresses ON client_ip_addresses.id = security_logs.client_ip_address_id
+            WHERE
+                client_ip_addresses.ip_hash = %(ip_hash)s AND
+                security_logs.log_type = %(log_type)s AND
+                security_logs.created_at >= %(created_at)s
+            ORDER BY
+                security_logs.created_at DESC
+            LIMIT %(limit)s;
+            """,
+            cls.clean_data(
+                {
+                    'ip_hash': client_ip_address.ClientIPAddress.get_hashed_ip(ip_address),
+                    'log_type': log_type,
+                    'created_at': created_at,
+                    'limit': limit,
+                }
+            )
+        )
+        return [item['created_at'] for item in items]
+
+    @classmethod
+    def get_by_log_type(cls, log_type: str, *args, **kwargs):
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM security_logs
             WHERE
@@ -166,10 +254,29 @@ class SecurityLog:
                 }
             )
         )
-        result = []
+        return hydrate_rows(cls, columns, rows)
+
+    @classmethod
+    def iter_by_log_type(cls, log_type: str, chunk_size: int = 1000, *args, **kwargs) -> Iterator[Any]:
+        """
+        Same as get_by_log_type(), but streams the records instead of loading them all into memory at once.
+        """
+        db = get_database()
+        items = db.iter_query(
+            """
+            SELECT * FROM security_logs
+            WHERE
+                log_type = %(log_type)s;
+            """,
+            cls.clean_data(
+                {
+                    'log_type': log_type,
+                }
+            ),
+            chunk_size=chunk_size
+        )
         for item in items:
-            result.append(cls(item))
-        return result
+            yield cls(item)
 
     @classmethod
     def delete_by_id(cls, id: int):
@@ -180,3 +287,57 @@ class SecurityLog:
             """,
             {'id': id, }
         )
+
+    @classmethod
+    def archive_before(cls, created_at: datetime.datetime, batch_size: int = 5000, archive: bool = True) -> int:
+        """
+        Move every log created before created_at into security_logs_archive (or just delete them, if archive is
+        False). Rows are moved in ranges of batch_size IDs, so that no statement locks much of the table at once.
+        Each range is copied before it is deleted, and copying skips rows that are already archived, so a run that
+        was interrupted can simply be repeated.
+
+        :return: The number of logs removed from security_logs.
+        """
+        db = get_database()
+        bounds = db.execute_query(
+            """
+            SELECT MIN(id) AS min_id, MAX(id) AS max_id FROM security_logs WHERE created_at < %(created_at)s;
+            """,
+            {'created_at': created_at, }
+        )[0]
+        if bounds['min_id'] is None:
+            return 0
+
+        num_removed = 0
+        for start_id in range(bounds['min_id'], bounds['max_id'] + 1, batch_size):
+            batch_args = {'created_at': created_at, 'start_id': start_id, 'end_id': start_id + batch_size - 1, }
+            if archive:
+                db.execute_query(
+                    """
+                    INSERT INTO security_logs_archive
+                        (id, created_at, updated_at, client_ip_address_id, ip_hash, log_type)
+                    SELECT
+                        security_logs.id, security_logs.created_at, security_logs.updated_at,
+                        security_logs.client_ip_address_id, client_ip_addresses.ip_hash, security_logs.log_type
+                    FROM security_logs
+                    JOIN client_ip_addresses ON client_ip_addresses.id = security_logs.client_ip_address_id
+                    WHERE
+                        security_logs.id BETWEEN %(start_id)s AND %(end_id)s AND
+                        security_logs.created_at < %(created_at)s AND
+                        NOT EXISTS (
+                            SELECT 1 FROM security_logs_archive WHERE security_logs_archive.id = security_logs.id
+                        );
+                    """,
+                    batch_args
+                )
+            num_removed += db.execute_many(  # Unlike execute_query(), reports the number of deleted rows.
+                """
+                DELETE FROM security_logs
+                WHERE
+                    id BETWEEN %(start_id)s AND %(end_id)s AND
+                    created_at < %(created_at)s;
+                """,
+                [batch_args]
+            )
+        db.invalidate_cache('security_logs')
+        return num_removed
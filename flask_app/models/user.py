@@ -5,12 +5,19 @@ import validators
 from flask import flash
 
 from flask_app import bcrypt
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import event, user_is_attendee, verified_email
-from flask_app.utils.database import get_database
+from flask_app.utils.database import get_database, identity_mapped, identity_mapped_many
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 from flask_app.utils.passwords import bcrypt_password_if_not
 
 
 class User:
+    __slots__ = (
+        'id', 'created_at', 'updated_at', 'first_name', 'last_name', 'email', 'password',
+        '__created_events', '__attending_events', '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.id = data['id']
         self.created_at = data['created_at']
@@ -22,7 +29,11 @@ class User:
 
         self.__created_events = None
         self.__attending_events = None
-        self.__email_verification = None
+
+    __email_verification = LazyRelation(
+        lambda u: u.id,
+        lambda user_ids: index_by(verified_email.VerifiedEmail.get_by_user_ids(user_ids), 'user_id')
+    )
 
     def __str__(self) -> str:
         result = "{} ({}): ".format(self.id, self.created_at).ljust(30)
@@ -52,8 +63,6 @@ class User:
         return self.__attending_events
 
     def get_email_verification(self) -> Any:
-        if self.__email_verification is None:
-            self.__email_verification = verified_email.VerifiedEmail.get_by_user_id(self.id)
         return self.__email_verification
 
     def is_attending_event_with_id(self, event_id: int) -> bool:
@@ -220,6 +229,7 @@ class User:
             """,
             data
         )
+        db.invalidate_cache('users', inserted=True)
 
         # Verify new email address.
         try:
@@ -231,19 +241,35 @@ class User:
         return user_id
 
     @classmethod
+    @identity_mapped('users')
     def get_by_id(cls, id: int, *args, **kwargs) -> Any or None:
         db = get_database()
-        items = db.execute_query(
+        items = db.execute_cached_query(
             """
             SELECT * FROM users WHERE id = %(id)s LIMIT 1;
             """,
-            {'id': id}
+            {'id': id},
+            table='users'
         )
         if len(items) > 0:
             return cls(items[0])
         else:
             return None
 
+    @classmethod
+    @identity_mapped_many('users')
+    def get_by_ids(cls, ids: list, *args, **kwargs) -> list:
+        if len(ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM users WHERE id IN %(ids)s;
+            """,
+            {'ids': list(ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     @classmethod
     def get_by_email(cls, email: str, *args, **kwargs) -> Any or None:
         db = get_database()
@@ -275,35 +301,29 @@ class User:
     @classmethod
     def get_by_first_name(cls, first_name: str, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM users WHERE first_name = %(first_name)s;
             """,
             {'first_name': first_name, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_last_name(cls, last_name: str, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM users WHERE last_name = %(last_name)s;
             """,
             {'last_name': last_name, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_full_name(cls, first_name: str, last_name: str, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM users WHERE
                 first_name = %(first_name)s AND 
@@ -314,10 +334,7 @@ class User:
                 'last_name': last_name,
             }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_record_count(cls) -> int:
@@ -347,6 +364,7 @@ class User:
             """,
             data
         )
+        db.invalidate_cache('users', ids=[self.id])
 
     @classmethod
     def delete_by_id(cls, id: int, *args, **kwargs):
@@ -360,3 +378,7 @@ class User:
             """,
             {'id': id, }
         )
+        db.invalidate_cache('users', ids=[id])
+        # The user's comments and password resets are deleted along with it (ON DELETE CASCADE).
+        db.invalidate_cache('event_comments')
+        db.invalidate_cache('password_resets')
@@ -1,30 +1,33 @@
-from typing import Any
+from typing import Any, List
 
 from flask import flash
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import user, event
 from flask_app.models.exception import SiteException
 from flask_app.utils.database import get_database
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class UserCreatesEvent:
+    __slots__ = (
+        'user_id', 'event_id', 'created_at', 'updated_at',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.user_id = data['user_id']
         self.event_id = data['event_id']
         self.created_at = data['created_at']
         self.updated_at = data['updated_at']
 
-        self.__user = None
-        self.__event = None
+    __user = LazyRelation(lambda x: x.user_id, lambda user_ids: index_by(user.User.get_by_ids(user_ids), 'id'))
+    __event = LazyRelation(lambda x: x.event_id, lambda event_ids: index_by(event.Event.get_by_ids(event_ids), 'id'))
 
     def get_user(self):
-        if self.__user is None:
-            self.__user = user.User.get_by_id(self.user_id)
         return self.__user
 
     def get_event(self):
-        if self.__event is None:
-            self.__event = event.Event.get_by_id(self.event_id)
         return self.__event
 
     @classmethod
@@ -43,14 +46,14 @@ class UserCreatesEvent:
                 "The user with the id = {} does not exist in the database. "
                 "Cannot create new user_creates_events record.".format(data['user_id'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
         if not ignore_missing_event:
             if 'event_id' not in data:
                 ex = Exception(
                     "The 'event_id' field was not provided during the validation for user_creates_event."
                 )
-                SiteException.create(type=str(type(ex)), message=str(ex))
+                SiteException.record(ex)
                 is_valid = False
                 return is_valid
             if event.Event.get_by_id(data['event_id']) is None:
@@ -58,7 +61,7 @@ class UserCreatesEvent:
                     "The event with the id = {} does not exist in the database. "
                     "Cannot create new user_creates_events record.".format(data['event_id'])
                 )
-                SiteException.create(type=str(type(ex)), message=str(ex))
+                SiteException.record(ex)
                 is_valid = False
 
         return is_valid
@@ -76,19 +79,33 @@ class UserCreatesEvent:
             data
         )
 
+    @classmethod
+    def create_many(cls, data_list: List[dict]) -> int:
+        """
+        :param data_list: One dictionary per new record, each with a 'user_id' and an 'event_id'.
+        :return: The number of records created. This table has no ID column.
+        """
+        db = get_database()
+        return db.execute_many(
+            """
+            INSERT INTO user_creates_event (user_id, event_id)
+            VALUES (
+                %(user_id)s, %(event_id)s
+            );
+            """,
+            data_list
+        )
+
     @classmethod
     def get_by_user_id(cls, user_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM user_creates_event WHERE user_id = %(user_id)s;
             """,
             {'user_id': user_id, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_event_id(cls, event_id: int, *args, **kwargs) -> Any or None:
@@ -108,6 +125,19 @@ class UserCreatesEvent:
         else:
             return None
 
+    @classmethod
+    def get_by_event_ids(cls, event_ids: list, *args, **kwargs) -> list:
+        if len(event_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM user_creates_event WHERE event_id IN %(event_ids)s;
+            """,
+            {'event_ids': list(event_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     @classmethod
     def get_by_user_id_and_event_id(cls, user_id: int, event_id: int, *args, **kwargs) -> Any or None:
         db = get_database()
@@ -2,30 +2,34 @@ from typing import Any
 
 from flask import flash
 
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import user, attendee
 from flask_app.models.exception import SiteException
 from flask_app.utils.database import get_database
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class UserIsAttendee:
+    __slots__ = (
+        'user_id', 'attendee_id', 'created_at', 'updated_at',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.user_id = data['user_id']
         self.attendee_id = data['attendee_id']
         self.created_at = data['created_at']
         self.updated_at = data['updated_at']
 
-        self.__user = None
-        self.__attendee = None
-        self.__event = None
+    __user = LazyRelation(lambda x: x.user_id, lambda user_ids: index_by(user.User.get_by_ids(user_ids), 'id'))
+    __attendee = LazyRelation(
+        lambda x: x.attendee_id, lambda attendee_ids: index_by(attendee.Attendee.get_by_ids(attendee_ids), 'id')
+    )
 
     def get_user(self):
-        if self.__user is None:
-            self.__user = user.User.get_by_id(self.user_id)
         return self.__user
 
     def get_attendee(self):
-        if self.__attendee is None:
-            self.__attendee = attendee.Attendee.get_by_id(self.attendee_id)
         return self.__attendee
 
     """def get_event(self):
@@ -52,14 +56,14 @@ class UserIsAttendee:
                 "The user with the id = {} does not exist in the database. "
                 "Cannot create new user_is_attendee record.".format(data['user_id'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
         if attendee.Attendee.get_by_id(data['attendee_id']) is None:
             ex = Exception(
                 "The attendee with the id = {} does not exist in the database. "
                 "Cannot create new user_is_attendee record.".format(data['attendee_id'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
 
         return is_valid
@@ -81,16 +85,13 @@ class UserIsAttendee:
     @classmethod
     def get_by_user_id(cls, user_id: int, *args, **kwargs) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM user_is_attendee WHERE user_id = %(user_id)s;
             """,
             {'user_id': user_id, }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     @classmethod
     def get_by_attendee_id(cls, attendee_id: int, *args, **kwargs) -> Any or None:
@@ -106,6 +107,19 @@ class UserIsAttendee:
         else:
             return None
 
+    @classmethod
+    def get_by_attendee_ids(cls, attendee_ids: list, *args, **kwargs) -> list:
+        if len(attendee_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM user_is_attendee WHERE attendee_id IN %(attendee_ids)s;
+            """,
+            {'attendee_ids': list(attendee_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     @classmethod
     def delete_by_user_id_and_attendee_id(cls, user_id: int, attendee_id: int, *args, **kwargs):
         db = get_database()
@@ -1,18 +1,25 @@
 import datetime
 import secrets
-from typing import Any
+from typing import Any, Iterator
 
 import validators.email
 from flask import flash, render_template
 
 from flask_app import get_domain_address
+from flask_app.config.row_hydration import hydrate_rows
 from flask_app.models import user
 from flask_app.models.exception import SiteException
 from flask_app.utils.database import get_database
 from flask_app.utils.email_utils import send_email
+from flask_app.utils.lazy_relations import LazyRelation, index_by
 
 
 class VerifiedEmail:
+    __slots__ = (
+        'user_id', 'created_at', 'updated_at', 'new_email', 'email_sent', 'verified', 'verification_code',
+        '_lazy_values', '_siblings',
+    )
+
     def __init__(self, data: dict):
         self.user_id = data['user_id']
         self.created_at = data['created_at']
@@ -22,7 +29,7 @@ class VerifiedEmail:
         self.verified = data['verified']
         self.verification_code = data['verification_code']
 
-        self.__user = None
+    __user = LazyRelation(lambda x: x.user_id, lambda user_ids: index_by(user.User.get_by_ids(user_ids), 'id'))
 
     def to_dict(self) -> dict:
         return {
@@ -36,8 +43,6 @@ class VerifiedEmail:
         }
 
     def get_user(self):
-        if self.__user is None:
-            self.__user = user.User.get_by_id(self.user_id)
         return self.__user
 
     @classmethod
@@ -57,7 +62,7 @@ class VerifiedEmail:
                 "The user with the ID number of {} does not exist in the database. "
                 "Cannot validate a new VerifiedEmail record.".format(data['user_id'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
         if not validators.email(data['new_email']):
             flash("The provided email address is invalid.")
@@ -66,13 +71,13 @@ class VerifiedEmail:
             ex = Exception(
                 "The 'email_sent' boolean was not as an expected value: {}".format(data['email_sent'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
         if data['verified'] not in (True, False, "1", "0", 1, 0):
             ex = Exception(
                 "The 'verified' boolean was not as an expected value: {}".format(data['verified'])
             )
-            SiteException.create(type=str(type(ex)), message=str(ex))
+            SiteException.record(ex)
             is_valid = False
 
         return is_valid
@@ -140,24 +145,50 @@ class VerifiedEmail:
         else:
             return None
 
+    @classmethod
+    def get_by_user_ids(cls, user_ids: list, *args, **kwargs) -> list:
+        if len(user_ids) == 0:
+            return []
+        db = get_database()
+        columns, rows = db.execute_query_tuples(
+            """
+            SELECT * FROM verified_emails WHERE user_id IN %(user_ids)s;
+            """,
+            {'user_ids': list(user_ids), }
+        )
+        return hydrate_rows(cls, columns, rows)
+
     @classmethod
     def get_unverified_records(cls) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM verified_emails WHERE verified = %(verified)s;
             """,
             {'verified': False, }
         )
-        result = []
+        return hydrate_rows(cls, columns, rows)
+
+    @classmethod
+    def iter_unverified_records(cls, chunk_size: int = 1000) -> Iterator[Any]:
+        """
+        Same as get_unverified_records(), but streams the records instead of loading them all into memory at once.
+        """
+        db = get_database()
+        items = db.iter_query(
+            """
+            SELECT * FROM verified_emails WHERE verified = %(verified)s;
+            """,
+            {'verified': False, },
+            chunk_size=chunk_size
+        )
         for item in items:
-            result.append(cls(item))
-        return result
+            yield cls(item)
 
     @classmethod
     def get_expired_records(cls) -> list:
         db = get_database()
-        items = db.execute_query(
+        columns, rows = db.execute_query_tuples(
             """
             SELECT * FROM verified_emails
             WHERE
@@ -170,10 +201,7 @@ class VerifiedEmail:
                 'max_creation_date': datetime.datetime.now() - datetime.timedelta(days=7)
             }
         )
-        result = []
-        for item in items:
-            result.append(cls(item))
-        return result
+        return hydrate_rows(cls, columns, rows)
 
     def update(self):
         db = get_database()
@@ -220,7 +248,7 @@ class VerifiedEmail:
             }
             if not cls.validate_new_record(new_data):
                 ex = Exception("Could not validate new record for VerifiedEmail: {}".format(new_data))
-                SiteException.create(type=str(type(ex)), message=str(ex))
+                SiteException.record(ex)
                 raise ex
             cls.create(new_data)
             found_verification = cls.get_by_user_id(found_user.id)
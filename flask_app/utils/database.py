@@ -1,12 +1,159 @@
-from flask_app import get_db_connection_settings
+import functools
+import time
+from typing import Any, Callable
+
+from flask import g, has_request_context, session
+
+from flask_app import (
+    app, get_db_connection_settings, get_db_pool_settings, get_db_instrumentation_settings, get_db_retry_settings,
+    get_query_cache_settings
+)
+from flask_app.config.database_backends import DatabaseBackend, create_backend
+from flask_app.config.database_session import DatabaseSession
 from flask_app.config.sqldatabase import SQLDatabase
 
 
 def get_database() -> SQLDatabase:
+    """
+    Inside a request, every statement shares the request's connection and transaction. The transaction is committed
+    once the response is ready, or rolled back if the request fails. Outside a request (maintenance scripts, etc.),
+    each statement is committed on its own.
+    """
+    return _create_database(session=get_request_session())
+
+
+_backends = dict()
+
+
+def get_database_backend() -> DatabaseBackend:
+    # One backend per configuration, since the SQLite backend owns its in-memory database.
+    connection_settings = get_db_connection_settings()
+    backend_key = (connection_settings['backend'], connection_settings['sqlite_path'])
+    if backend_key not in _backends:
+        _backends[backend_key] = create_backend(connection_settings)
+    return _backends[backend_key]
+
+
+def _create_database(session: DatabaseSession or None) -> SQLDatabase:
     connection_settings = get_db_connection_settings()
     return SQLDatabase(
         db_name=connection_settings['db_name'],
         host=connection_settings['host'],
         user=connection_settings['user'],
-        password=connection_settings['password']
+        password=connection_settings['password'],
+        pool_settings=get_db_pool_settings(),
+        session=session,
+        instrumentation_settings=get_db_instrumentation_settings(),
+        replicas=connection_settings.get('replicas', []),
+        retry_settings=get_db_retry_settings(),
+        backend=get_database_backend(),
+        cache_settings=get_query_cache_settings()
     )
+
+
+def get_request_session() -> DatabaseSession or None:
+    if not has_request_context():
+        return None
+    if 'database_session' not in g:
+        g.database_session = _create_database(session=None).open_session()
+
+        # A client that wrote something moments ago should see it, even if the replicas have not caught up yet.
+        written_at = session.get('database_written_at')
+        read_after_write_sec = get_db_pool_settings()['read_after_write_sec']
+        if written_at is not None and time.time() - written_at < read_after_write_sec:
+            g.database_session.set_read_from_primary()
+    return g.database_session
+
+
+def identity_mapped(table: str) -> Callable:
+    """
+    For a model's classmethod that loads one row by its primary key, placed under @classmethod. Inside a request, the
+    row is then loaded at most once, and every lookup returns the same object until the row is written (see
+    SQLDatabase.invalidate_cache()).
+
+    :param table: The table the row comes from, as passed to SQLDatabase.invalidate_cache().
+    """
+    def decorator(get_by_key: Callable) -> Callable:
+        @functools.wraps(get_by_key)
+        def wrapper(cls: type, key: Any, *args, **kwargs) -> Any or None:
+            db_session = get_request_session()
+            if db_session is None:
+                return get_by_key(cls, key, *args, **kwargs)
+            identity_map = db_session.get_identity_map()
+            found, model = identity_map.get(table, key)
+            if not found:
+                model = get_by_key(cls, key, *args, **kwargs)
+                identity_map.add(table, key, model)
+            return model
+        return wrapper
+    return decorator
+
+
+def identity_mapped_many(table: str, key_attribute: str = 'id') -> Callable:
+    """
+    Like identity_mapped(), for a classmethod that loads a list of rows by a list of primary keys. Only the rows that
+    are not in the identity map yet are loaded.
+
+    :param key_attribute: The model attribute that holds the primary key.
+    """
+    def decorator(get_by_keys: Callable) -> Callable:
+        @functools.wraps(get_by_keys)
+        def wrapper(cls: type, keys: list, *args, **kwargs) -> list:
+            db_session = get_request_session()
+            if db_session is None:
+                return get_by_keys(cls, keys, *args, **kwargs)
+            identity_map = db_session.get_identity_map()
+
+            result, missing_keys = [], []
+            for key in keys:
+                found, model = identity_map.get(table, key)
+                if not found:
+                    missing_keys.append(key)
+                elif model is not None:
+                    result.append(model)
+
+            loaded = get_by_keys(cls, missing_keys, *args, **kwargs)
+            for model in loaded:
+                identity_map.add(table, getattr(model, key_attribute), model)
+            for key in missing_keys:
+                if not identity_map.get(table, key)[0]:
+                    identity_map.add(table, key, None)  # Not found.
+            return result + loaded
+        return wrapper
+    return decorator
+
+
+def rollback_request_session() -> None:
+    """
+    Discard everything the current request has written so far. Statements executed afterwards start a new
+    transaction, which is still committed when the response is ready.
+    """
+    if has_request_context() and 'database_session' in g:
+        g.database_session.rollback()
+
+
+@app.after_request
+def commit_request_session(response):
+    # Commit here rather than on teardown so that a failed commit is still handled by the error handlers.
+    if 'database_session' in g:
+        has_written = g.database_session.has_written()  # Reset by the commit.
+        g.database_session.commit()
+        if has_written and len(get_db_connection_settings().get('replicas', [])) > 0:
+            session['database_written_at'] = time.time()
+
+        # Let browser dev tools and load tests see how many queries each page needs.
+        totals = g.database_session.get_query_totals()
+        response.headers.add(
+            'Server-Timing', 'db;dur={:.1f};desc="{} queries, {:.1f} ms waiting for a connection"'.format(
+                totals['execute_ms'], totals['count'], totals['wait_ms']
+            )
+        )
+    return response
+
+
+@app.teardown_request
+def close_request_session(ex: Exception or None) -> None:
+    # Anything still uncommitted at this point belongs to a request that did not finish normally.
+    session = g.pop('database_session', None)
+    if session is not None:
+        session.rollback()
@@ -0,0 +1,94 @@
+import itertools
+import threading
+
+from flask import render_template, session
+from werkzeug.exceptions import default_exceptions
+
+from flask_app import app, get_error_page_settings
+
+# Messages for errors that aren't HTTPExceptions, or whose default description doesn't suit the site.
+ERROR_MESSAGES = {
+    500: "The server encountered an internal error and was unable to complete your request. "
+         "Either the server is overloaded or there is an error in the application.",
+    503: "The site is temporarily unavailable. Please try again in a few moments.",
+}
+
+_error_pages = dict()  # (error_num, message, dark_theme, logged_in, accepted_cookies, alert) -> page.
+_error_pages_lock = threading.Lock()
+_stats = {'hits': 0, 'renders': 0, }
+
+
+def get_error_message(error_num: int) -> str:
+    if error_num in ERROR_MESSAGES:
+        return ERROR_MESSAGES[error_num]
+    return default_exceptions[error_num].description
+
+
+def prerender_error_pages() -> int:
+    """
+    Render the error page for every code in get_error_page_settings()['prerendered_codes'], with each theme, login
+    state and cookie consent, so that error responses don't need Jinja. Meant to run once at startup.
+
+    :return: The number of pages rendered.
+    """
+    pages = dict()
+    for error_num in get_error_page_settings()['prerendered_codes']:
+        message = get_error_message(error_num)
+        for dark_theme, logged_in, accepted_cookies in itertools.product((False, True), repeat=3):
+            key = (error_num, message, dark_theme, logged_in, accepted_cookies, None)
+            pages[key] = _render_error_page(*key)
+    with _error_pages_lock:
+        _error_pages.update(pages)
+    return len(pages)
+
+
+def get_error_page(error_num: int, message: str) -> bytes:
+    """
+    The error page for the current request's session, from the cache if it was rendered before. Like the template
+    does, shows and removes the session's alert, if any.
+    """
+    alert = session.pop('alert', None)
+    if alert is not None:
+        # Sessions store the alert's paragraphs as a list. Tuples can be part of the key.
+        alert = (alert[0], tuple(alert[1]))
+    key = (
+        error_num, message, 'dark_theme' in session, 'user_id' in session, 'accepted_cookies' in session, alert,
+    )
+    page = _error_pages.get(key)
+    if page is not None:
+        _stats['hits'] += 1  # Not locked, so it may miss a few hits under load.
+        return page
+
+    page = _render_error_page(*key)
+    with _error_pages_lock:
+        _stats['renders'] += 1
+        # Messages and alerts can come from anywhere, so only a limited number of pages are kept.
+        if len(_error_pages) < get_error_page_settings()['max_pages']:
+            _error_pages[key] = page
+    return page
+
+
+def get_error_page_stats() -> dict:
+    with _error_pages_lock:
+        return {
+            'pages': len(_error_pages),
+            'hits': _stats['hits'],
+            'renders': _stats['renders'],
+        }
+
+
+def _render_error_page(
+        error_num: int, message: str, dark_theme: bool, logged_in: bool, accepted_cookies: bool, alert: tuple or None
+) -> bytes:
+    # Rendered in a request of its own, so that the page only depends on the key's session values. The page shows
+    # nothing about the user beyond whether they are logged in.
+    with app.test_request_context('/'):
+        if dark_theme:
+            session['dark_theme'] = True
+        if logged_in:
+            session['user_id'] = 0
+        if accepted_cookies:
+            session['accepted_cookies'] = True
+        if alert is not None:
+            session['alert'] = alert
+        return render_template('exception_page.html', error_num=error_num, message=message).encode('utf-8')
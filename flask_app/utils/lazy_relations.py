@@ -0,0 +1,99 @@
+from typing import Any, Callable, Dict, Iterable, List
+
+
+class LazyRelation:
+    """
+    A model attribute that is loaded the first time it is read. Reading it on one object also loads it for every
+    sibling that hasn't loaded it yet, with one batched call. Siblings are the objects built from the same query
+    result by hydrate_rows(), so a template looping over attendees or comments needs one query per relation instead of
+    one per object.
+
+    Models that use it need the slots '_lazy_values' and '_siblings'. For example:
+
+        __author_user = LazyRelation(lambda e: e.id, lambda event_ids: Event.__load_author_users(event_ids))
+
+        def get_author_user(self):
+            return self.__author_user
+    """
+
+    def __init__(
+            self, get_key: Callable[[Any], Any], load_many: Callable[[List[Any]], Dict[Any, Any]],
+            default: Callable[[], Any] = lambda: None, batch_size: int = 1000
+    ):
+        """
+        :param get_key:
+            Returns the value that a model's relation is looked up by, e.g. lambda event: event.id.
+        :param load_many:
+            Takes a list of distinct keys and returns a dictionary of key -> value. Keys that are missing from the
+            dictionary get default().
+        :param batch_size:
+            The most keys passed to one load_many() call.
+        """
+        self.__get_key = get_key
+        self.__load_many = load_many
+        self.__default = default
+        self.__batch_size = batch_size
+        self.__name = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.__name = name
+
+    def __get__(self, model: Any, owner: type = None) -> Any:
+        if model is None:
+            return self  # Accessed through the class, e.g. to call load().
+        values = self.__get_values(model)
+        if self.__name not in values:
+            siblings = getattr(model, '_siblings', None) or [model]
+            self.load([sibling for sibling in siblings if not self.is_loaded(sibling)])
+        return values[self.__name]
+
+    def __set__(self, model: Any, value: Any) -> None:
+        self.__get_values(model)[self.__name] = value
+
+    def __delete__(self, model: Any) -> None:
+        # Forget the value, so that it is loaded again on the next read.
+        self.__get_values(model).pop(self.__name, None)
+
+    def is_loaded(self, model: Any) -> bool:
+        return self.__name in self.__get_values(model)
+
+    def load(self, models: Iterable[Any]) -> None:
+        """
+        Load the relation for every model in the list, even ones that have already loaded it.
+        """
+        models = list(models)
+        keys = list(dict.fromkeys(self.__get_key(model) for model in models))  # Distinct, in order.
+        values = dict()
+        for start in range(0, len(keys), self.__batch_size):
+            values.update(self.__load_many(keys[start:start + self.__batch_size]))
+        for model in models:
+            key = self.__get_key(model)
+            self.__get_values(model)[self.__name] = values[key] if key in values else self.__default()
+
+    @staticmethod
+    def __get_values(model: Any) -> dict:
+        try:
+            return model._lazy_values
+        except AttributeError:
+            model._lazy_values = dict()
+            return model._lazy_values
+
+
+def index_by(models: Iterable[Any], attribute: str) -> dict:
+    """
+    :return: A dictionary of getattr(model, attribute) -> model. For load_many functions of to-one relations.
+    """
+    return {getattr(model, attribute): model for model in models}
+
+
+def group_by(models: Iterable[Any], attribute: str, sort_key: Callable[[Any], Any] = None) -> dict:
+    """
+    :return: A dictionary of getattr(model, attribute) -> list of models. For load_many functions of to-many relations.
+    """
+    groups = dict()
+    for model in models:
+        groups.setdefault(getattr(model, attribute), []).append(model)
+    if sort_key is not None:
+        for group in groups.values():
+            group.sort(key=sort_key)
+    return groups
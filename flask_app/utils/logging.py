@@ -1,14 +1,79 @@
+import contextlib
+import datetime
+import threading
+from typing import Iterator, List
+
+from flask_app import get_security_log_writer_settings
+from flask_app.config.batch_writer import BatchWriter
 from flask_app.models.client_ip_address import ClientIPAddress
 from flask_app.models.security_log import SecurityLog
 
 
 def log_security_issue(client_ip: str, log_type: str):
     # Log failed logins.
-    client_ip_address = ClientIPAddress.get_by_ip_address(client_ip)
-    if client_ip_address is None:
-        client_ip_address = ClientIPAddress.get_by_id(ClientIPAddress.create(client_ip))
     new_data = {
-        'client_ip_address_id': client_ip_address.id,
+        'client_ip': client_ip,
         'log_type': log_type,
+        'created_at': datetime.datetime.now(),
     }
-    SecurityLog.create(new_data)
+    writer = get_security_log_writer()
+    if writer is None:
+        write_security_logs([new_data])
+    else:
+        # Until the batch is written, RateLimiter counts the log through hold_pending_security_logs().
+        writer.add(new_data)
+
+
+@contextlib.contextmanager
+def hold_pending_security_logs(client_ip: str, log_type: str) -> Iterator[List[datetime.datetime]]:
+    """
+    Yield when the client's logs of this type that aren't in the database yet were made. Until the block ends, none
+    of them are written, so they can be added to what is read from the database without being counted twice.
+    """
+    writer = get_security_log_writer()
+    if writer is None:
+        yield []
+        return
+    log_type = log_type.upper()  # As stored by SecurityLog.
+    with writer.hold_pending(
+            lambda data: data['client_ip'] == client_ip and data['log_type'].upper() == log_type
+    ) as pending:
+        yield [data['created_at'] for data in pending]
+
+
+def write_security_logs(data_list: List[dict]) -> None:
+    """
+    :param data_list: Dictionaries of 'client_ip', 'log_type' and 'created_at'.
+    """
+    client_ip_address_ids = dict()
+    for data in data_list:
+        if data['client_ip'] not in client_ip_address_ids:
+            client_ip_address_ids[data['client_ip']] = ClientIPAddress.get_or_create(data['client_ip'])
+    SecurityLog.create_many([
+        {
+            'client_ip_address_id': client_ip_address_ids[data['client_ip']],
+            'log_type': data['log_type'],
+            'created_at': data['created_at'],
+        }
+        for data in data_list
+    ])
+
+
+_security_log_writer = None
+_security_log_writer_lock = threading.Lock()
+
+
+def get_security_log_writer() -> BatchWriter or None:
+    global _security_log_writer
+    settings = get_security_log_writer_settings()
+    if _security_log_writer is None and settings['enabled']:
+        # Only one writer, so that there is only one background thread and every log reaches it.
+        with _security_log_writer_lock:
+            if _security_log_writer is None:
+                _security_log_writer = BatchWriter(
+                    'security-log-writer', write_security_logs,
+                    max_batch_size=settings['max_batch_size'],
+                    flush_interval_sec=settings['flush_interval_sec'],
+                    max_buffered=settings['max_buffered'],
+                )
+    return _security_log_writer
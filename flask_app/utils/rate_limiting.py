@@ -0,0 +1,113 @@
+import datetime
+import threading
+
+from flask_app import SECURITY_SETTINGS, get_rate_limit_settings
+from flask_app.config.shared_counters import SharedWindowCounter
+from flask_app.config.sliding_window import SlidingWindowCounter
+from flask_app.models.security_log import SecurityLog
+from flask_app.utils.logging import hold_pending_security_logs, log_security_issue
+
+
+class RateLimiter:
+    """
+    Counts each client's recent security logs (failed logins, URL guesses, etc.) to decide whether to block them.
+
+    hit() writes a SecurityLog record, as before, and also counts it in memory. count() answers from memory once a
+    client's recent logs have been loaded, which takes one index-only query the first time the counter sees the
+    client and log type. With a SharedWindowCounter every worker on the machine sees the same counts. With a
+    SlidingWindowCounter, other workers' logs are only seen when a client is loaded, so a client may get a few more
+    attempts than the limit.
+
+    Logs still waiting in this worker's security log writer are added to whatever is read from the database, so
+    hits count straight away even before they are written.
+    """
+
+    def __init__(self, counter: SlidingWindowCounter or SharedWindowCounter or None, max_count: int = 100):
+        """
+        :param counter: Where recent logs are counted, or None to run a COUNT query for every check.
+        :param max_count: The most logs loaded per client and log type.
+        """
+        self.__counter = counter
+        self.__max_count = max_count
+
+    def hit(self, client_ip: str, log_type: str) -> None:
+        log_security_issue(client_ip, log_type)
+        if self.__counter is not None:
+            self.__counter.add(self.__get_key(client_ip, log_type))
+
+    def count(self, client_ip: str, log_type: str, window_min: float) -> int:
+        """
+        :return: The number of hits for this client and log type within the last window_min minutes.
+        """
+        since = datetime.datetime.now() - datetime.timedelta(minutes=window_min)
+        if self.__counter is None:
+            with hold_pending_security_logs(client_ip, log_type) as pending:
+                num_hits = SecurityLog.count_by_ip_address_and_log_type_after_created_at(client_ip, log_type, since)
+            return num_hits + sum(1 for created_at in pending if created_at >= since)
+
+        key = self.__get_key(client_ip, log_type)
+        num_hits = self.__counter.count(key, window_min * 60)
+        if num_hits is None:
+            # Load everything the counter keeps, not just this window, since other checks may use longer windows.
+            max_since = datetime.datetime.now() - datetime.timedelta(minutes=get_max_window_min())
+            with hold_pending_security_logs(client_ip, log_type) as pending:
+                created_ats = SecurityLog.get_created_at_by_ip_address_and_log_type_after_created_at(
+                    client_ip, log_type, max_since, self.__max_count
+                ) + pending
+            self.__counter.seed(key, [created_at.timestamp() for created_at in created_ats])
+            num_hits = self.__counter.count(key, window_min * 60)
+        return num_hits
+
+    def clear(self) -> None:
+        """
+        Forget everything counted in memory, so that every client is loaded from the database again.
+        """
+        if self.__counter is not None:
+            self.__counter.clear()
+
+    def get_stats(self) -> dict:
+        return self.__counter.get_stats() if self.__counter is not None else dict()
+
+    @staticmethod
+    def __get_key(client_ip: str, log_type: str) -> tuple:
+        return client_ip, log_type.upper()  # SecurityLog stores log types in upper case.
+
+
+def get_max_window_min() -> float:
+    return max(SECURITY_SETTINGS.values())
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        # Only one instance, so that every request thread counts into the same counter.
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = create_rate_limiter()
+    return _rate_limiter
+
+
+def create_rate_limiter() -> RateLimiter:
+    settings = get_rate_limit_settings()
+    max_age_sec = get_max_window_min() * 60
+    if settings['counter'] == 'shared_memory':
+        counter = SharedWindowCounter(
+            # Workers with different table sizes (e.g. during a deploy) must not share a file.
+            path="{}.{}x{}".format(settings['shared_memory_path'], settings['max_clients'], settings['max_count']),
+            max_age_sec=max_age_sec,
+            max_count=settings['max_count'],
+            num_slots=settings['max_clients'],
+        )
+    elif settings['counter'] == 'process':
+        counter = SlidingWindowCounter(
+            max_age_sec=max_age_sec, max_count=settings['max_count'], max_keys=settings['max_clients']
+        )
+    elif settings['counter'] == 'database':
+        counter = None
+    else:
+        raise Exception("Unknown rate limit counter '{}'.".format(settings['counter']))
+    return RateLimiter(counter, max_count=settings['max_count'])
@@ -0,0 +1,24 @@
+import datetime
+
+from flask_app import get_retention_settings
+from flask_app.models.client_ip_address import ClientIPAddress
+from flask_app.models.security_log import SecurityLog
+
+
+def clean_security_logs() -> dict:
+    """
+    Archive the security logs that are past their retention period, then delete the client IP addresses that no
+    longer have any logs. Meant to run about once a day, e.g. from server.clean_database().
+
+    :return: The number of logs archived and IP addresses deleted.
+    """
+    settings = get_retention_settings()
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=settings['security_log_retention_days'])
+    num_logs = SecurityLog.archive_before(
+        cutoff, batch_size=settings['batch_size'], archive=settings['archive_security_logs']
+    )
+    num_ip_addresses = ClientIPAddress.delete_unused_before(cutoff, batch_size=settings['batch_size'])
+    return {
+        'security_logs': num_logs,
+        'client_ip_addresses': num_ip_addresses,
+    }
@@ -0,0 +1,72 @@
+"""
+Creates or upgrades the MySQL schema from flask_app/config/migrations/.
+
+    python migrate.py status     List the migrations, and whether each one has been applied.
+    python migrate.py upgrade    Apply every pending migration.
+    python migrate.py explain    EXPLAIN the queries in flask_app/models/ and list the ones that read a whole table.
+"""
+import argparse
+import sys
+
+from flask_app.config.schema_migrations import SchemaMigrator, explain_model_queries
+from flask_app.utils.database import get_database, get_database_backend
+
+
+def status() -> int:
+    migrator = SchemaMigrator(get_database())
+    applied_versions = migrator.get_applied_versions()
+    for migration in migrator.get_migrations():
+        state = 'applied' if migration.version in applied_versions else 'pending'
+        print("{:04d}_{:<40} {}".format(migration.version, migration.name, state))
+    return 0
+
+
+def upgrade() -> int:
+    applied = SchemaMigrator(get_database()).upgrade()
+    print("Applied {} migration(s).".format(len(applied)))
+    return 0
+
+
+def explain(show_all: bool) -> int:
+    report = explain_model_queries(get_database())
+    num_problems = 0
+    for entry in report:
+        if entry['error'] is None and len(entry['full_scans']) == 0 and not show_all:
+            continue
+        if entry['error'] is not None:
+            print("{}  ERROR: {}".format(entry['source'], entry['error']))
+        elif len(entry['full_scans']) > 0:
+            print("{}  FULL SCAN of {}".format(entry['source'], ", ".join(entry['full_scans'])))
+        else:
+            print("{}  ok".format(entry['source']))
+        print("    {}".format(entry['query']))
+        for row in entry['plan']:
+            print("    table={} type={} key={} rows={} extra={}".format(
+                row.get('table'), row.get('type'), row.get('key'), row.get('rows'), row.get('Extra')
+            ))
+        num_problems += 1 if entry['error'] is not None or len(entry['full_scans']) > 0 else 0
+    print("{} of {} queries have full scans or errors.".format(num_problems, len(report)))
+    return 1 if num_problems > 0 else 0
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Create or upgrade the database schema.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="List the migrations, and whether each one has been applied.")
+    commands.add_parser('upgrade', help="Apply every pending migration.")
+    explain_parser = commands.add_parser('explain', help="EXPLAIN the model queries and report full table scans.")
+    explain_parser.add_argument('--all', action='store_true', help="Also list the queries that use an index.")
+    args = parser.parse_args(argv)
+
+    if get_database_backend().name != 'mysql':
+        print("Migrations are only for MySQL. SQLite databases are created from flask_app/config/sqlite_schema.sql.")
+        return 1
+    if args.command == 'status':
+        return status()
+    if args.command == 'upgrade':
+        return upgrade()
+    return explain(show_all=args.all)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -3,6 +3,7 @@ from flask_app.controllers import \
     exception_handling, cookies, themes, index, register, verify_email, login, \
     account_settings, dashboard, create_events, view_events, edit_events, event_comments, \
     attendees, password_reset, server_files, donations
+from flask_app.utils import error_pages, retention
 # from flask_app.controllers import testing
 
 
@@ -28,8 +29,13 @@ def remember_imports():
     _ = donations.app
 
 
+# Render the standard error pages once, so that error responses (e.g. to bots guessing URLs) skip Jinja.
+error_pages.prerender_error_pages()
+
+
 def clean_database():
     verify_email.VerifiedEmail.delete_expired_users()  # Delete users who never verified their email.
+    retention.clean_security_logs()  # Archive old security logs, and forget IP addresses that have none left.
 
 
 if __name__ == "__main__":
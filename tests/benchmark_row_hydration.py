@@ -0,0 +1,63 @@
+"""
+Compares memory use and build time of models built from DictCursor dictionaries (the old path) against models
+built from plain tuples with hydrate_rows() (the execute_query_tuples() path).
+
+Run with: python -m tests.benchmark_row_hydration [number of rows]
+"""
+import datetime
+import sys
+import time
+import tracemalloc
+
+from flask_app.config.row_hydration import get_column_map, hydrate_rows
+from flask_app.models.security_log import SecurityLog
+
+
+class DictSecurityLog:
+    # SecurityLog without __slots__, as every model was before.
+    def __init__(self, data: dict):
+        self.id = data['id']
+        self.created_at = data['created_at']
+        self.updated_at = data['updated_at']
+        self.client_ip_address_id = data['client_ip_address_id']
+        self.log_type = data['log_type']
+
+
+COLUMNS = (('id',), ('created_at',), ('updated_at',), ('client_ip_address_id',), ('log_type',))
+
+
+def make_tuple_rows(num_rows: int) -> list:
+    now = datetime.datetime.now()
+    return [(i, now, now, i % 500, 'failed_login') for i in range(num_rows)]
+
+
+def make_dict_rows(num_rows: int) -> list:
+    names = [column[0] for column in COLUMNS]
+    return [dict(zip(names, row)) for row in make_tuple_rows(num_rows)]
+
+
+def measure(name: str, build) -> None:
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    models = build()
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    num_blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    print(
+        "{:<28} {:>8} models {:>10.1f} ms {:>10.1f} MB retained {:>10.1f} MB peak {:>10} blocks".format(
+            name, len(models), elapsed_ms, current / 1024 / 1024, peak / 1024 / 1024, num_blocks
+        )
+    )
+
+
+def main(num_rows: int) -> None:
+    # Rows are created inside measure() so that the cost of the driver's row format is counted too.
+    measure("DictCursor + plain class", lambda: [DictSecurityLog(row) for row in make_dict_rows(num_rows)])
+    measure("DictCursor + __slots__", lambda: [SecurityLog(row) for row in make_dict_rows(num_rows)])
+    measure("tuples + __slots__", lambda: hydrate_rows(SecurityLog, get_column_map(COLUMNS), make_tuple_rows(num_rows)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
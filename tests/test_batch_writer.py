@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+
+from flask_app.config.batch_writer import BatchWriter
+
+
+class TestBatchWriter(unittest.TestCase):
+    def test_records_are_written_in_batches(self):
+        batches = []
+        writer = BatchWriter('test-writer', batches.append, max_batch_size=3, flush_interval_sec=60)
+        for record in range(7):
+            self.assertTrue(writer.add(record))
+        self.assertTrue(writer.flush(timeout_sec=5))
+        self.assertEqual([record for batch in batches for record in batch], list(range(7)))
+        self.assertTrue(all(len(batch) <= 3 for batch in batches))
+        self.assertEqual(writer.get_stats()['written'], 7)
+        writer.close()
+        self.assertFalse(writer.add(8))
+
+    def test_pending_records_are_held_back_while_they_are_read(self):
+        batches = []
+        writer = BatchWriter('test-writer', batches.append, max_batch_size=10, flush_interval_sec=60)
+        for record in range(5):
+            writer.add(record)
+        with writer.hold_pending(lambda record: record % 2 == 0) as pending:
+            self.assertEqual(pending, [0, 2, 4])
+            flushed = threading.Thread(target=writer.flush, args=(5,))
+            flushed.start()
+            time.sleep(0.05)
+            self.assertEqual(batches, [])  # Nothing is written while a reader holds the records back.
+        flushed.join()
+        self.assertEqual(batches, [[0, 1, 2, 3, 4]])
+        with writer.hold_pending(lambda record: True) as pending:
+            self.assertEqual(pending, [])
+        writer.close()
+
+    def test_full_buffers_and_failed_batches_are_counted(self):
+        release = threading.Event()
+
+        def write_batch(batch: list) -> None:
+            release.wait(5)
+            raise Exception("The database is down.")
+
+        writer = BatchWriter('test-writer', write_batch, max_batch_size=1, flush_interval_sec=0, max_buffered=2)
+        results = [writer.add(record) for record in range(5)]
+        self.assertIn(False, results)
+        release.set()
+        self.assertTrue(writer.flush(timeout_sec=5))
+        stats = writer.get_stats()
+        self.assertEqual(stats['dropped'], results.count(False))
+        self.assertEqual(stats['failed'], results.count(True))
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
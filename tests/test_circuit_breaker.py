@@ -0,0 +1,43 @@
+import time
+import unittest
+
+from flask_app.config.circuit_breaker import CircuitBreaker, DatabaseUnavailableError
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_repeated_failures(self):
+        breaker = CircuitBreaker('test', failure_threshold=3, window_sec=10.0, cooldown_sec=10.0)
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record_failure()
+        with self.assertRaises(DatabaseUnavailableError):
+            breaker.before_call()
+        self.assertEqual(breaker.get_stats()['state'], CircuitBreaker.OPEN)
+
+    def test_half_open_allows_one_trial_call(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, window_sec=10.0, cooldown_sec=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        with self.assertRaises(DatabaseUnavailableError):
+            breaker.before_call()
+        breaker.record_success()
+        breaker.before_call()
+        self.assertEqual(breaker.get_stats()['state'], CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens_the_breaker(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, window_sec=10.0, cooldown_sec=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.record_failure()
+        with self.assertRaises(DatabaseUnavailableError):
+            breaker.before_call()
+        self.assertEqual(breaker.get_stats()['times_opened'], 2)
+
+    def test_old_failures_do_not_count(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, window_sec=0.01, cooldown_sec=10.0)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.record_failure()
+        breaker.before_call()
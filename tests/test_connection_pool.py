@@ -0,0 +1,77 @@
+import threading
+import time
+import unittest
+
+from flask_app.config.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.created.append(connection)
+        return connection
+
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=2)
+        for _ in range(10):
+            connection = pool.get_connection()
+            pool.release_connection(connection)
+        self.assertEqual(len(self.created), 1)
+
+    def test_checkout_times_out_when_pool_is_exhausted(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=1, checkout_timeout_sec=0.05)
+        connection = pool.get_connection()
+        with self.assertRaises(PoolTimeoutError):
+            pool.get_connection()
+        pool.release_connection(connection)
+        self.assertIs(pool.get_connection(), connection)
+
+    def test_waiting_thread_receives_released_connection(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=1, checkout_timeout_sec=2.0)
+        connection = pool.get_connection()
+        received = []
+        waiter = threading.Thread(target=lambda: received.append(pool.get_connection()))
+        waiter.start()
+        time.sleep(0.05)
+        pool.release_connection(connection)
+        waiter.join(timeout=2.0)
+        self.assertEqual(received, [connection])
+
+    def test_idle_connections_above_min_size_are_reaped(self):
+        pool = ConnectionPool(self.connect, min_size=1, max_size=3, max_idle_sec=0.0)
+        connections = [pool.get_connection() for _ in range(3)]
+        for connection in connections:
+            pool.release_connection(connection)
+        self.assertEqual(pool.reap_idle_connections(), 2)
+        self.assertEqual(pool.get_stats()['open'], 1)
+        self.assertEqual(sum(c.closed for c in self.created), 2)
+
+    def test_dead_connections_are_replaced(self):
+        pool = ConnectionPool(
+            self.connect, min_size=0, max_size=1, ping_after_idle_sec=0.0, is_alive=lambda c: c.alive
+        )
+        connection = pool.get_connection()
+        pool.release_connection(connection)
+        connection.alive = False
+        replacement = pool.get_connection()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+
+    def test_discarded_connections_free_their_spot(self):
+        pool = ConnectionPool(self.connect, min_size=0, max_size=1, checkout_timeout_sec=0.05)
+        connection = pool.get_connection()
+        pool.release_connection(connection, discard=True)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.get_connection(), connection)
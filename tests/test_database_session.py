@@ -0,0 +1,114 @@
+import unittest
+
+import pymysql
+
+from flask_app.config.connection_pool import ConnectionPool
+from flask_app.config.database_backends import SQLiteBackend
+from flask_app.config.database_session import DatabaseSession
+from flask_app.config.sqldatabase import SQLDatabase
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class DeadlockOnceBackend(SQLiteBackend):
+    """
+    Fails the first INSERT with a deadlock, and remembers which endpoint (by host) each statement ran on.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.deadlocks_left = 1
+        self.hosts = dict()  # Connection -> host it was opened for.
+        self.statement_hosts = []
+
+    def connect(self, db_name: str, connection_settings: dict, pool_settings: dict):
+        connection = super().connect(db_name, connection_settings, pool_settings)
+        self.hosts[connection] = connection_settings['host']
+        return connection
+
+    def get_cursor(self, connection, cursor_class: type = None):
+        return RecordingCursor(super().get_cursor(connection, cursor_class), self, self.hosts[connection])
+
+
+class RecordingCursor:
+    def __init__(self, cursor, backend: DeadlockOnceBackend, host: str):
+        self.__cursor = cursor
+        self.__backend = backend
+        self.__host = host
+
+    def __getattr__(self, name: str):
+        return getattr(self.__cursor, name)
+
+    def execute(self, query: str, query_args: dict = None) -> int:
+        self.__backend.statement_hosts.append(self.__host)
+        if query.lstrip().upper().startswith('INSERT') and self.__backend.deadlocks_left > 0:
+            self.__backend.deadlocks_left -= 1
+            raise pymysql.err.OperationalError(1213, "Deadlock found when trying to get lock")
+        return self.__cursor.execute(query, query_args)
+
+
+class TestDatabaseSession(unittest.TestCase):
+    def test_session_forgets_writes_after_each_transaction(self):
+        pool = ConnectionPool(FakeConnection, min_size=0, max_size=1)
+        session = DatabaseSession(lambda: pool)
+        for end_transaction in (session.commit, session.rollback):
+            session.get_connection()
+            session.mark_written()
+            self.assertTrue(session.has_written())
+            self.assertTrue(session.reads_from_primary())
+            end_transaction()
+            self.assertFalse(session.has_written())
+            self.assertFalse(session.reads_from_primary())
+
+        session.set_read_from_primary()
+        session.mark_written()
+        session.commit()
+        self.assertFalse(session.has_written())
+        self.assertTrue(session.reads_from_primary())
+
+    def test_write_that_succeeds_on_a_retry_is_remembered(self):
+        backend = DeadlockOnceBackend()
+        settings = {
+            'db_name': 'session_retry_test',
+            'host': 'primary',
+            'backend': backend,
+            'replicas': [{'host': 'replica'}],
+            'retry_settings': {'max_attempts': 3, 'base_delay_sec': 0.0},
+        }
+        select = "SELECT message FROM exceptions WHERE type = %(type)s;"
+        session = SQLDatabase(**settings).open_session()
+        db = SQLDatabase(session=session, **settings)
+        db.execute_query(select, {'type': 'RetryTest', })
+        self.assertEqual(backend.statement_hosts, ['replica'])  # Reads go to the replica until something is written.
+
+        db.execute_query("INSERT INTO exceptions (type, message) VALUES (%(type)s, %(message)s);", {
+            'type': 'RetryTest', 'message': "Written on the second attempt.",
+        })
+        self.assertEqual(backend.deadlocks_left, 0)
+        self.assertTrue(session.has_written())
+        self.assertTrue(session.reads_from_primary())
+
+        del backend.statement_hosts[:]
+        rows = db.execute_query(select, {'type': 'RetryTest', })
+        self.assertEqual(rows, [{'message': "Written on the second attempt."}])
+        self.assertEqual(backend.statement_hosts, ['primary'])
+
+        # The write state only lasts until the transaction that made the write ends.
+        session.commit()
+        self.assertFalse(session.has_written())
+        self.assertFalse(session.reads_from_primary())
+        del backend.statement_hosts[:]
+        db.execute_query(select, {'type': 'RetryTest', })
+        self.assertEqual(backend.statement_hosts, ['replica'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from flask_app.config.exception_recorder import ExceptionRecorder, get_message_template
+
+
+def raise_lookup_error(key: str) -> None:
+    raise LookupError("No record with the key '{}' in table 42.".format(key))
+
+
+class TestExceptionRecorder(unittest.TestCase):
+    def test_message_template(self):
+        self.assertEqual(
+            get_message_template("The user with an ID of '17' has 3 events at 0x1f."),
+            "The user with an ID of ? has ? events at ?."
+        )
+
+    def test_exceptions_are_grouped_by_fingerprint(self):
+        batches = []
+        recorder = ExceptionRecorder(batches.append, flush_interval_sec=60)
+        for key in ('a', 'b', 'c'):
+            try:
+                raise_lookup_error(key)
+            except LookupError as ex:
+                recorder.record(ex)
+        recorder.record(LookupError("No record with the key 'd' in table 42."))  # Not raised: a different stack.
+        self.assertEqual(recorder.flush(), 2)
+        self.assertEqual(sorted(row['occurrences'] for row in batches[0]), [1, 3])
+        self.assertEqual(recorder.flush(), 0)
+        recorder.close()
+
+    def test_storms_are_sampled(self):
+        batches = []
+        recorder = ExceptionRecorder(batches.append, flush_interval_sec=60, max_per_sec=10, sample_every=5)
+        for _ in range(60):
+            recorder.record(Exception("The database is down."))
+        recorder.flush()
+        stats = recorder.get_stats()
+        # Each kept exception beyond the first ten stands for sample_every of them, so the total stays close.
+        self.assertLess(stats['sampled_out'], 50)
+        self.assertEqual(batches[0][0]['occurrences'], stats['recorded'])
+        self.assertLessEqual(abs(stats['recorded'] - 60), 5)
+        recorder.close()
+
+    def test_failed_writes_are_retried(self):
+        batches = []
+
+        def write_rows(rows: list) -> None:
+            if len(batches) == 0:
+                batches.append(None)
+                raise Exception("The database is down.")
+            batches.append(rows)
+
+        recorder = ExceptionRecorder(write_rows, flush_interval_sec=60)
+        recorder.record(Exception("First."))
+        self.assertEqual(recorder.flush(), 0)
+        recorder.record(Exception("First."))
+        self.assertEqual(recorder.flush(), 1)
+        self.assertEqual(batches[1][0]['occurrences'], 2)
+        self.assertEqual(recorder.get_stats()['failed_writes'], 1)
+        recorder.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
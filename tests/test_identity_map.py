@@ -0,0 +1,33 @@
+import unittest
+
+from flask_app.config.identity_map import IdentityMap
+
+
+class TestIdentityMap(unittest.TestCase):
+    def test_objects_and_misses_are_remembered(self):
+        identity_map = IdentityMap()
+        model = object()
+        identity_map.add('users', 5, model)
+        identity_map.add('users', 6, None)
+        self.assertIs(identity_map.get('users', '5')[1], model)  # IDs from URLs are strings.
+        self.assertEqual(identity_map.get('users', 6), (True, None))
+        self.assertEqual(identity_map.get('events', 5), (False, None))
+
+    def test_discard(self):
+        identity_map = IdentityMap()
+        for key in (1, 2):
+            identity_map.add('users', key, object())
+            identity_map.add('events', key, object())
+        identity_map.add('users', 3, None)
+
+        identity_map.discard('users', keys=[1])
+        self.assertFalse(identity_map.get('users', 1)[0])
+        self.assertTrue(identity_map.get('users', 2)[0])
+
+        identity_map.discard('users', inserted=True)
+        self.assertFalse(identity_map.get('users', 3)[0])
+        self.assertTrue(identity_map.get('users', 2)[0])
+
+        identity_map.discard('users')
+        self.assertFalse(identity_map.get('users', 2)[0])
+        self.assertTrue(identity_map.get('events', 2)[0])
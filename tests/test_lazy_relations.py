@@ -0,0 +1,45 @@
+import unittest
+
+from flask_app.config.row_hydration import get_column_map, hydrate_rows
+from flask_app.utils.lazy_relations import LazyRelation, group_by, index_by
+
+
+class Comment:
+    __slots__ = ('id', 'user_id', '_lazy_values', '_siblings')
+    loaded_key_lists = []
+
+    def __init__(self, data: dict):
+        self.id = data['id']
+        self.user_id = data['user_id']
+
+    __user = LazyRelation(lambda c: c.user_id, lambda user_ids: Comment.__load_users(user_ids))
+
+    @classmethod
+    def __load_users(cls, user_ids: list) -> dict:
+        cls.loaded_key_lists.append(user_ids)
+        return {user_id: "user {}".format(user_id) for user_id in user_ids if user_id != 3}
+
+    def get_user(self):
+        return self.__user
+
+
+class TestLazyRelations(unittest.TestCase):
+    def setUp(self):
+        Comment.loaded_key_lists.clear()
+
+    def test_siblings_are_loaded_together(self):
+        comments = hydrate_rows(Comment, get_column_map([('id',), ('user_id',)]), [(1, 1), (2, 2), (3, 1), (4, 3)])
+        self.assertEqual(comments[2].get_user(), "user 1")
+        self.assertEqual(Comment.loaded_key_lists, [[1, 2, 3]])  # Distinct keys, one call.
+        self.assertEqual([c.get_user() for c in comments], ["user 1", "user 2", "user 1", None])
+        self.assertEqual(len(Comment.loaded_key_lists), 1)
+
+    def test_objects_without_siblings_load_alone(self):
+        comment = Comment({'id': 1, 'user_id': 2})
+        self.assertEqual(comment.get_user(), "user 2")
+        self.assertEqual(Comment.loaded_key_lists, [[2]])
+
+    def test_index_and_group_helpers(self):
+        comments = [Comment({'id': i, 'user_id': i % 2}) for i in (3, 2, 1)]
+        self.assertEqual(index_by(comments, 'id')[2].user_id, 0)
+        self.assertEqual([c.id for c in group_by(comments, 'user_id', sort_key=lambda c: c.id)[1]], [1, 3])
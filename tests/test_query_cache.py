@@ -0,0 +1,47 @@
+import time
+import unittest
+
+from flask_app.config.query_cache import QueryCache, get_insert_tag, get_row_tags
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_entries_expire(self):
+        cache = QueryCache(ttl_sec=0.01)
+        cache.set('key', [1], {'events'})
+        self.assertEqual(cache.get('key'), (True, [1]))
+        time.sleep(0.02)
+        self.assertEqual(cache.get('key'), (False, None))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = QueryCache(max_entries=2)
+        cache.set('a', 1, set())
+        cache.set('b', 2, set())
+        cache.get('a')
+        cache.set('c', 3, set())
+        self.assertFalse(cache.get('b')[0])
+        self.assertTrue(cache.get('a')[0])
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_row_and_insert_tags(self):
+        cache = QueryCache()
+        cache.set('event 5', ['row 5'], {'events'} | get_row_tags('events', [5]))
+        cache.set('event 6', ['row 6'], {'events'} | get_row_tags('events', [6]))
+        cache.set('missing event', [], {'events', get_insert_tag('events')})
+
+        cache.invalidate(get_row_tags('events', [5]))
+        self.assertFalse(cache.get('event 5')[0])
+        self.assertTrue(cache.get('event 6')[0])
+
+        cache.invalidate({get_insert_tag('events')})
+        self.assertFalse(cache.get('missing event')[0])
+        self.assertTrue(cache.get('event 6')[0])
+
+        cache.invalidate({'events'})
+        self.assertFalse(cache.get('event 6')[0])
+
+    def test_results_read_before_an_invalidation_are_not_stored(self):
+        cache = QueryCache()
+        generation = cache.get_generation()
+        cache.invalidate(get_row_tags('events', [5]))
+        cache.set('event 5', ['stale row'], get_row_tags('events', [5]), generation)
+        self.assertFalse(cache.get('event 5')[0])
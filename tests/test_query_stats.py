@@ -0,0 +1,27 @@
+import unittest
+
+from flask_app.config.query_stats import QueryStats
+
+
+class TestQueryStats(unittest.TestCase):
+    def test_statements_are_grouped_by_normalized_text(self):
+        stats = QueryStats()
+        stats.record("SELECT * FROM events\n    WHERE id = %(id)s;", 'a', 0.1, 1.0, 1)
+        stats.record("SELECT * FROM events WHERE id = %(id)s", 'b', 0.1, 3.0, 1)
+        summary = stats.get_summary()
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]['count'], 2)
+        self.assertEqual(summary[0]['callers'], ['a', 'b'])
+
+    def test_least_recently_run_statements_are_dropped(self):
+        stats = QueryStats(max_statements=2)
+        stats.record("SELECT 1", 'a', 0.0, 1.0, 1)
+        stats.record("SELECT 2", 'a', 0.0, 1.0, 1)
+        stats.record("SELECT 1", 'a', 0.0, 1.0, 1)
+        stats.record("SELECT 3", 'a', 0.0, 1.0, 1)
+        self.assertEqual(sorted(item['statement'] for item in stats.get_summary()), ["SELECT 1", "SELECT 3"])
+        self.assertEqual(stats.get_evicted_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import time
+import unittest
+
+from flask_app.config.replica_router import ReplicaRouter
+
+
+class TestReplicaRouter(unittest.TestCase):
+    def test_replicas_are_chosen_in_turn(self):
+        router = ReplicaRouter(['a', 'b'])
+        self.assertEqual([router.choose() for _ in range(4)], ['a', 'b', 'a', 'b'])
+
+    def test_failed_replicas_are_checked_before_they_are_used_again(self):
+        checks = []
+        healthy = {'a': False}
+
+        def is_healthy(name: str) -> bool:
+            checks.append(name)
+            return healthy[name]
+
+        router = ReplicaRouter(['a'], cooldown_sec=0.01, is_healthy=is_healthy)
+        self.assertEqual(router.choose(), 'a')
+        router.mark_failed('a')
+        self.assertIsNone(router.choose())  # Cooling down.
+        self.assertEqual(checks, [])
+
+        time.sleep(0.02)
+        self.assertIsNone(router.choose())  # The check fails, so the replica cools down again.
+        self.assertEqual(checks, ['a'])
+        self.assertFalse(router.get_stats()['a']['healthy'])
+
+        time.sleep(0.02)
+        healthy['a'] = True
+        self.assertEqual(router.choose(), 'a')
+        self.assertEqual(router.choose(), 'a')  # Only checked once after it recovers.
+        self.assertEqual(checks, ['a', 'a'])
+        self.assertEqual(router.get_stats()['a'], {'healthy': True, 'failures': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import pymysql
+
+from flask_app.config.retry_policy import RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, base_delay_sec=0.0, max_delay_sec=0.0)
+
+    def test_deadlocks_are_retried_even_for_writes(self):
+        ex = pymysql.err.OperationalError(1213, "Deadlock found when trying to get lock")
+        self.assertTrue(self.policy.should_retry(ex, 1, idempotent=False, in_transaction=False))
+
+    def test_lost_connections_only_retry_idempotent_statements(self):
+        ex = pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        self.assertTrue(self.policy.should_retry(ex, 1, idempotent=True, in_transaction=False))
+        self.assertFalse(self.policy.should_retry(ex, 1, idempotent=False, in_transaction=False))
+
+    def test_nothing_is_retried_after_earlier_writes_in_the_transaction(self):
+        ex = pymysql.err.OperationalError(1205, "Lock wait timeout exceeded")
+        self.assertFalse(self.policy.should_retry(ex, 1, idempotent=True, in_transaction=True))
+
+    def test_attempts_are_limited(self):
+        ex = pymysql.err.OperationalError(2006, "MySQL server has gone away")
+        self.assertTrue(self.policy.should_retry(ex, 2, idempotent=True, in_transaction=False))
+        self.assertFalse(self.policy.should_retry(ex, 3, idempotent=True, in_transaction=False))
+
+    def test_other_errors_are_not_retried(self):
+        ex = pymysql.err.IntegrityError(1062, "Duplicate entry")
+        self.assertFalse(self.policy.should_retry(ex, 1, idempotent=True, in_transaction=False))
+        self.assertEqual(self.policy.get_stats()['gave_up'], 0)
+
+    def test_retries_are_counted(self):
+        ex = pymysql.err.OperationalError(1213, "Deadlock found when trying to get lock")
+        self.policy.wait_before_retry(ex, 1)
+        self.policy.record_recovered()
+        self.assertEqual(self.policy.get_stats(), {'retries': {'deadlock': 1}, 'recovered': 1, 'gave_up': 0})
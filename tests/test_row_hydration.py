@@ -0,0 +1,28 @@
+import unittest
+
+from flask_app.config.row_hydration import RowView, get_column_map, hydrate_rows
+from flask_app.models.security_log import SecurityLog
+
+
+class TestRowHydration(unittest.TestCase):
+    def test_column_maps_are_shared(self):
+        first = get_column_map((('id',), ('log_type',)))
+        second = get_column_map([('id', 3), ('log_type', 253)])
+        self.assertIs(first, second)
+        self.assertEqual(first, {'id': 0, 'log_type': 1})
+
+    def test_row_view_reads_by_column_name(self):
+        view = RowView({'id': 0, 'log_type': 1}, (7, 'failed_login'))
+        self.assertEqual(view['log_type'], 'failed_login')
+        self.assertIn('id', view)
+        self.assertIsNone(view.get('missing'))
+        self.assertEqual(view.to_dict(), {'id': 7, 'log_type': 'failed_login'})
+
+    def test_models_are_built_from_tuples(self):
+        columns = get_column_map([('id',), ('created_at',), ('updated_at',), ('client_ip_address_id',), ('log_type',)])
+        logs = hydrate_rows(SecurityLog, columns, [(1, None, None, 10, 'a'), (2, None, None, 20, 'b')])
+        self.assertEqual(
+            [(log.id, log.client_ip_address_id, log.log_type) for log in logs], [(1, 10, 'a'), (2, 20, 'b')]
+        )
+        with self.assertRaises(AttributeError):
+            logs[0].unknown_field = True
@@ -0,0 +1,50 @@
+import unittest
+
+from flask_app.config.schema_migrations import (
+    SchemaMigrator, fill_query_parameters, find_model_queries, split_statements
+)
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    def test_split_statements(self):
+        script = """
+            -- A comment; with a semicolon.
+            CREATE TABLE a (id INT);
+
+            DELIMITER $$
+            CREATE TRIGGER t AFTER DELETE ON a FOR EACH ROW
+            BEGIN
+                DELETE FROM b WHERE b.id = OLD.id;
+            END$$
+            DELIMITER ;
+            CREATE INDEX a_idx ON a (id);
+        """
+        statements = split_statements(script)
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(statements[0], "CREATE TABLE a (id INT)")
+        self.assertIn("DELETE FROM b WHERE b.id = OLD.id;", statements[1])
+        self.assertTrue(statements[1].endswith("END"))
+        self.assertEqual(statements[2], "CREATE INDEX a_idx ON a (id)")
+
+    def test_migrations_are_numbered_in_order(self):
+        migrations = SchemaMigrator(db=None).get_migrations()
+        versions = [migration.version for migration in migrations]
+        self.assertEqual(versions, list(range(1, len(migrations) + 1)))
+        for migration in migrations:
+            self.assertGreater(len(migration.read_statements()), 0)
+
+    def test_model_queries_can_be_filled_in(self):
+        queries = find_model_queries()
+        share_key_queries = [query for query in queries if 'share_key = %(share_key)s' in query['query']]
+        self.assertGreater(len(share_key_queries), 0)
+        filled = fill_query_parameters(
+            "SELECT * FROM events WHERE id IN %(ids)s AND share_key = %(share_key)s AND start_time >= %(min_start_time)s"
+        )
+        self.assertEqual(
+            filled,
+            "SELECT * FROM events WHERE id IN (1, 2) AND share_key = 'sample' AND start_time >= '2000-01-01 00:00:00'"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+import unittest
+
+from flask_app.config.shared_counters import SharedWindowCounter, fcntl
+
+
+@unittest.skipIf(fcntl is None, "SharedWindowCounter needs fcntl.")
+class TestSharedWindowCounter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'counters')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_counts_are_shared_between_processes(self):
+        counter = SharedWindowCounter(self.path, max_age_sec=60, num_slots=64)
+        self.assertIsNone(counter.count('client', 60))
+        now = time.time()
+        counter.seed('client', [now - 120, now - 30])
+
+        pid = os.fork()
+        if pid == 0:  # A second worker, with its own mapping of the file.
+            SharedWindowCounter(self.path, max_age_sec=60, num_slots=64).add('client')
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(counter.count('client', 60), 2)
+        self.assertEqual(counter.count('client', 10), 1)
+        self.assertEqual(counter.count('other client', 60), None)
+
+    def test_rings_and_slots_are_reused(self):
+        counter = SharedWindowCounter(self.path, max_age_sec=60, max_count=3, num_slots=4, probe_length=4)
+        for index in range(4):
+            counter.seed(('client', index), [])
+        for _ in range(5):
+            counter.add(('client', 0))
+        self.assertEqual(counter.count(('client', 0), 60), 3)
+
+        counter.seed(('client', 4), [])  # Every slot is taken, so the least recently used one is reused.
+        self.assertFalse(counter.is_seeded(('client', 1)))
+        self.assertTrue(counter.is_seeded(('client', 0)))
+        self.assertEqual(counter.get_stats()['keys'], 4)
+
+        counter.clear()
+        self.assertEqual(counter.get_stats()['keys'], 0)
+
+    def test_files_with_other_sizes_are_refused(self):
+        SharedWindowCounter(self.path, max_age_sec=60, num_slots=64).clear()
+        with self.assertRaises(Exception):
+            SharedWindowCounter(self.path, max_age_sec=60, num_slots=32).clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
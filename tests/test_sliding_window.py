@@ -0,0 +1,40 @@
+import time
+import unittest
+
+from flask_app.config.sliding_window import SlidingWindowCounter
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    def test_keys_are_counted_once_seeded(self):
+        counter = SlidingWindowCounter(max_age_sec=60)
+        counter.add('client')
+        self.assertIsNone(counter.count('client', 60))
+
+        now = time.time()
+        counter.seed('client', [now - 50, now - 5])
+        counter.add('client')
+        self.assertEqual(counter.count('client', 60), 3)
+        self.assertEqual(counter.count('client', 10), 2)
+
+    def test_old_events_and_extra_events_are_dropped(self):
+        counter = SlidingWindowCounter(max_age_sec=60, max_count=3)
+        now = time.time()
+        counter.seed('client', [now - 120, now - 3, now - 2, now - 1])
+        self.assertEqual(counter.count('client', 60), 3)
+        counter.add('client')
+        self.assertEqual(counter.count('client', 60), 3)
+        self.assertEqual(counter.count('client', 1.5), 2)
+
+    def test_least_recently_used_keys_are_dropped(self):
+        counter = SlidingWindowCounter(max_age_sec=60, max_keys=2)
+        counter.seed('a', [])
+        counter.seed('b', [])
+        counter.count('a', 60)
+        counter.seed('c', [])
+        self.assertTrue(counter.is_seeded('a'))
+        self.assertFalse(counter.is_seeded('b'))
+        self.assertEqual(counter.get_stats()['evictions'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,417 @@
+import datetime
+import os
+import unittest
+
+os.environ['SHAREABLE_EVENTS_DB_BACKEND'] = 'sqlite'
+
+from flask_app import LOG_TYPE_URL_GUESSING, LOG_TYPE_USER_LOGIN
+from flask_app.config.database_backends import SQLiteBackend
+from flask_app.config.sliding_window import SlidingWindowCounter
+from flask_app.config.sqldatabase import SQLDatabase
+from flask_app.models.attendee import Attendee
+from flask_app.models.client_ip_address import ClientIPAddress
+from flask_app.models.event import Event
+from flask_app.models.event_location import EventLocation
+from flask_app.models.exception import SiteException
+from flask_app.models.private_event import PrivateEvent
+from flask_app.models.security_log import SecurityLog
+from flask_app.models.user_creates_event import UserCreatesEvent
+from flask_app.models.user_is_attendee import UserIsAttendee
+from flask_app.utils.database import get_database, get_database_backend, rollback_request_session
+from flask_app.utils.error_pages import get_error_page_stats
+from flask_app.utils.logging import get_security_log_writer
+from flask_app.utils.rate_limiting import RateLimiter
+from server import app  # Importing server registers every route.
+
+
+def count_queries() -> int:
+    return sum(stats['count'] for summary in SQLDatabase.get_query_stats().values() for stats in summary)
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    def test_backend_is_selected_from_the_environment(self):
+        self.assertIsInstance(get_database_backend(), SQLiteBackend)
+
+    def test_query_translation(self):
+        backend = SQLiteBackend()
+        statement, args = backend.translate_query(
+            "SELECT * FROM t WHERE a = %(a)s AND b LIKE '%%x' AND id IN %(ids)s;", {'a': 1, 'ids': [4, 5]}
+        )
+        self.assertEqual(statement, "SELECT * FROM t WHERE a = :a AND b LIKE '%x' AND id IN (:ids__0, :ids__1);")
+        self.assertEqual(args, {'a': 1, 'ids__0': 4, 'ids__1': 5})
+
+    def test_models_round_trip(self):
+        start_time = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(days=1)
+        event_id = Event.create({
+            'name': "SQLite test event",
+            'start_time': start_time,
+            'end_time': start_time + datetime.timedelta(hours=2),
+            'description': "Created by the SQLite backend test.",
+        })
+        found_event = Event.get_by_id(event_id)
+        self.assertEqual(found_event.name, "SQLite test event")
+        self.assertEqual(found_event.start_time, start_time)
+        self.assertIsInstance(found_event.created_at, datetime.datetime)
+
+        Attendee.create_many([
+            {'event_id': event_id, 'first_name': 'Ada', 'last_name': 'Lovelace', 'password': 'password123'},
+            {'event_id': event_id, 'first_name': 'Alan', 'last_name': 'Turing', 'password': 'password123'},
+        ])
+        self.assertEqual(sorted(a.first_name for a in Attendee.get_by_event_id(event_id)), ['Ada', 'Alan'])
+
+        Event.delete_by_id(event_id)
+        self.assertEqual(Attendee.get_by_event_id(event_id), [])  # Removed by ON DELETE CASCADE.
+
+    def test_cached_lookups_see_updates(self):
+        start_time = datetime.datetime.utcnow() + datetime.timedelta(days=3)
+        event_id = Event.create({
+            'name': "Cached event",
+            'start_time': start_time,
+            'end_time': start_time + datetime.timedelta(hours=1),
+            'description': "Read through the query cache.",
+        })
+        found_event = Event.get_by_id(event_id)
+        self.assertIs(Event.get_by_id(event_id).name, found_event.name)  # Second lookup comes from the cache.
+
+        found_event.name = "Renamed event"
+        found_event.update()
+        self.assertEqual(Event.get_by_id(event_id).name, "Renamed event")
+        self.assertEqual(Event.get_by_share_key(found_event.share_key).name, "Renamed event")
+
+        Event.delete_by_id(event_id)
+        self.assertIsNone(Event.get_by_id(event_id))
+
+    def test_cached_lookups_read_the_sessions_own_writes(self):
+        start_time = datetime.datetime.utcnow() + datetime.timedelta(days=3)
+        event_id = Event.create({
+            'name': "Cached before the write",
+            'start_time': start_time,
+            'end_time': start_time + datetime.timedelta(hours=1),
+            'description': "Read through the query cache.",
+        })
+        query = "SELECT * FROM events WHERE id = %(id)s LIMIT 1;"
+        with app.test_request_context('/'):
+            rows = get_database().execute_cached_query(query, {'id': event_id, }, table='events')
+            self.assertEqual(rows[0]['name'], "Cached before the write")
+
+        with app.test_request_context('/'):
+            db = get_database()
+            # Written without invalidating the cache, so only the session can tell that the cached row is stale.
+            db.execute_query(
+                "UPDATE events SET name = %(name)s WHERE id = %(id)s;", {'name': "Written", 'id': event_id, }
+            )
+            rows = db.execute_cached_query(query, {'id': event_id, }, table='events')
+            self.assertEqual(rows[0]['name'], "Written")
+            rollback_request_session()
+
+    def test_bulk_insert_returns_consecutive_ids(self):
+        ip_id = ClientIPAddress.create("192.0.2.10")
+        new_ids = SecurityLog.create_many([
+            {'client_ip_address_id': ip_id, 'log_type': 'sqlite_test'} for _ in range(5)
+        ])
+        self.assertEqual(len(new_ids), 5)
+        self.assertEqual([log.id for log in SecurityLog.get_by_client_ip_address_id(ip_id)], new_ids)
+
+    def test_in_list_arguments(self):
+        ip_ids = [ClientIPAddress.create("192.0.2.{}".format(i)) for i in range(20, 23)]
+        rows = get_database().execute_query(
+            "SELECT id FROM client_ip_addresses WHERE id IN %(ids)s;", {'ids': ip_ids[:2]}
+        )
+        self.assertEqual(sorted(row['id'] for row in rows), ip_ids[:2])
+
+    def test_event_page_renders(self):
+        start_time = datetime.datetime.utcnow() + datetime.timedelta(days=2)
+        event_id = Event.create({
+            'name': "Rendered event",
+            'start_time': start_time,
+            'end_time': start_time + datetime.timedelta(hours=1),
+            'description': "Shown on the event page.",
+        })
+        with app.test_client() as client:
+            response = client.get('/events/view/{}/'.format(Event.get_by_id(event_id).share_key))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Rendered event", response.data)
+
+    def test_error_pages_are_served_from_the_cache(self):
+        alert = ("Blocked", ["Try again later."])
+        with app.test_client() as client:
+            stats_before = get_error_page_stats()
+            queries_before = count_queries()
+            response = client.get('/no/such/page/')
+            self.assertEqual(response.status_code, 404)
+            self.assertIn(b"Error 404", response.data)
+            self.assertEqual(get_error_page_stats()['hits'], stats_before['hits'] + 1)
+            self.assertEqual(count_queries(), queries_before)
+
+            # A page with an alert is rendered the first time, then cached like the others.
+            for _ in range(2):
+                with client.session_transaction() as client_session:
+                    client_session['alert'] = alert
+                response = client.get('/no/such/page/')
+                self.assertIn(b"Try again later.", response.data)
+            stats = get_error_page_stats()
+            self.assertEqual(stats['renders'], stats_before['renders'] + 1)
+            self.assertEqual(stats['hits'], stats_before['hits'] + 2)
+            with client.session_transaction() as client_session:
+                self.assertNotIn('alert', client_session)
+
+    def test_prefetch_uses_a_fixed_number_of_queries(self):
+        user_id = get_database().execute_insert(
+            "INSERT INTO users (first_name, last_name, email, password) VALUES ('Grace', 'Hopper', %(email)s, 'x');",
+            {'email': "grace.{}@example.com".format(datetime.datetime.utcnow().timestamp())}
+        )
+        start_time = datetime.datetime.utcnow() + datetime.timedelta(days=4)
+        event_ids = [
+            Event.create({
+                'name': "Prefetched event {}".format(i),
+                'start_time': start_time,
+                'end_time': start_time + datetime.timedelta(hours=1),
+                'description': "Loaded in batches.",
+            })
+            for i in range(3)
+        ]
+        UserCreatesEvent.create({'user_id': user_id, 'event_id': event_ids[0]})
+        EventLocation.create({
+            'event_id': event_ids[1], 'street': "1 Main St", 'city': "Springfield", 'state': "IL",
+            'country': "United States", 'postal_code': "62701", 'notes': "",
+        })
+        PrivateEvent.create({'event_id': event_ids[2], 'secret_key': "secret"})
+        attendee_ids = Attendee.create_many([
+            {'event_id': event_id, 'first_name': name, 'last_name': 'Guest', 'password': 'x'}
+            for event_id in event_ids for name in ('Zed', 'Amy')
+        ])
+        UserIsAttendee.create({'user_id': user_id, 'attendee_id': attendee_ids[0]})
+
+        events = [Event.get_by_id(event_id) for event_id in event_ids]
+        queries_before = count_queries()
+        Event.prefetch(events, 'author', 'location', 'private', 'attendees__user')
+        self.assertEqual(count_queries() - queries_before, 7)
+
+        queries_before = count_queries()
+        self.assertEqual(events[0].get_author_user().id, user_id)
+        self.assertIsNone(events[1].get_author_user())
+        self.assertEqual(events[1].get_event_location().city, "Springfield")
+        self.assertIsNone(events[0].get_event_location())
+        self.assertEqual(events[2].get_private_event().secret_key, "secret")
+        self.assertEqual([a.first_name for a in events[0].get_attendees()], ['Amy', 'Zed'])
+        self.assertEqual(events[0].get_attendees()[1].get_user_if_exists().id, user_id)
+        self.assertIsNone(events[1].get_attendees()[0].get_user_if_exists())
+        self.assertTrue(events[0].user_is_attending(user_id))
+        self.assertFalse(events[1].user_is_attending(user_id))
+        self.assertEqual(count_queries(), queries_before)
+
+    def test_user_event_lists_use_one_query(self):
+        user_id = get_database().execute_insert(
+            "INSERT INTO users (first_name, last_name, email, password) VALUES ('Alan', 'Kay', %(email)s, 'x');",
+            {'email': "alan.{}@example.com".format(datetime.datetime.utcnow().timestamp())}
+        )
+        start_time = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(days=10)
+        event_ids = []
+        for days in (2, 0, 1):
+            event_id = Event.create({
+                'name': "Listed event",
+                'start_time': start_time + datetime.timedelta(days=days),
+                'end_time': start_time + datetime.timedelta(days=days, hours=1),
+                'description': "Found through a JOIN.",
+            })
+            event_ids.append(event_id)
+            UserCreatesEvent.create({'user_id': user_id, 'event_id': event_id})
+            attendee_ids = Attendee.create_many([
+                {'event_id': event_id, 'first_name': 'Alan', 'last_name': 'Kay', 'password': 'x'} for _ in range(2)
+            ])
+            for attendee_id in attendee_ids:
+                UserIsAttendee.create({'user_id': user_id, 'attendee_id': attendee_id})
+
+        queries_before = count_queries()
+        created_events = Event.get_by_author_id(user_id)
+        self.assertEqual(count_queries() - queries_before, 1)
+        self.assertEqual([e.id for e in created_events], [event_ids[1], event_ids[2], event_ids[0]])
+
+        attending_events = Event.get_by_user_id_through_attendee(
+            user_id, min_start_time=start_time + datetime.timedelta(hours=12), limit=1
+        )
+        self.assertEqual([e.id for e in attending_events], [event_ids[2]])
+        self.assertEqual(
+            len(Event.get_by_user_id_through_attendee(user_id, max_start_time=start_time + datetime.timedelta(days=1))),
+            2
+        )
+
+    def test_dashboard_pages_with_a_keyset_cursor(self):
+        user_id = get_database().execute_insert(
+            "INSERT INTO users (first_name, last_name, email, password) VALUES ('Edsger', 'Dijkstra', %(email)s, 'x');",
+            {'email': "edsger.{}@example.com".format(datetime.datetime.utcnow().timestamp())}
+        )
+        start_time = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(days=20)
+        for days in (-30, 0, 0, 1):  # One event has already ended, and two start at the same time.
+            event_id = Event.create({
+                'name': "Paged event",
+                'start_time': start_time + datetime.timedelta(days=days),
+                'end_time': start_time + datetime.timedelta(days=days, hours=1),
+                'description': "Shown one page at a time.",
+            })
+            UserCreatesEvent.create({'user_id': user_id, 'event_id': event_id})
+
+        first_page = Event.get_by_author_id(user_id, exclude_ended=True, limit=2)
+        self.assertEqual(len(first_page), 2)
+        after = Event.parse_page_cursor(Event.get_page_cursor(first_page[-1]))
+        second_page = Event.get_by_author_id(user_id, exclude_ended=True, limit=2, after=after)
+        self.assertEqual(len(second_page), 1)
+        self.assertEqual(second_page[0].start_time, start_time + datetime.timedelta(days=1))
+        self.assertIsNone(Event.parse_page_cursor("not a cursor"))
+
+        with app.test_client() as client:
+            with client.session_transaction() as client_session:
+                client_session['user_id'] = user_id
+            response = client.get('/dashboard/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data.count(b"Paged event"), 3)
+
+    def test_dashboard_feed_uses_one_query(self):
+        user_id = get_database().execute_insert(
+            "INSERT INTO users (first_name, last_name, email, password) VALUES ('Barbara', 'Liskov', %(email)s, 'x');",
+            {'email': "barbara.{}@example.com".format(datetime.datetime.utcnow().timestamp())}
+        )
+        start_time = datetime.datetime.utcnow().replace(microsecond=0) + datetime.timedelta(days=30)
+        event_ids = []
+        for days in (2, 1, 0):
+            event_ids.append(Event.create({
+                'name': "Feed event",
+                'start_time': start_time + datetime.timedelta(days=days),
+                'end_time': start_time + datetime.timedelta(days=days, hours=1),
+                'description': "Part of the dashboard feed.",
+            }))
+        for event_id in event_ids[:2]:
+            UserCreatesEvent.create({'user_id': user_id, 'event_id': event_id})
+        for event_id in event_ids[1:]:
+            attendee_id = Attendee.create({
+                'event_id': event_id, 'first_name': 'Barbara', 'last_name': 'Liskov', 'password': 'x'
+            })
+            UserIsAttendee.create({'user_id': user_id, 'attendee_id': attendee_id})
+
+        queries_before = count_queries()
+        feed = Event.get_dashboard_feed(user_id, exclude_ended=True, limit=1)
+        self.assertEqual(count_queries() - queries_before, 1)
+        self.assertEqual([e.id for e in feed['created_events']], [event_ids[1]])
+        self.assertEqual([e.id for e in feed['attending_events']], [event_ids[2]])
+
+        feed = Event.get_dashboard_feed(
+            user_id, created_after=Event.parse_page_cursor(Event.get_page_cursor(feed['created_events'][0]))
+        )
+        self.assertEqual([e.id for e in feed['created_events']], [event_ids[0]])
+        self.assertEqual([e.id for e in feed['attending_events']], [event_ids[2], event_ids[1]])
+
+    def test_identity_map_loads_each_row_once_per_request(self):
+        start_time = datetime.datetime.utcnow() + datetime.timedelta(days=5)
+        event_id = Event.create({
+            'name': "Mapped event",
+            'start_time': start_time,
+            'end_time': start_time + datetime.timedelta(hours=1),
+            'description': "Loaded once per request.",
+        })
+        with app.test_request_context():
+            found_event = Event.get_by_id(event_id)
+            queries_before = count_queries()
+            self.assertIs(Event.get_by_id(str(event_id)), found_event)
+            self.assertEqual(count_queries(), queries_before)
+
+            found_event.name = "Renamed mapped event"
+            found_event.update()
+            self.assertEqual(Event.get_by_id(event_id).name, "Renamed mapped event")
+
+            Event.delete_by_id(event_id)
+            self.assertIsNone(Event.get_by_id(event_id))
+
+    def test_lazy_relations_load_for_every_sibling(self):
+        start_time = datetime.datetime.utcnow() + datetime.timedelta(days=6)
+        event_ids = [
+            Event.create({
+                'name': "Sibling event",
+                'start_time': start_time,
+                'end_time': start_time + datetime.timedelta(hours=1),
+                'description': "Its attendees load their events together.",
+            })
+            for _ in range(3)
+        ]
+        Attendee.create_many([
+            {'event_id': event_id, 'first_name': 'Sib', 'last_name': 'Ling', 'password': 'x'} for event_id in event_ids
+        ])
+        attendees = Attendee.get_by_event_ids(event_ids)
+
+        queries_before = count_queries()
+        self.assertEqual(sorted(a.get_event().id for a in attendees), event_ids)
+        self.assertEqual([a.get_user_if_exists() for a in attendees], [None, None, None])
+        self.assertEqual(count_queries() - queries_before, 2)
+
+    def test_rate_limiter_counts_in_memory(self):
+        client_ip = '203.0.113.19'
+        rate_limiter = RateLimiter(SlidingWindowCounter(max_age_sec=30 * 60))
+        self.assertEqual(rate_limiter.count(client_ip, LOG_TYPE_USER_LOGIN, 15), 0)
+        rate_limiter.hit(client_ip, LOG_TYPE_USER_LOGIN)
+        rate_limiter.hit(client_ip, LOG_TYPE_USER_LOGIN)
+        self.assertTrue(get_security_log_writer().flush(timeout_sec=5))
+
+        queries_before = count_queries()
+        self.assertEqual(rate_limiter.count(client_ip, LOG_TYPE_USER_LOGIN, 15), 2)
+        self.assertEqual(rate_limiter.count(client_ip, LOG_TYPE_URL_GUESSING, 30), 0)
+        self.assertEqual(count_queries() - queries_before, 1)  # Only the new log type is loaded.
+
+        # A new process loads the same count from the database, and so does the COUNT query.
+        self.assertEqual(RateLimiter(SlidingWindowCounter(max_age_sec=30 * 60)).count(
+            client_ip, LOG_TYPE_USER_LOGIN, 15
+        ), 2)
+        self.assertEqual(RateLimiter(None).count(client_ip, LOG_TYPE_USER_LOGIN, 15), 2)
+
+    def test_rate_limiter_counts_logs_that_are_not_written_yet(self):
+        client_ip = '203.0.113.20'
+        get_security_log_writer().flush(timeout_sec=5)
+        RateLimiter(None).hit(client_ip, LOG_TYPE_USER_LOGIN)
+        RateLimiter(None).hit(client_ip, LOG_TYPE_USER_LOGIN)
+        # Both logs count, whether or not the writer has written them yet.
+        self.assertEqual(RateLimiter(None).count(client_ip, LOG_TYPE_USER_LOGIN, 15), 2)
+        self.assertEqual(RateLimiter(SlidingWindowCounter(max_age_sec=30 * 60)).count(
+            client_ip, LOG_TYPE_USER_LOGIN, 15
+        ), 2)
+        self.assertTrue(get_security_log_writer().flush(timeout_sec=5))
+        self.assertEqual(RateLimiter(None).count(client_ip, LOG_TYPE_USER_LOGIN, 15), 2)
+
+    def test_client_ip_get_or_create(self):
+        client_ip = '198.51.100.21'
+        client_ip_address_id = ClientIPAddress.get_or_create(client_ip)
+        self.assertEqual(ClientIPAddress.get_by_ip_address(client_ip).id, client_ip_address_id)
+
+        queries_before = count_queries()
+        self.assertEqual(ClientIPAddress.get_or_create(client_ip), client_ip_address_id)
+        self.assertEqual(count_queries(), queries_before)
+
+        # Without the remembered ID, the upsert finds the existing row instead of adding another one.
+        ClientIPAddress.forget_ids([client_ip_address_id])
+        self.assertEqual(ClientIPAddress.get_or_create(client_ip), client_ip_address_id)
+        self.assertEqual(count_queries() - queries_before, 1)
+
+    def test_exception_upserts_add_occurrences(self):
+        row = {'fingerprint': 'upsert-test', 'type': "<class 'Exception'>", 'message': "First.", 'occurrences': 2}
+        SiteException.upsert_many([row])
+        SiteException.upsert_many([dict(row, message="Second.", occurrences=3)])
+        items = get_database().execute_query(
+            "SELECT message, occurrences FROM exceptions WHERE fingerprint = %(fingerprint)s;", row
+        )
+        self.assertEqual(items, [{'message': "First.", 'occurrences': 5}])
+
+    def test_security_log_retention(self):
+        ip_id = ClientIPAddress.get_or_create('192.0.2.23')
+        old = datetime.datetime.now() - datetime.timedelta(days=40)
+        log_ids = SecurityLog.create_many([
+            {'client_ip_address_id': ip_id, 'log_type': 'RETENTION TEST', 'created_at': old} for _ in range(5)
+        ])
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=30)
+        self.assertEqual(SecurityLog.archive_before(cutoff, batch_size=2), 5)
+        self.assertEqual(SecurityLog.archive_before(cutoff, batch_size=2), 0)
+        self.assertEqual(SecurityLog.get_by_client_ip_address_id(ip_id), [])
+        archived = get_database().execute_query(
+            "SELECT id FROM security_logs_archive WHERE id IN %(ids)s ORDER BY id;", {'ids': log_ids, }
+        )
+        self.assertEqual([row['id'] for row in archived], log_ids)
+
+        # The address has no logs left, so it goes once it is older than the cutoff.
+        ClientIPAddress.delete_unused_before(datetime.datetime.now() + datetime.timedelta(days=1))
+        self.assertIsNone(ClientIPAddress.get_by_ip_address('192.0.2.23'))